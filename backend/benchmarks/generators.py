@@ -0,0 +1,320 @@
+from __future__ import annotations
+
+import random
+from contextlib import contextmanager
+from dataclasses import dataclass, fields, replace
+from datetime import datetime, timedelta
+from typing import Callable, Iterator
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.db import models, transaction
+from django.db.models import Value
+from django.db.models.functions import Cast, LPad
+from django.utils import timezone
+
+from community.models import CommunityComment, CommunityPost, CommunityPostLike
+from community.services import COMMENT_PATH_WIDTH, rebuild_tag_stats, reconcile_post_counters
+from dashboard.services import rebuild_rollups
+from diagnosis.models import Diagnosis
+from logs.models import LogEntry, Reminder
+from vision.models import ScanSession
+
+BENCH_EMAIL_DOMAIN = "bench.plantify.local"
+
+PLANTS = ["Cabai", "Tomat", "Padi", "Jagung", "Kopi", "Kakao", "Bawang merah", "Kentang", "Jeruk", "Pisang"]
+ISSUES = [
+    ("Antraknosa", "buah"),
+    ("Bercak daun Cercospora", "daun"),
+    ("Busuk daun (late blight)", "daun"),
+    ("Layu Fusarium", "batang"),
+    ("Blas", "daun"),
+    ("Hawar daun bakteri", "daun"),
+    ("Karat daun", "daun"),
+    ("Kutu daun", "daun"),
+    ("Thrips", "daun"),
+    ("Busuk pangkal batang", "batang"),
+]
+TAGS = ["cabai", "tomat", "padi", "organik", "hama", "jamur", "pupuk", "irigasi", "panen", "bibit", "hidroponik", "tanya"]
+WORDS = (
+    "daun batang akar buah bercak kuning layu kering basah jamur hama kutu semprot pupuk organik kompos "
+    "air hujan panas lembab pagi sore minggu tanaman kebun sawah bibit panen hasil gejala obat cara"
+).split()
+
+
+@dataclass
+class SeedPlan:
+    users: int = 2_000
+    posts: int = 100_000
+    likes: int = 1_000_000
+    comments: int = 200_000
+    diagnoses: int = 500_000
+    logs: int = 1_000_000
+    reminders: int = 50_000
+    days: int = 180
+
+    def scaled(self, factor: float) -> "SeedPlan":
+        return replace(
+            self,
+            **{f.name: max(1, int(getattr(self, f.name) * factor)) for f in fields(self) if f.name != "days"},
+        )
+
+
+@contextmanager
+def explicit_timestamps(*model_classes: type[models.Model]) -> Iterator[None]:
+    """Let bulk inserts carry their own ``created_at``/``updated_at`` instead of ``now()``."""
+    saved = []
+    for model in model_classes:
+        for field in model._meta.concrete_fields:
+            if getattr(field, "auto_now", False) or getattr(field, "auto_now_add", False):
+                saved.append((field, field.auto_now, field.auto_now_add))
+                field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, auto_now, auto_now_add in saved:
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
+
+
+class Seeder:
+    """Bulk-insert a synthetic but realistically shaped dataset.
+
+    Activity is skewed toward recent days and popular posts get most of the
+    likes, so the dashboards and feeds see a distribution close to production.
+    All rows belong to users on ``BENCH_EMAIL_DOMAIN`` so ``reset()`` can drop
+    them without touching real data.
+    """
+
+    def __init__(
+        self,
+        plan: SeedPlan,
+        seed: int = 1,
+        batch_size: int = 5_000,
+        log: Callable[[str], None] = print,
+    ) -> None:
+        self.plan = plan
+        self.rng = random.Random(seed)
+        self.batch_size = batch_size
+        self.log = log
+        self.now = timezone.now()
+        self.user_ids: list[int] = []
+        self.post_ids: list[int] = []
+
+    def run(self) -> dict[str, int]:
+        with explicit_timestamps(CommunityPost, CommunityPostLike, CommunityComment, ScanSession, Diagnosis, LogEntry, Reminder):
+            created = {
+                "users": self.seed_users(),
+                "posts": self.seed_posts_and_likes(),
+                "likes": self._likes_created,
+                "comments": self.seed_comments(),
+                "diagnoses": self.seed_diagnoses(),
+                "logs": self.seed_logs(),
+                "reminders": self.seed_reminders(),
+            }
+        rebuild_rollups(batch_size=self.batch_size)
+        return created
+
+    @classmethod
+    def reset(cls, log: Callable[[str], None] = print) -> None:
+        users = get_user_model().objects.filter(email__endswith=f"@{BENCH_EMAIL_DOMAIN}")
+        for model in (CommunityPostLike, CommunityComment, CommunityPost, Diagnosis, ScanSession, LogEntry, Reminder):
+            deleted, _ = model.objects.filter(user__in=users).delete()
+            log(f"Deleted {deleted} {model.__name__} row(s)")
+        deleted, _ = users.delete()
+        log(f"Deleted {deleted} user row(s)")
+        rebuild_tag_stats()
+        rebuild_rollups()
+
+    def _timestamp(self) -> datetime:
+        # Kuadrat dari uniform: lebih banyak aktivitas di hari-hari terakhir
+        return self.now - timedelta(days=self.plan.days * self.rng.random() ** 2, seconds=self.rng.randint(0, 86_399))
+
+    def _text(self, words: int) -> str:
+        return " ".join(self.rng.choices(WORDS, k=words)).capitalize() + "."
+
+    def _insert(self, model: type[models.Model], rows: list[models.Model]) -> list[models.Model]:
+        with transaction.atomic():
+            return model.objects.bulk_create(rows, batch_size=self.batch_size)
+
+    def _chunks(self, total: int) -> Iterator[int]:
+        done = 0
+        while done < total:
+            size = min(self.batch_size, total - done)
+            yield size
+            done += size
+
+    def seed_users(self) -> int:
+        User = get_user_model()
+        existing = User.objects.filter(email__endswith=f"@{BENCH_EMAIL_DOMAIN}").count()
+        password = make_password(None)
+        for offset, size in self._offsets(existing, self.plan.users):
+            self._insert(
+                User,
+                [
+                    User(
+                        email=f"user{offset + i}@{BENCH_EMAIL_DOMAIN}",
+                        username=f"user{offset + i}@{BENCH_EMAIL_DOMAIN}",
+                        first_name=f"Petani {offset + i}",
+                        password=password,
+                    )
+                    for i in range(size)
+                ],
+            )
+        self.user_ids = list(
+            User.objects.filter(email__endswith=f"@{BENCH_EMAIL_DOMAIN}").order_by("id").values_list("id", flat=True)
+        )
+        self.log(f"Users: {len(self.user_ids)}")
+        return self.plan.users
+
+    def _offsets(self, start: int, total: int) -> Iterator[tuple[int, int]]:
+        offset = start
+        for size in self._chunks(total):
+            yield offset, size
+            offset += size
+
+    def seed_posts_and_likes(self) -> int:
+        mean_likes = self.plan.likes / max(self.plan.posts, 1)
+        max_likes = len(self.user_ids)
+        self._likes_created = 0
+        for size in self._chunks(self.plan.posts):
+            like_counts = [min(max_likes, int(self.rng.expovariate(1 / mean_likes))) if mean_likes else 0 for _ in range(size)]
+            posts = self._insert(
+                CommunityPost,
+                [
+                    CommunityPost(
+                        user_id=self.rng.choice(self.user_ids),
+                        title=self._text(self.rng.randint(4, 10)),
+                        body=self._text(self.rng.randint(20, 120)),
+                        tags=self.rng.sample(TAGS, self.rng.randint(0, 3)),
+                        upvotes=count,
+                        created_at=(created := self._timestamp()),
+                        updated_at=created,
+                    )
+                    for count in like_counts
+                ],
+            )
+            likes = [
+                CommunityPostLike(post_id=post.id, user_id=user_id, created_at=post.created_at)
+                for post, count in zip(posts, like_counts)
+                for user_id in self.rng.sample(self.user_ids, count)
+            ]
+            for start in range(0, len(likes), self.batch_size):
+                self._insert(CommunityPostLike, likes[start:start + self.batch_size])
+            self._likes_created += len(likes)
+            self.post_ids.extend(post.id for post in posts)
+            self.log(f"Posts: {len(self.post_ids)}/{self.plan.posts}, likes: {self._likes_created}")
+        rebuild_tag_stats(batch_size=self.batch_size)
+        return len(self.post_ids)
+
+    def seed_comments(self) -> int:
+        created = 0
+        for size in self._chunks(self.plan.comments):
+            self._insert(
+                CommunityComment,
+                [
+                    CommunityComment(
+                        post_id=self.rng.choice(self.post_ids),
+                        user_id=self.rng.choice(self.user_ids),
+                        body=self._text(self.rng.randint(5, 40)),
+                        created_at=self._timestamp(),
+                    )
+                    for _ in range(size)
+                ],
+            )
+            created += size
+            self.log(f"Comments: {created}/{self.plan.comments}")
+        CommunityComment.objects.filter(parent__isnull=True, path="").update(
+            path=LPad(Cast("id", models.CharField()), COMMENT_PATH_WIDTH, Value("0"))
+        )
+        reconcile_post_counters(CommunityPost.objects.filter(user__email__endswith=f"@{BENCH_EMAIL_DOMAIN}"))
+        return created
+
+    def seed_diagnoses(self) -> int:
+        created = 0
+        for size in self._chunks(self.plan.diagnoses):
+            scans = self._insert(
+                ScanSession,
+                [
+                    ScanSession(
+                        user_id=self.rng.choice(self.user_ids),
+                        image="scans/bench-placeholder.jpg",
+                        plant_name=self.rng.choice(PLANTS),
+                        analysis_summary=self._text(15),
+                        analysis_confidence=round(self.rng.uniform(0.4, 0.98), 2),
+                        status=ScanSession.STATUS_COMPLETED,
+                        progress=100,
+                        created_at=self._timestamp(),
+                    )
+                    for _ in range(size)
+                ],
+            )
+            rows = []
+            for scan in scans:
+                issue, plant_part = self.rng.choice(ISSUES)
+                rows.append(
+                    Diagnosis(
+                        user_id=scan.user_id,
+                        scan_id=scan.id,
+                        issue=issue,
+                        summary=self._text(25),
+                        plant_part=plant_part,
+                        confidence=round(self.rng.uniform(0.35, 0.97), 2),
+                        consensus_score=round(self.rng.uniform(0.5, 1.0), 2),
+                        checklist=[{"symptom": self._text(3), "aiDetected": True, "userConfirmed": True}],
+                        recommendations=[
+                            {"type": "non_chemical", "title": "Sanitasi", "description": self._text(12), "caution": None, "references": [0]}
+                        ],
+                        sources=[
+                            {"title": f"{issue} pada tanaman", "url": f"https://example.org/{issue.lower().replace(' ', '-')}", "source": "Balitbangtan", "publishedAt": None, "summary": self._text(15)}
+                        ],
+                        created_at=scan.created_at + timedelta(minutes=self.rng.randint(1, 30)),
+                    )
+                )
+            self._insert(Diagnosis, rows)
+            created += size
+            self.log(f"Diagnoses: {created}/{self.plan.diagnoses}")
+        return created
+
+    def seed_logs(self) -> int:
+        categories = [choice for choice, _ in LogEntry.CATEGORY_CHOICES]
+        created = 0
+        for size in self._chunks(self.plan.logs):
+            rows = []
+            for _ in range(size):
+                performed_at = self._timestamp()
+                rows.append(
+                    LogEntry(
+                        user_id=self.rng.choice(self.user_ids),
+                        title=self._text(self.rng.randint(2, 6)),
+                        note=self._text(self.rng.randint(5, 30)),
+                        performed_at=performed_at,
+                        category=self.rng.choice(categories),
+                        created_at=performed_at + timedelta(minutes=self.rng.randint(0, 120)),
+                    )
+                )
+            self._insert(LogEntry, rows)
+            created += size
+            self.log(f"Logs: {created}/{self.plan.logs}")
+        return created
+
+    def seed_reminders(self) -> int:
+        frequencies = [choice for choice, _ in Reminder.FREQUENCY_CHOICES]
+        created = 0
+        for size in self._chunks(self.plan.reminders):
+            self._insert(
+                Reminder,
+                [
+                    Reminder(
+                        user_id=self.rng.choice(self.user_ids),
+                        title=self._text(self.rng.randint(2, 5)),
+                        scheduled_at=self.now + timedelta(days=self.rng.uniform(-30, 60)),
+                        description=self._text(10),
+                        frequency=self.rng.choice(frequencies),
+                        created_at=self._timestamp(),
+                    )
+                    for _ in range(size)
+                ],
+            )
+            created += size
+        self.log(f"Reminders: {created}")
+        return created
@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from benchmarks.query_plans import HOT_QUERIES, check
+
+
+class Command(BaseCommand):
+    help = "EXPLAIN the hot list queries on the seeded PostgreSQL database and fail on sequential scans or sorts."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--query", action="append", choices=sorted(HOT_QUERIES), help="Repeatable; default checks all.")
+
+    def handle(self, *args, **options):
+        try:
+            results = check(options["query"])
+        except RuntimeError as exc:
+            raise CommandError(str(exc))
+
+        failed = 0
+        for name, found in results.items():
+            if found:
+                failed += 1
+                self.stdout.write(self.style.ERROR(f"FAIL {name}: {'; '.join(found)}"))
+            else:
+                self.stdout.write(f"ok   {name}")
+        if failed:
+            raise CommandError(f"{failed} hot query plan(s) need a sequential scan or sort; check the indexes.")
+        self.stdout.write(self.style.SUCCESS(f"All {len(results)} hot queries are served by indexes."))
@@ -0,0 +1,57 @@
+import asyncio
+import json
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from benchmarks.runner import SCENARIOS, compare, run_benchmark
+
+
+class Command(BaseCommand):
+    help = "Drive the API endpoints concurrently against seeded data and write p50/p95/p99, throughput and query counts to JSON."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--scenario", action="append", choices=sorted(SCENARIOS), help="Repeatable; default runs all.")
+        parser.add_argument("--requests", type=int, default=200, help="Measured requests per scenario.")
+        parser.add_argument("--concurrency", type=int, default=10)
+        parser.add_argument("--warmup", type=int, default=10, help="Unmeasured requests per scenario.")
+        parser.add_argument("--users", type=int, default=50, help="Distinct benchmark users to authenticate as.")
+        parser.add_argument("--seed", type=int, default=1)
+        parser.add_argument("--output", default="bench-results.json")
+        parser.add_argument("--baseline", default=None, help="Previous result file to compare against.")
+
+    def handle(self, *args, **options):
+        # DEBUG menyimpan setiap query di connection.queries dan memperlambat hasil
+        settings.DEBUG = False
+        # AsyncClient selalu mengirim Host "testserver" (sama seperti setup_test_environment)
+        settings.ALLOWED_HOSTS = [*settings.ALLOWED_HOSTS, "testserver"]
+
+        baseline = None
+        if options["baseline"]:
+            try:
+                baseline = json.loads(Path(options["baseline"]).read_text())
+            except (OSError, ValueError) as exc:
+                raise CommandError(f"Cannot read baseline: {exc}")
+
+        try:
+            report = asyncio.run(
+                run_benchmark(
+                    options["scenario"] or list(SCENARIOS),
+                    requests=options["requests"],
+                    concurrency=options["concurrency"],
+                    warmup=options["warmup"],
+                    users=options["users"],
+                    seed=options["seed"],
+                    log=self.stdout.write,
+                )
+            )
+        except RuntimeError as exc:
+            raise CommandError(str(exc))
+
+        Path(options["output"]).write_text(json.dumps(report, indent=2, sort_keys=True) + "\n")
+        self.stdout.write(self.style.SUCCESS(f"Wrote {options['output']}"))
+
+        if baseline is not None:
+            for line in compare(report, baseline):
+                self.stdout.write(line)
@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand
+
+from benchmarks.generators import SeedPlan, Seeder
+
+
+class Command(BaseCommand):
+    help = "Seed synthetic benchmark data (users on the bench domain, posts, likes, diagnoses, logs) with bulk inserts."
+
+    def add_arguments(self, parser):
+        defaults = SeedPlan()
+        parser.add_argument("--scale", type=float, default=1.0, help="Multiply every default volume, e.g. 0.01 for a quick run.")
+        for name in ("users", "posts", "likes", "comments", "diagnoses", "logs", "reminders"):
+            parser.add_argument(f"--{name}", type=int, default=None, help=f"Rows to create (default {getattr(defaults, name)} x scale).")
+        parser.add_argument("--days", type=int, default=defaults.days, help="Spread created_at over this many days.")
+        parser.add_argument("--seed", type=int, default=1)
+        parser.add_argument("--batch-size", type=int, default=5_000)
+        parser.add_argument("--reset", action="store_true", help="Delete existing benchmark data first.")
+
+    def handle(self, *args, **options):
+        log = self.stdout.write
+        if options["reset"]:
+            Seeder.reset(log=log)
+
+        plan = SeedPlan(days=options["days"]).scaled(options["scale"])
+        for name in ("users", "posts", "likes", "comments", "diagnoses", "logs", "reminders"):
+            if options[name] is not None:
+                setattr(plan, name, options[name])
+
+        counts = Seeder(plan, seed=options["seed"], batch_size=options["batch_size"], log=log).run()
+        self.stdout.write(self.style.SUCCESS("Seeded " + ", ".join(f"{value} {key}" for key, value in counts.items())))
@@ -0,0 +1,98 @@
+from __future__ import annotations
+
+import json
+from dataclasses import dataclass
+from typing import Callable, Iterator
+
+from django.db import connection, transaction
+from django.db.models import QuerySet
+
+from community.models import CommunityPost
+from community.services import comments_queryset, feed_queryset
+from diagnosis.models import Diagnosis
+from diagnosis.services import history_queryset
+from logs.models import LogEntry
+from logs.services import log_entries_queryset, reminders_queryset
+from services.pagination import DEFAULT_PAGE_SIZE
+
+FORBIDDEN_NODES = ("Seq Scan", "Sort", "Incremental Sort")
+
+
+@dataclass
+class Sample:
+    user: object
+    post_id: int
+
+
+@dataclass
+class HotQuery:
+    name: str
+    build: Callable[[Sample], QuerySet]
+
+
+def _page(queryset: QuerySet, field: str) -> QuerySet:
+    return queryset.order_by(f"-{field}", "-id")[: DEFAULT_PAGE_SIZE + 1]
+
+
+# Dibangun dari helper yang sama dengan endpoint list; tambahkan di sini bila ada endpoint baru
+HOT_QUERIES = {
+    query.name: query
+    for query in [
+        HotQuery("list_diagnoses", lambda s: _page(history_queryset(s.user), "created_at")),
+        HotQuery("list_logs", lambda s: log_entries_queryset(s.user)),
+        HotQuery("list_reminders", lambda s: reminders_queryset(s.user)),
+        HotQuery("community_feed", lambda s: _page(feed_queryset(s.user), "created_at")),
+        HotQuery("post_comments", lambda s: comments_queryset(s.post_id)),
+    ]
+}
+
+
+def sample() -> Sample:
+    diagnosis = Diagnosis.objects.select_related("user").order_by("-id").first()
+    user = diagnosis.user if diagnosis else None
+    if user is None:
+        log = LogEntry.objects.select_related("user").order_by("-id").first()
+        user = log.user if log else None
+    if user is None:
+        raise RuntimeError("No diagnoses or logs found; run `manage.py bench_seed` first.")
+    post_id = CommunityPost.objects.order_by("-id").values_list("id", flat=True).first() or 0
+    return Sample(user=user, post_id=post_id)
+
+
+def _walk(node: dict) -> Iterator[dict]:
+    yield node
+    for child in node.get("Plans", []):
+        yield from _walk(child)
+
+
+def explain(queryset: QuerySet) -> dict:
+    """JSON plan of ``queryset`` with sequential scans and sorts priced out.
+
+    ``enable_seqscan``/``enable_sort`` only make those nodes very expensive, so
+    one that still shows up means no index can serve the query. This keeps the
+    result independent of table sizes and statistics on the seeded database.
+    """
+    with transaction.atomic():
+        with connection.cursor() as cursor:
+            cursor.execute("SET LOCAL enable_seqscan = off")
+            cursor.execute("SET LOCAL enable_sort = off")
+            cursor.execute("SET LOCAL enable_incremental_sort = off")
+        raw = queryset.explain(format="json")
+    return json.loads(raw)[0]["Plan"]
+
+
+def violations(plan: dict) -> list[str]:
+    found = []
+    for node in _walk(plan):
+        if node["Node Type"] in FORBIDDEN_NODES:
+            target = node.get("Relation Name") or ", ".join(node.get("Sort Key", []))
+            found.append(f"{node['Node Type']} on {target}" if target else node["Node Type"])
+    return found
+
+
+def check(names: list[str] | None = None) -> dict[str, list[str]]:
+    """Map every hot query to the forbidden plan nodes it produces (empty list = uses an index)."""
+    if connection.vendor != "postgresql":
+        raise RuntimeError(f"Query plan checks need PostgreSQL, not {connection.vendor}.")
+    current = sample()
+    return {name: violations(explain(HOT_QUERIES[name].build(current))) for name in names or HOT_QUERIES}
@@ -0,0 +1,210 @@
+from __future__ import annotations
+
+import asyncio
+import random
+import subprocess
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timezone as dt_timezone
+from typing import Callable
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import AsyncClient
+from ninja_jwt.tokens import RefreshToken
+
+from community.models import CommunityComment, CommunityPost, CommunityPostLike
+from diagnosis.models import Diagnosis
+from logs.models import LogEntry
+from services.query_tracking import install as install_query_tracking, track_queries
+
+from .generators import BENCH_EMAIL_DOMAIN
+
+
+@dataclass
+class BenchContext:
+    tokens: list[str]
+    post_ids: list[int]
+    rng: random.Random
+
+
+@dataclass
+class Scenario:
+    name: str
+    method: str
+    path: Callable[[BenchContext], str]
+
+
+SCENARIOS = {
+    scenario.name: scenario
+    for scenario in [
+        Scenario("list_posts", "GET", lambda ctx: "/api/community/posts"),
+        Scenario("list_diagnoses", "GET", lambda ctx: "/api/diagnosis/"),
+        Scenario("list_logs", "GET", lambda ctx: "/api/logs/"),
+        Scenario("metrics", "GET", lambda ctx: "/api/dashboard/metrics"),
+        Scenario("toggle_like", "POST", lambda ctx: f"/api/community/posts/{ctx.rng.choice(ctx.post_ids)}/like"),
+    ]
+}
+
+
+@dataclass
+class Sample:
+    latency: float
+    status: int
+    queries: int
+    db_time: float
+
+
+@dataclass
+class ScenarioResult:
+    samples: list[Sample] = field(default_factory=list)
+    wall_time: float = 0.0
+
+    def summary(self) -> dict:
+        latencies = sorted(sample.latency * 1000 for sample in self.samples)
+        queries = [sample.queries for sample in self.samples]
+        errors = sum(1 for sample in self.samples if sample.status >= 400)
+        count = len(self.samples)
+        return {
+            "requests": count,
+            "errors": errors,
+            "p50_ms": round(percentile(latencies, 50), 2),
+            "p95_ms": round(percentile(latencies, 95), 2),
+            "p99_ms": round(percentile(latencies, 99), 2),
+            "mean_ms": round(sum(latencies) / count, 2) if count else 0.0,
+            "max_ms": round(latencies[-1], 2) if latencies else 0.0,
+            "throughput_rps": round(count / self.wall_time, 2) if self.wall_time else 0.0,
+            "queries_mean": round(sum(queries) / count, 2) if count else 0.0,
+            "queries_max": max(queries, default=0),
+            "db_time_mean_ms": round(sum(sample.db_time for sample in self.samples) * 1000 / count, 2) if count else 0.0,
+        }
+
+
+def percentile(sorted_values: list[float], pct: float) -> float:
+    """Linear-interpolated percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = (len(sorted_values) - 1) * pct / 100
+    lower = int(rank)
+    upper = min(lower + 1, len(sorted_values) - 1)
+    return sorted_values[lower] + (sorted_values[upper] - sorted_values[lower]) * (rank - lower)
+
+
+def build_context(users: int, seed: int) -> BenchContext:
+    User = get_user_model()
+    bench_users = list(User.objects.filter(email__endswith=f"@{BENCH_EMAIL_DOMAIN}").order_by("?")[:users])
+    if not bench_users:
+        raise RuntimeError("No benchmark users found; run `manage.py bench_seed` first.")
+    post_ids = list(CommunityPost.objects.order_by("?").values_list("id", flat=True)[:10_000])
+    return BenchContext(
+        tokens=[str(RefreshToken.for_user(user).access_token) for user in bench_users],
+        post_ids=post_ids,
+        rng=random.Random(seed),
+    )
+
+
+async def run_scenario(scenario: Scenario, ctx: BenchContext, requests: int, concurrency: int, warmup: int = 0) -> ScenarioResult:
+    result = ScenarioResult()
+    remaining = warmup + requests
+    lock = asyncio.Lock()
+
+    async def _worker() -> None:
+        nonlocal remaining
+        client = AsyncClient()
+        while True:
+            async with lock:
+                if remaining <= 0:
+                    return
+                remaining -= 1
+                record = remaining < requests
+            token = ctx.rng.choice(ctx.tokens)
+            path = scenario.path(ctx)
+            with track_queries() as stats:
+                started = time.perf_counter()
+                response = await client.generic(
+                    scenario.method,
+                    path,
+                    headers={"Authorization": f"Bearer {token}"},
+                )
+                elapsed = time.perf_counter() - started
+            if record:
+                result.samples.append(Sample(elapsed, response.status_code, stats.count, stats.duration))
+
+    started = time.perf_counter()
+    await asyncio.gather(*(_worker() for _ in range(max(1, concurrency))))
+    result.wall_time = time.perf_counter() - started
+    return result
+
+
+def _git_commit() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def dataset_counts() -> dict[str, int]:
+    return {
+        "posts": CommunityPost.objects.count(),
+        "likes": CommunityPostLike.objects.count(),
+        "comments": CommunityComment.objects.count(),
+        "diagnoses": Diagnosis.objects.count(),
+        "logs": LogEntry.objects.count(),
+    }
+
+
+async def run_benchmark(
+    scenario_names: list[str],
+    requests: int,
+    concurrency: int,
+    warmup: int,
+    users: int,
+    seed: int,
+    log: Callable[[str], None] = print,
+) -> dict:
+    # Juga di thread sync_to_async tempat query endpoint berjalan, karena koneksinya mungkin sudah terbuka
+    await sync_to_async(install_query_tracking, thread_sensitive=True)()
+    ctx = await sync_to_async(build_context, thread_sensitive=True)(users, seed)
+    report = {
+        "meta": {
+            "commit": _git_commit(),
+            "timestamp": datetime.now(dt_timezone.utc).isoformat(),
+            "database": connection.vendor,
+            "requests": requests,
+            "concurrency": concurrency,
+            "warmup": warmup,
+            "users": len(ctx.tokens),
+            "seed": seed,
+            "dataset": await sync_to_async(dataset_counts, thread_sensitive=True)(),
+        },
+        "scenarios": {},
+    }
+    for name in scenario_names:
+        log(f"Running {name} ({requests} requests, concurrency {concurrency})...")
+        result = await run_scenario(SCENARIOS[name], ctx, requests, concurrency, warmup)
+        summary = result.summary()
+        report["scenarios"][name] = summary
+        log(
+            f"  p50 {summary['p50_ms']} ms | p95 {summary['p95_ms']} ms | p99 {summary['p99_ms']} ms | "
+            f"{summary['throughput_rps']} req/s | {summary['queries_mean']} queries/req | {summary['errors']} error(s)"
+        )
+    return report
+
+
+def compare(report: dict, baseline: dict) -> list[str]:
+    """Human-readable deltas of the latency and query columns against a previous report."""
+    lines = []
+    for name, current in report["scenarios"].items():
+        previous = baseline.get("scenarios", {}).get(name)
+        if not previous:
+            continue
+        parts = []
+        for key in ("p50_ms", "p95_ms", "p99_ms", "throughput_rps", "queries_mean"):
+            before, after = previous.get(key), current.get(key)
+            if before:
+                parts.append(f"{key} {before} -> {after} ({(after - before) / before * 100:+.1f}%)")
+        lines.append(f"{name}: " + ", ".join(parts))
+    return lines
@@ -0,0 +1,96 @@
+from unittest import skipUnless
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import SimpleTestCase, TestCase
+
+from community.models import CommunityComment, CommunityPost, CommunityPostLike
+from community.services import reconcile_post_counters
+from diagnosis.models import Diagnosis
+from logs.models import LogEntry, Reminder
+
+from .generators import BENCH_EMAIL_DOMAIN, SeedPlan, Seeder
+from .query_plans import check
+from .runner import Sample, ScenarioResult, compare, percentile, run_benchmark
+
+SMALL_PLAN = SeedPlan(users=5, posts=30, likes=60, comments=60, diagnoses=60, logs=60, reminders=20, days=30)
+
+
+class SeederTests(TestCase):
+    def test_seeds_the_planned_volumes_with_consistent_counters(self):
+        created = Seeder(SMALL_PLAN, seed=7, batch_size=16, log=lambda _: None).run()
+        self.assertEqual(
+            {name: created[name] for name in ("users", "posts", "comments", "diagnoses", "logs", "reminders")},
+            {"users": 5, "posts": 30, "comments": 60, "diagnoses": 60, "logs": 60, "reminders": 20},
+        )
+        self.assertEqual(CommunityPostLike.objects.count(), created["likes"])
+        self.assertEqual(Diagnosis.objects.count(), 60)
+        self.assertEqual(reconcile_post_counters(dry_run=True), 0)
+        self.assertFalse(CommunityComment.objects.filter(path="").exists())
+
+        Seeder.reset(log=lambda _: None)
+        self.assertFalse(get_user_model().objects.filter(email__endswith=f"@{BENCH_EMAIL_DOMAIN}").exists())
+        for model in (CommunityPost, CommunityPostLike, CommunityComment, Diagnosis, LogEntry, Reminder):
+            with self.subTest(model=model.__name__):
+                self.assertFalse(model.objects.exists())
+
+    def test_same_seed_gives_the_same_dataset(self):
+        def titles(seed: int) -> list[str]:
+            Seeder(SMALL_PLAN.scaled(0.5), seed=seed, log=lambda _: None).run()
+            result = list(CommunityPost.objects.order_by("id").values_list("title", flat=True))
+            Seeder.reset(log=lambda _: None)
+            return result
+
+        self.assertEqual(titles(3), titles(3))
+        self.assertNotEqual(titles(3), titles(4))
+
+
+class ReportTests(SimpleTestCase):
+    def test_percentiles_interpolate(self):
+        values = [10.0, 20.0, 30.0, 40.0]
+        self.assertEqual([percentile(values, pct) for pct in (0, 50, 100)], [10.0, 25.0, 40.0])
+        self.assertEqual(percentile([], 99), 0.0)
+
+    def test_summary_and_comparison(self):
+        result = ScenarioResult(
+            samples=[Sample(latency, status, 3, 0.001) for latency, status in [(0.01, 200), (0.03, 200), (0.02, 500)]],
+            wall_time=0.5,
+        )
+        summary = result.summary()
+        self.assertEqual((summary["requests"], summary["errors"], summary["p50_ms"]), (3, 1, 20.0))
+        self.assertEqual((summary["throughput_rps"], summary["queries_mean"], summary["db_time_mean_ms"]), (6.0, 3.0, 1.0))
+
+        baseline = {"scenarios": {"list_posts": {**summary, "p50_ms": 40.0}}}
+        report = {"scenarios": {"list_posts": summary, "metrics": summary}}
+        [line] = compare(report, baseline)
+        self.assertTrue(line.startswith("list_posts: p50_ms 40.0 -> 20.0 (-50.0%)"))
+
+
+class RunBenchmarkTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        Seeder(SMALL_PLAN, seed=7, log=lambda _: None).run()
+
+    async def test_reports_latency_and_queries_per_scenario(self):
+        report = await run_benchmark(
+            ["list_posts", "toggle_like"], requests=4, concurrency=2, warmup=1, users=2, seed=1, log=lambda _: None
+        )
+        self.assertEqual(report["meta"]["dataset"]["posts"], 30)
+        self.assertEqual(set(report["scenarios"]), {"list_posts", "toggle_like"})
+        for name, summary in report["scenarios"].items():
+            with self.subTest(scenario=name):
+                self.assertEqual((summary["requests"], summary["errors"]), (4, 0))
+                self.assertGreater(summary["queries_mean"], 0)
+                self.assertLessEqual(summary["p50_ms"], summary["p99_ms"])
+
+
+@skipUnless(connection.vendor == "postgresql", "Query plan checks need PostgreSQL.")
+class HotQueryPlanTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        Seeder(SMALL_PLAN, seed=7, log=lambda _: None).run()
+
+    def test_hot_queries_are_served_by_indexes(self):
+        for name, found in check().items():
+            with self.subTest(query=name):
+                self.assertEqual(found, [])
@@ -1,14 +1,42 @@
 from typing import Optional
 
 from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import transaction
 from pydantic import Field
-from ninja import Schema
+from ninja import Query, Schema
 from ninja_extra import ControllerBase, api_controller, route, status
-from ninja_extra.exceptions import APIException, NotFound
-from ninja_extra.permissions import IsAuthenticated
+from ninja_extra.exceptions import APIException, NotFound, ParseError
+from ninja_extra.permissions import IsAdminUser, IsAuthenticated
 from ninja_jwt.authentication import AsyncJWTAuth
 
-from .models import CommunityComment, CommunityPost, CommunityPostLike
+from dashboard.services import record_post
+from services.cache_stats import CacheStatsOut
+from services.pagination import DEFAULT_PAGE_SIZE, clamp_limit, keyset_page
+
+from .models import CommunityComment, CommunityPost
+from .cache import liked_post_cache, post_fragment_cache
+from .services import (
+    cached_post_fragments,
+    comment_thread_page,
+    comments_queryset,
+    create_comment,
+    delete_comment,
+    feed_queryset,
+    invalidate_post,
+    liked_post_ids,
+    post_fragment,
+    search_posts,
+    tag_facets,
+    toggle_like,
+    update_tag_stats,
+)
+
+
+DEFAULT_TREE_DEPTH = 3
+MAX_TREE_DEPTH = 10
+DEFAULT_REPLIES_LIMIT = 5
+MAX_REPLIES_LIMIT = 50
 
 
 class CommunityPostCreate(Schema):
@@ -38,6 +66,11 @@ class CommunityPostSchema(Schema):
     isOwner: bool
 
 
+class CommunityFeedSchema(Schema):
+    items: list[CommunityPostSchema]
+    nextCursor: Optional[str] = None
+
+
 class CommentCreate(Schema):
     body: str
     parentId: Optional[int] = None
@@ -54,11 +87,32 @@ class CommunityCommentSchema(Schema):
     isOwner: bool
 
 
+class CommunityCommentNodeSchema(CommunityCommentSchema):
+    depth: int
+    replyCount: int
+    replies: list["CommunityCommentNodeSchema"] = Field(default_factory=list)
+
+
+class CommentTreeSchema(Schema):
+    items: list[CommunityCommentNodeSchema]
+    nextCursor: Optional[str] = None
+
+
 class PostLikeResponse(Schema):
     liked: bool
     likes: int
 
 
+class TagFacetSchema(Schema):
+    tag: str
+    count: int
+
+
+class CommunityCacheStatsOut(Schema):
+    posts: CacheStatsOut
+    liked: CacheStatsOut
+
+
 class MessageOut(Schema):
     message: str
     status: int
@@ -67,25 +121,15 @@ class MessageOut(Schema):
 
 
 def _serialize_post(post: CommunityPost, user) -> CommunityPostSchema:
-    likes = list(post.likes.all())
-    comments = list(post.comments.all())
-    is_liked = any(like.user_id == user.id for like in likes)
-    comments_count = len(comments)
-    likes_count = len(likes)
-    tags = post.tags if isinstance(post.tags, list) else []
+    """Expects the ``is_liked`` annotation added by ``community.services.with_engagement``."""
+    return CommunityPostSchema(**post_fragment(post), isLiked=post.is_liked, isOwner=post.user_id == user.id)
+
+
+def _personalize(fragment: dict, user, liked_ids: frozenset[int]) -> CommunityPostSchema:
     return CommunityPostSchema(
-        id=post.id,
-        author=post.user.first_name or post.user.email,
-        authorId=post.user_id,
-        title=post.title,
-        body=post.body,
-        createdAt=post.created_at.isoformat(),
-        updatedAt=post.updated_at.isoformat(),
-        likes=likes_count,
-        isLiked=is_liked,
-        commentsCount=comments_count,
-        tags=tags,
-        isOwner=post.user_id == user.id,
+        **fragment,
+        isLiked=fragment["id"] in liked_ids,
+        isOwner=fragment["authorId"] == user.id,
     )
 
 
@@ -102,22 +146,93 @@ def _serialize_comment(comment: CommunityComment, user) -> CommunityCommentSchem
     )
 
 
+def _build_comment_tree(comments: list[CommunityComment], base_depth: int, user) -> list[CommunityCommentNodeSchema]:
+    """Nest path-ordered comments (already trimmed by ``comment_thread_page``) in one pass."""
+    roots: list[CommunityCommentNodeSchema] = []
+    nodes: dict[int, CommunityCommentNodeSchema] = {}
+    for comment in comments:
+        node = CommunityCommentNodeSchema(
+            **_serialize_comment(comment, user).model_dump(),
+            depth=comment.depth,
+            replyCount=comment.replies_count,
+        )
+        if comment.depth == base_depth:
+            roots.append(node)
+        else:
+            parent = nodes.get(comment.parent_id)
+            if parent is None:
+                continue
+            parent.replies.append(node)
+        nodes[comment.id] = node
+    return roots
+
+
+def _parse_after(cursor: Optional[str]) -> Optional[int]:
+    if not cursor:
+        return None
+    try:
+        return int(cursor)
+    except ValueError:
+        raise ParseError("Cursor tidak valid.")
+
+
 @api_controller("/community", tags=["Community"], auth=AsyncJWTAuth(), permissions=[IsAuthenticated])
 class CommunityController(ControllerBase):
-    @route.get("/posts", response=list[CommunityPostSchema])
-    async def list_posts(self):
+    @route.get("/posts", response=CommunityFeedSchema)
+    async def list_posts(self, limit: int = DEFAULT_PAGE_SIZE, cursor: Optional[str] = None):
         user = self.context.request.user
 
         def _fetch_posts():
-            return list(
-                CommunityPost.objects.select_related("user")
-                .prefetch_related("likes", "comments")
-                .order_by("-created_at")
-            )
+            rows, next_cursor = keyset_page(CommunityPost.objects.only("id", "created_at"), clamp_limit(limit), cursor)
+            post_ids = [row.id for row in rows]
+            fragments = cached_post_fragments(post_ids)
+            liked_ids = liked_post_ids(user.id)
+            items = [_personalize(fragments[post_id], user, liked_ids) for post_id in post_ids if post_id in fragments]
+            return items, next_cursor
 
-        posts = await sync_to_async(_fetch_posts, thread_sensitive=True)()
-        serialized = [_serialize_post(post, user) for post in posts]
-        return serialized
+        try:
+            items, next_cursor = await sync_to_async(_fetch_posts, thread_sensitive=True)()
+        except ValueError:
+            raise ParseError("Cursor tidak valid.")
+        return CommunityFeedSchema(items=items, nextCursor=next_cursor)
+
+    @route.get("/posts/search", response=CommunityFeedSchema)
+    async def search_posts(
+        self,
+        q: str = "",
+        tags: list[str] = Query(None),
+        limit: int = DEFAULT_PAGE_SIZE,
+        cursor: Optional[str] = None,
+    ):
+        user = self.context.request.user
+        tag_filter = sorted({tag.strip() for tag in tags or [] if tag.strip()})
+        if not q.strip() and not tag_filter:
+            raise ParseError("Isi kata kunci atau tag.")
+
+        def _search():
+            post_ids, next_cursor = search_posts(q, tag_filter, clamp_limit(limit), cursor)
+            fragments = cached_post_fragments(post_ids)
+            liked_ids = liked_post_ids(user.id)
+            items = [_personalize(fragments[post_id], user, liked_ids) for post_id in post_ids if post_id in fragments]
+            return items, next_cursor
+
+        try:
+            items, next_cursor = await sync_to_async(_search, thread_sensitive=True)()
+        except ValueError:
+            raise ParseError("Cursor tidak valid.")
+        return CommunityFeedSchema(items=items, nextCursor=next_cursor)
+
+    @route.get("/tags", response=list[TagFacetSchema])
+    async def list_tags(self, limit: int = 10, days: Optional[int] = None):
+        if days is not None and days < 1:
+            raise ParseError("Rentang hari minimal 1.")
+        if days is not None and days > settings.COMMUNITY_TAG_FACET_MAX_DAYS:
+            raise ParseError(f"Rentang maksimal {settings.COMMUNITY_TAG_FACET_MAX_DAYS} hari.")
+
+        def _fetch():
+            return [TagFacetSchema(tag=tag, count=count) for tag, count in tag_facets(clamp_limit(limit, 10), days)]
+
+        return await sync_to_async(_fetch, thread_sensitive=True)()
 
     @route.post("/posts", response=CommunityPostSchema)
     async def create_post(self, payload: CommunityPostCreate):
@@ -129,12 +244,16 @@ class CommunityController(ControllerBase):
             raise APIException(code=status.HTTP_400_BAD_REQUEST, detail="Judul dan isi wajib diisi.")
 
         def _create():
-            post = CommunityPost.objects.create(
-                user=user,
-                title=title,
-                body=body_text,
-                tags=tags,
-            )
+            with transaction.atomic():
+                post = CommunityPost.objects.create(
+                    user=user,
+                    title=title,
+                    body=body_text,
+                    tags=tags,
+                )
+                update_tag_stats([], post.tags, post.created_at)
+                record_post(post.created_at, posts=1)
+            post.is_liked = False
             return post
 
         post = await sync_to_async(_create, thread_sensitive=True)()
@@ -174,18 +293,18 @@ class CommunityController(ControllerBase):
 
         def _apply_update():
             update_fields: list[str] = []
-            post_obj = CommunityPost.objects.select_related("user").get(id=post_id)
-            for field, value in data.items():
-                setattr(post_obj, field, value)
-                update_fields.append(field)
-            if update_fields:
-                post_obj.save(update_fields=[*update_fields, "updated_at"])
-            post_with_relations = (
-                CommunityPost.objects.select_related("user")
-                .prefetch_related("likes", "comments")
-                .get(id=post_id)
-            )
-            return _serialize_post(post_with_relations, user)
+            with transaction.atomic():
+                post_obj = CommunityPost.objects.select_for_update().get(id=post_id)
+                old_tags = post_obj.tags
+                for field, value in data.items():
+                    setattr(post_obj, field, value)
+                    update_fields.append(field)
+                if update_fields:
+                    post_obj.save(update_fields=[*update_fields, "updated_at"])
+                    if "tags" in data:
+                        update_tag_stats(old_tags, post_obj.tags, post_obj.created_at)
+                    invalidate_post(post_id)
+            return _serialize_post(feed_queryset(user).get(id=post_id), user)
 
         return await sync_to_async(_apply_update, thread_sensitive=True)()
 
@@ -203,29 +322,39 @@ class CommunityController(ControllerBase):
                 detail="Anda tidak dapat menghapus postingan pengguna lain.",
             )
 
-        await sync_to_async(post.delete)()
+        def _delete():
+            with transaction.atomic():
+                # Semua delta dihitung dari baris yang terkunci; bila sudah dihapus request lain, jangan dikurangi dua kali
+                locked = (
+                    CommunityPost.objects.select_for_update()
+                    .filter(id=post_id)
+                    .values_list("tags", "created_at", "upvotes")
+                    .first()
+                )
+                if locked is None:
+                    return
+                tags, created_at, upvotes = locked
+                CommunityPost.objects.filter(id=post_id).delete()
+                update_tag_stats(tags, [], created_at)
+                record_post(created_at, posts=-1, positive_posts=-1 if upvotes else 0)
+                invalidate_post(post_id)
+
+        await sync_to_async(_delete, thread_sensitive=True)()
         return MessageOut(message="Berhasil menghapus postingan.", status=status.HTTP_204_NO_CONTENT)
 
     @route.post("/posts/{post_id}/like", response=PostLikeResponse)
     async def toggle_like(self, post_id: int):
         user = self.context.request.user
+
+        def _toggle():
+            if not CommunityPost.objects.filter(id=post_id).exists():
+                raise CommunityPost.DoesNotExist("CommunityPost matching query does not exist.")
+            return toggle_like(post_id, user)
+
         try:
-            post = await sync_to_async(CommunityPost.objects.get)(id=post_id)
+            liked, likes = await sync_to_async(_toggle, thread_sensitive=True)()
         except CommunityPost.DoesNotExist as exc:
             raise NotFound(str(exc))
-
-        def _toggle():
-            like, created = CommunityPostLike.objects.get_or_create(post=post, user=user)
-            if created:
-                liked = True
-            else:
-                like.delete()
-                liked = False
-            likes_count = CommunityPostLike.objects.filter(post=post).count()
-            CommunityPost.objects.filter(id=post.id).update(upvotes=likes_count)
-            return liked, likes_count
-
-        liked, likes = await sync_to_async(_toggle, thread_sensitive=True)()
         return PostLikeResponse(liked=liked, likes=likes)
 
     @route.get("/posts/{post_id}/comments", response=list[CommunityCommentSchema])
@@ -237,18 +366,66 @@ class CommunityController(ControllerBase):
             raise NotFound(str(exc))
 
         def _fetch():
-            queryset = (
-                CommunityComment.objects.filter(post_id=post_id)
-                .select_related("user")
-                .order_by("created_at")
-            )
             return [
                 _serialize_comment(comment, user)
-                for comment in queryset
+                for comment in comments_queryset(post_id)
             ]
 
         return await sync_to_async(_fetch, thread_sensitive=True)()
 
+    @route.get("/posts/{post_id}/comments/tree", response=CommentTreeSchema)
+    async def comment_tree(
+        self,
+        post_id: int,
+        limit: int = DEFAULT_PAGE_SIZE,
+        cursor: Optional[str] = None,
+        depth: int = DEFAULT_TREE_DEPTH,
+        repliesLimit: int = DEFAULT_REPLIES_LIMIT,
+    ):
+        user = self.context.request.user
+        after = _parse_after(cursor)
+        try:
+            await sync_to_async(CommunityPost.objects.get)(id=post_id)
+        except CommunityPost.DoesNotExist as exc:
+            raise NotFound(str(exc))
+
+        def _fetch():
+            replies_limit = clamp_limit(repliesLimit, DEFAULT_REPLIES_LIMIT, MAX_REPLIES_LIMIT)
+            comments, next_after = comment_thread_page(
+                post_id, None, clamp_limit(limit), after, min(max(depth, 0), MAX_TREE_DEPTH), replies_limit
+            )
+            items = _build_comment_tree(comments, 0, user)
+            return CommentTreeSchema(items=items, nextCursor=str(next_after) if next_after else None)
+
+        return await sync_to_async(_fetch, thread_sensitive=True)()
+
+    @route.get("/posts/{post_id}/comments/{comment_id}/replies", response=CommentTreeSchema)
+    async def comment_replies(
+        self,
+        post_id: int,
+        comment_id: int,
+        limit: int = DEFAULT_PAGE_SIZE,
+        cursor: Optional[str] = None,
+        depth: int = DEFAULT_TREE_DEPTH,
+        repliesLimit: int = DEFAULT_REPLIES_LIMIT,
+    ):
+        user = self.context.request.user
+        after = _parse_after(cursor)
+        try:
+            parent = await sync_to_async(CommunityComment.objects.get)(id=comment_id, post_id=post_id)
+        except CommunityComment.DoesNotExist as exc:
+            raise NotFound(str(exc))
+
+        def _fetch():
+            replies_limit = clamp_limit(repliesLimit, DEFAULT_REPLIES_LIMIT, MAX_REPLIES_LIMIT)
+            comments, next_after = comment_thread_page(
+                post_id, parent, clamp_limit(limit), after, min(max(depth, 0), MAX_TREE_DEPTH), replies_limit
+            )
+            items = _build_comment_tree(comments, parent.depth + 1, user)
+            return CommentTreeSchema(items=items, nextCursor=str(next_after) if next_after else None)
+
+        return await sync_to_async(_fetch, thread_sensitive=True)()
+
     @route.post("/posts/{post_id}/comments", response=CommunityCommentSchema)
     async def create_comment(self, post_id: int, payload: CommentCreate):
         user = self.context.request.user
@@ -271,16 +448,10 @@ class CommunityController(ControllerBase):
         if not body_text:
             raise APIException(code=status.HTTP_400_BAD_REQUEST, detail="Komentar tidak boleh kosong.")
 
-        def _create():
-            comment = CommunityComment.objects.create(
-                post=post,
-                user=user,
-                parent=parent,
-                body=body_text,
-            )
-            return comment
-
-        comment = await sync_to_async(_create, thread_sensitive=True)()
+        try:
+            comment = await sync_to_async(create_comment, thread_sensitive=True)(post, user, parent, body_text)
+        except ValueError:
+            raise ParseError("Balasan sudah terlalu dalam.")
         return _serialize_comment(comment, user)
 
     @route.delete("/posts/{post_id}/comments/{comment_id}", response=MessageOut)
@@ -299,5 +470,17 @@ class CommunityController(ControllerBase):
                 detail="Anda tidak dapat menghapus komentar pengguna lain.",
             )
 
-        await sync_to_async(comment.delete)()
+        await sync_to_async(delete_comment, thread_sensitive=True)(comment)
         return MessageOut(message="Komentar berhasil dihapus.", status=status.HTTP_204_NO_CONTENT)
+
+    @route.get("/cache/stats", response=CommunityCacheStatsOut, permissions=[IsAdminUser])
+    async def cache_stats(self):
+        posts = await sync_to_async(post_fragment_cache.stats.snapshot)()
+        liked = await sync_to_async(liked_post_cache.stats.snapshot)()
+        return CommunityCacheStatsOut(posts=CacheStatsOut(**posts), liked=CacheStatsOut(**liked))
+
+    @route.post("/cache/invalidate", response=MessageOut, permissions=[IsAdminUser])
+    async def invalidate_cache(self):
+        await sync_to_async(post_fragment_cache.invalidate_all)()
+        await sync_to_async(liked_post_cache.invalidate_all)()
+        return MessageOut(message="Cache komunitas dikosongkan.", status=status.HTTP_200_OK)
@@ -0,0 +1,126 @@
+from __future__ import annotations
+
+import logging
+from typing import Callable, Iterable
+
+from django.conf import settings
+from django.core.cache import caches
+
+from services.cache_stats import CacheStats
+
+logger = logging.getLogger(__name__)
+
+
+class _VersionedCache:
+    def __init__(self, alias: str, prefix: str, timeout: int | None) -> None:
+        self.alias = alias
+        self.prefix = prefix
+        self._timeout = timeout
+        self.stats = CacheStats(prefix, alias=alias)
+
+    @property
+    def cache(self):
+        return caches[self.alias]
+
+    def _version_key(self) -> str:
+        return f"{self.prefix}:version"
+
+    def _version(self) -> int:
+        return self.cache.get_or_set(self._version_key(), 1, timeout=None)
+
+    def invalidate_all(self) -> int:
+        """Drop every entry at once by moving to a new key version."""
+        self._version()
+        return self.cache.incr(self._version_key())
+
+
+class PostFragmentCache(_VersionedCache):
+    """Viewer-independent part of serialized posts, one entry per post.
+
+    Entries are deleted whenever the post, its like count or its comment count
+    changes; the per-viewer ``isLiked``/``isOwner`` fields are never cached here.
+    """
+
+    def __init__(self, alias: str = "default", prefix: str = "community:post", timeout: int | None = None) -> None:
+        super().__init__(alias, prefix, timeout)
+
+    @property
+    def timeout(self) -> int:
+        return self._timeout if self._timeout is not None else settings.COMMUNITY_POST_CACHE_TTL
+
+    def _key(self, version: int, post_id: int) -> str:
+        return f"{self.prefix}:v{version}:{post_id}"
+
+    def get_many(self, post_ids: Iterable[int], loader: Callable[[list[int]], dict[int, dict]]) -> dict[int, dict]:
+        """Return fragments for ``post_ids``, loading and storing the missing ones with ``loader``."""
+        post_ids = list(post_ids)
+        if not post_ids:
+            return {}
+        try:
+            version = self._version()
+            keys = {post_id: self._key(version, post_id) for post_id in post_ids}
+            cached = self.cache.get_many(keys.values())
+        except Exception as exc:
+            logger.warning("Community post cache lookup failed: %s", exc)
+            return loader(post_ids)
+
+        fragments = {post_id: cached[key] for post_id, key in keys.items() if key in cached}
+        missing = [post_id for post_id in post_ids if post_id not in fragments]
+        self.stats.hit(len(fragments))
+        self.stats.miss(len(missing))
+        if missing:
+            loaded = loader(missing)
+            fragments.update(loaded)
+            try:
+                self.cache.set_many({keys[post_id]: fragment for post_id, fragment in loaded.items()}, timeout=self.timeout)
+            except Exception as exc:
+                logger.warning("Community post cache store failed: %s", exc)
+        return fragments
+
+    def invalidate(self, post_id: int) -> None:
+        try:
+            self.cache.delete(self._key(self._version(), post_id))
+        except Exception as exc:
+            logger.warning("Community post cache invalidation failed for %s: %s", post_id, exc)
+
+
+class LikedPostCache(_VersionedCache):
+    """Set of post ids each user has liked, used to fill in ``isLiked`` on cached fragments."""
+
+    def __init__(self, alias: str = "default", prefix: str = "community:liked", timeout: int | None = None) -> None:
+        super().__init__(alias, prefix, timeout)
+
+    @property
+    def timeout(self) -> int:
+        return self._timeout if self._timeout is not None else settings.COMMUNITY_LIKED_CACHE_TTL
+
+    def _key(self, user_id: int) -> str:
+        return f"{self.prefix}:v{self._version()}:{user_id}"
+
+    def get(self, user_id: int, loader: Callable[[], Iterable[int]]) -> frozenset[int]:
+        try:
+            key = self._key(user_id)
+            liked = self.cache.get(key)
+        except Exception as exc:
+            logger.warning("Liked post cache lookup failed for user %s: %s", user_id, exc)
+            return frozenset(loader())
+        if liked is not None:
+            self.stats.hit()
+            return liked
+        self.stats.miss()
+        liked = frozenset(loader())
+        try:
+            self.cache.set(key, liked, timeout=self.timeout)
+        except Exception as exc:
+            logger.warning("Liked post cache store failed for user %s: %s", user_id, exc)
+        return liked
+
+    def invalidate(self, user_id: int) -> None:
+        try:
+            self.cache.delete(self._key(user_id))
+        except Exception as exc:
+            logger.warning("Liked post cache invalidation failed for user %s: %s", user_id, exc)
+
+
+post_fragment_cache = PostFragmentCache()
+liked_post_cache = LikedPostCache()
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from community.services import rebuild_tag_stats
+
+
+class Command(BaseCommand):
+    help = "Recompute the community tag facet tables from every post."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=5000, help="Posts read and rows inserted per batch.")
+
+    def handle(self, *args, **options):
+        tags = rebuild_tag_stats(batch_size=max(1, options["batch_size"]))
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt stats for {tags} tag(s)."))
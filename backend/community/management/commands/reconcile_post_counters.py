@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Max
+
+from community.models import CommunityPost
+from community.services import reconcile_post_counters
+
+
+class Command(BaseCommand):
+    help = "Recount upvotes, comments_count and comment replies_count for posts whose counters drifted."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=5000, help="Posts checked per UPDATE, by id range.")
+        parser.add_argument("--dry-run", action="store_true", help="Only report how many posts drifted.")
+
+    def handle(self, *args, **options):
+        batch_size = max(1, options["batch_size"])
+        last_id = CommunityPost.objects.aggregate(last=Max("id"))["last"] or 0
+        total = 0
+        for start in range(0, last_id, batch_size):
+            batch = CommunityPost.objects.filter(id__gt=start, id__lte=start + batch_size)
+            total += reconcile_post_counters(batch, dry_run=options["dry_run"])
+
+        verb = "Found" if options["dry_run"] else "Repaired"
+        self.stdout.write(self.style.SUCCESS(f"{verb} {total} post(s) with drifted counters."))
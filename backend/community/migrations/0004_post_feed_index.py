@@ -0,0 +1,19 @@
+# Generated by Django 5.2.7 on 2026-10-18 01:15
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('community', '0003_communitypost_updated_at_alter_communitypost_upvotes_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='communitypost',
+            index=models.Index(fields=['-created_at', '-id'], name='community_post_feed_idx'),
+        ),
+    ]
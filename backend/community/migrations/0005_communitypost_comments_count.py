@@ -0,0 +1,40 @@
+from django.db import migrations, models
+from django.db.models import Count, IntegerField, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+
+def backfill_counters(apps, schema_editor):
+    CommunityPost = apps.get_model("community", "CommunityPost")
+    CommunityPostLike = apps.get_model("community", "CommunityPostLike")
+    CommunityComment = apps.get_model("community", "CommunityComment")
+
+    def _count(model):
+        counts = (
+            model.objects.filter(post=OuterRef("pk"))
+            .order_by()
+            .values("post")
+            .annotate(total=Count("pk"))
+            .values("total")
+        )
+        return Coalesce(Subquery(counts, output_field=IntegerField()), Value(0))
+
+    CommunityPost.objects.update(
+        upvotes=_count(CommunityPostLike),
+        comments_count=_count(CommunityComment),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('community', '0004_post_feed_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='communitypost',
+            name='comments_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(backfill_counters, migrations.RunPython.noop),
+    ]
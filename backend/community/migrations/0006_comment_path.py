@@ -0,0 +1,75 @@
+# Generated by Django 5.2.7 on 2026-10-18 01:20
+
+from collections import Counter
+
+from django.conf import settings
+from django.db import migrations, models
+
+SEGMENT_WIDTH = 10
+
+
+def backfill_paths(apps, schema_editor):
+    CommunityComment = apps.get_model("community", "CommunityComment")
+    rows = list(CommunityComment.objects.order_by("id").values_list("id", "parent_id"))
+    replies = Counter(parent_id for _, parent_id in rows if parent_id is not None)
+    paths: dict[int, str] = {}
+    pending = rows
+    while pending:
+        deferred = []
+        for comment_id, parent_id in pending:
+            if parent_id is None:
+                paths[comment_id] = f"{comment_id:0{SEGMENT_WIDTH}d}"
+            elif parent_id in paths:
+                paths[comment_id] = f"{paths[parent_id]}{comment_id:0{SEGMENT_WIDTH}d}"
+            else:
+                deferred.append((comment_id, parent_id))
+        if len(deferred) == len(pending):
+            break
+        pending = deferred
+
+    batch = []
+    for comment_id, path in paths.items():
+        batch.append(
+            CommunityComment(
+                id=comment_id,
+                path=path,
+                depth=len(path) // SEGMENT_WIDTH - 1,
+                replies_count=replies[comment_id],
+            )
+        )
+        if len(batch) >= 2000:
+            CommunityComment.objects.bulk_update(batch, ["path", "depth", "replies_count"])
+            batch = []
+    if batch:
+        CommunityComment.objects.bulk_update(batch, ["path", "depth", "replies_count"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('community', '0005_communitypost_comments_count'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='communitycomment',
+            name='depth',
+            field=models.PositiveSmallIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='communitycomment',
+            name='path',
+            field=models.CharField(blank=True, default='', max_length=250),
+        ),
+        migrations.AddField(
+            model_name='communitycomment',
+            name='replies_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(backfill_paths, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='communitycomment',
+            index=models.Index(fields=['post', 'path'], name='community_comment_path_idx'),
+        ),
+    ]
@@ -0,0 +1,56 @@
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.db import migrations
+
+from services.migration_operations import PostgreSQLOnly
+
+# Harus sama dengan community.services.SEARCH_CONFIG
+SEARCH_VECTOR_SQL = """
+CREATE FUNCTION community_post_search_vector() RETURNS trigger AS $$
+BEGIN
+    NEW.search_vector :=
+        setweight(to_tsvector('indonesian', coalesce(NEW.title, '')), 'A') ||
+        setweight(to_tsvector('indonesian', coalesce(NEW.body, '')), 'B');
+    RETURN NEW;
+END
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER community_post_search_vector_trigger
+    BEFORE INSERT OR UPDATE OF title, body ON community_communitypost
+    FOR EACH ROW EXECUTE FUNCTION community_post_search_vector();
+
+UPDATE community_communitypost SET title = title;
+"""
+
+DROP_SEARCH_VECTOR_SQL = """
+DROP TRIGGER IF EXISTS community_post_search_vector_trigger ON community_communitypost;
+DROP FUNCTION IF EXISTS community_post_search_vector();
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('community', '0006_comment_path'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='communitypost',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        PostgreSQLOnly(migrations.RunSQL(SEARCH_VECTOR_SQL, DROP_SEARCH_VECTOR_SQL)),
+        PostgreSQLOnly(
+            migrations.AddIndex(
+                model_name='communitypost',
+                index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='community_post_search_idx'),
+            )
+        ),
+        PostgreSQLOnly(
+            migrations.AddIndex(
+                model_name='communitypost',
+                index=django.contrib.postgres.indexes.GinIndex(fields=['tags'], name='community_post_tags_idx'),
+            )
+        ),
+    ]
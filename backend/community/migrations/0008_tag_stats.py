@@ -0,0 +1,60 @@
+# Generated by Django 5.2.7 on 2026-10-18 01:24
+
+from collections import Counter
+
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def backfill_tag_stats(apps, schema_editor):
+    CommunityPost = apps.get_model("community", "CommunityPost")
+    CommunityTagStat = apps.get_model("community", "CommunityTagStat")
+    CommunityTagDaily = apps.get_model("community", "CommunityTagDaily")
+    totals = Counter()
+    daily = Counter()
+    for tags, created_at in CommunityPost.objects.values_list("tags", "created_at").iterator(chunk_size=5000):
+        day = timezone.localdate(created_at)
+        for tag in {tag.strip()[:100] for tag in tags or [] if isinstance(tag, str) and tag.strip()}:
+            totals[tag] += 1
+            daily[tag, day] += 1
+    CommunityTagStat.objects.bulk_create(
+        [CommunityTagStat(tag=tag, post_count=count) for tag, count in totals.items()], batch_size=5000
+    )
+    CommunityTagDaily.objects.bulk_create(
+        [CommunityTagDaily(tag=tag, day=day, post_count=count) for (tag, day), count in daily.items()], batch_size=5000
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('community', '0007_post_search'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CommunityTagDaily',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tag', models.CharField(max_length=100)),
+                ('day', models.DateField()),
+                ('post_count', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['day', 'tag'], name='community_tag_day_idx')],
+                'constraints': [models.UniqueConstraint(fields=('tag', 'day'), name='unique_tag_day')],
+            },
+        ),
+        migrations.CreateModel(
+            name='CommunityTagStat',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tag', models.CharField(max_length=100, unique=True)),
+                ('post_count', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['-post_count', 'tag'], name='community_tag_top_idx')],
+            },
+        ),
+        migrations.RunPython(backfill_tag_stats, migrations.RunPython.noop),
+    ]
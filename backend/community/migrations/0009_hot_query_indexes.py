@@ -0,0 +1,19 @@
+# Generated by Django 5.2.7 on 2026-10-18 01:33
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('community', '0008_tag_stats'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='communitycomment',
+            index=models.Index(fields=['post', 'created_at'], name='community_comment_created_idx'),
+        ),
+    ]
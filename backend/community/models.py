@@ -1,3 +1,5 @@
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
 from django.db import models
 from django.conf import settings
 
@@ -8,9 +10,19 @@ class CommunityPost(models.Model):
     body = models.TextField()
     tags = models.JSONField(default=list)
     upvotes = models.PositiveIntegerField(default=0)
+    comments_count = models.PositiveIntegerField(default=0)
+    # Diisi trigger PostgreSQL dari title (bobot A) & body (bobot B); selalu NULL di SQLite
+    search_vector = SearchVectorField(null=True, editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=["-created_at", "-id"], name="community_post_feed_idx"),
+            GinIndex(fields=["search_vector"], name="community_post_search_idx"),
+            GinIndex(fields=["tags"], name="community_post_tags_idx"),
+        ]
+
     def __str__(self) -> str:
         return f"{self.title} ({self.user})"
 
@@ -40,10 +52,52 @@ class CommunityComment(models.Model):
         related_name="replies",
     )
     body = models.TextField()
+    # Id leluhur + id sendiri, masing-masing 10 digit: subtree = satu range scan pada (post, path)
+    path = models.CharField(max_length=250, default="", blank=True)
+    depth = models.PositiveSmallIntegerField(default=0)
+    replies_count = models.PositiveIntegerField(default=0)
     created_at = models.DateTimeField(auto_now_add=True)
 
     class Meta:
         ordering = ["created_at"]
+        indexes = [
+            models.Index(fields=["post", "path"], name="community_comment_path_idx"),
+            models.Index(fields=["post", "created_at"], name="community_comment_created_idx"),
+        ]
 
     def __str__(self) -> str:
         return f"{self.user} on {self.post}: {self.body[:30]}"
+
+
+class CommunityTagStat(models.Model):
+    """Jumlah postingan per tag, diperbarui saat postingan dibuat, diubah, atau dihapus."""
+
+    tag = models.CharField(max_length=100, unique=True)
+    post_count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["-post_count", "tag"], name="community_tag_top_idx"),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.tag} ({self.post_count})"
+
+
+class CommunityTagDaily(models.Model):
+    """Jumlah postingan per tag per hari pembuatan postingan, untuk facet dengan jendela waktu."""
+
+    tag = models.CharField(max_length=100)
+    day = models.DateField()
+    post_count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["tag", "day"], name="unique_tag_day"),
+        ]
+        indexes = [
+            models.Index(fields=["day", "tag"], name="community_tag_day_idx"),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.tag} @ {self.day} ({self.post_count})"
@@ -0,0 +1,374 @@
+import json
+from collections import Counter
+from datetime import date, datetime, timedelta
+from typing import Iterable
+
+from django.contrib.postgres.search import SearchQuery, SearchRank
+from django.db import IntegrityError, connections, transaction
+from django.db.models import Count, Exists, F, FloatField, IntegerField, OuterRef, Q, QuerySet, Subquery, Sum, Value, Window
+from django.db.models.functions import Cast, Coalesce, Greatest, RowNumber
+from django.utils import timezone
+
+from dashboard.services import record_post
+from services.counters import increment
+from services.pagination import decode_rank_cursor, encode_rank_cursor, keyset_page
+
+from .cache import liked_post_cache, post_fragment_cache
+from .models import CommunityComment, CommunityPost, CommunityPostLike, CommunityTagDaily, CommunityTagStat
+
+
+def _count_subquery(model, **filters) -> Coalesce:
+    counts = (
+        model.objects.filter(post=OuterRef("pk"), **filters)
+        .order_by()
+        .values("post")
+        .annotate(total=Count("pk"))
+        .values("total")
+    )
+    return Coalesce(Subquery(counts, output_field=IntegerField()), Value(0))
+
+
+def with_engagement(queryset: QuerySet, user) -> QuerySet:
+    """Annotate ``is_liked`` for ``user`` as an EXISTS subquery.
+
+    Like and comment totals come from the denormalized ``upvotes`` and
+    ``comments_count`` columns, so no like/comment row leaves the database.
+    """
+    return queryset.annotate(
+        is_liked=Exists(CommunityPostLike.objects.filter(post=OuterRef("pk"), user_id=user.id)),
+    )
+
+
+def feed_queryset(user) -> QuerySet:
+    return with_engagement(CommunityPost.objects.select_related("user"), user)
+
+
+def comments_queryset(post_id: int) -> QuerySet:
+    """Flat, oldest-first comment list of a post (the ``GET .../comments`` endpoint)."""
+    return CommunityComment.objects.filter(post_id=post_id).select_related("user").order_by("created_at")
+
+
+def post_fragment(post: CommunityPost) -> dict:
+    """The viewer-independent fields of ``CommunityPostSchema``; this is what ``post_fragment_cache`` stores."""
+    return {
+        "id": post.id,
+        "author": post.user.first_name or post.user.email,
+        "authorId": post.user_id,
+        "title": post.title,
+        "body": post.body,
+        "createdAt": post.created_at.isoformat(),
+        "updatedAt": post.updated_at.isoformat(),
+        "likes": post.upvotes,
+        "commentsCount": post.comments_count,
+        "tags": post.tags if isinstance(post.tags, list) else [],
+    }
+
+
+def load_post_fragments(post_ids: list[int]) -> dict[int, dict]:
+    posts = CommunityPost.objects.select_related("user").filter(id__in=post_ids)
+    return {post.id: post_fragment(post) for post in posts}
+
+
+def cached_post_fragments(post_ids: list[int]) -> dict[int, dict]:
+    return post_fragment_cache.get_many(post_ids, load_post_fragments)
+
+
+def liked_post_ids(user_id: int) -> frozenset[int]:
+    return liked_post_cache.get(
+        user_id,
+        lambda: CommunityPostLike.objects.filter(user_id=user_id).values_list("post_id", flat=True),
+    )
+
+
+def invalidate_post(post_id: int) -> None:
+    """Drop the cached fragment once the current transaction (if any) commits."""
+    transaction.on_commit(lambda: post_fragment_cache.invalidate(post_id))
+
+
+def _bump(post_id: int, field: str, delta: int) -> None:
+    if delta:
+        CommunityPost.objects.filter(id=post_id).update(**{field: Greatest(F(field) + delta, 0)})
+
+
+def toggle_like(post_id: int, user) -> tuple[bool, int]:
+    """Flip ``user``'s like on a post and return ``(liked, likes)``.
+
+    The like row is deleted or inserted directly and ``upvotes`` is moved with
+    an ``F()`` increment, so concurrent toggles never recount the like table
+    and never lose an update. The post row is only locked from the increment
+    to the commit, which also makes the re-read count exactly this toggle's
+    result (used to track posts crossing zero likes in the dashboard rollup).
+    """
+    with transaction.atomic():
+        deleted, _ = CommunityPostLike.objects.filter(post_id=post_id, user=user).delete()
+        if deleted:
+            liked, delta = False, -1
+        else:
+            try:
+                with transaction.atomic():
+                    CommunityPostLike.objects.create(post_id=post_id, user=user)
+                liked, delta = True, 1
+            except IntegrityError:
+                # Permintaan paralel dari user yang sama sudah menyimpan like ini
+                liked, delta = True, 0
+        _bump(post_id, "upvotes", delta)
+        likes, created_at = CommunityPost.objects.filter(id=post_id).values_list("upvotes", "created_at").get()
+        if (delta > 0 and likes == 1) or (delta < 0 and likes == 0):
+            record_post(created_at, positive_posts=delta)
+        invalidate_post(post_id)
+        transaction.on_commit(lambda: liked_post_cache.invalidate(user.id))
+    return liked, likes
+
+
+COMMENT_PATH_WIDTH = 10
+MAX_COMMENT_DEPTH = CommunityComment._meta.get_field("path").max_length // COMMENT_PATH_WIDTH - 1
+
+
+def _path_segment(comment_id: int) -> str:
+    return f"{comment_id:0{COMMENT_PATH_WIDTH}d}"
+
+
+def create_comment(post: CommunityPost, user, parent: CommunityComment | None, body: str) -> CommunityComment:
+    if parent is not None and parent.depth >= MAX_COMMENT_DEPTH:
+        raise ValueError("Comment thread is too deep")
+    with transaction.atomic():
+        comment = CommunityComment.objects.create(
+            post=post,
+            user=user,
+            parent=parent,
+            body=body,
+            depth=parent.depth + 1 if parent is not None else 0,
+        )
+        comment.path = (parent.path if parent is not None else "") + _path_segment(comment.id)
+        CommunityComment.objects.filter(id=comment.id).update(path=comment.path)
+        if parent is not None:
+            CommunityComment.objects.filter(id=parent.id).update(replies_count=F("replies_count") + 1)
+        _bump(post.id, "comments_count", 1)
+        invalidate_post(post.id)
+    return comment
+
+
+def delete_comment(comment: CommunityComment) -> int:
+    """Delete a comment with its replies and return how many comments were removed."""
+    with transaction.atomic():
+        _, per_model = comment.delete()
+        removed = per_model.get(CommunityComment._meta.label, 0)
+        if removed and comment.parent_id is not None:
+            CommunityComment.objects.filter(id=comment.parent_id).update(
+                replies_count=Greatest(F("replies_count") - 1, 0)
+            )
+        _bump(comment.post_id, "comments_count", -removed)
+        invalidate_post(comment.post_id)
+    return removed
+
+
+def comment_thread_page(
+    post_id: int,
+    parent: CommunityComment | None,
+    limit: int,
+    after: int | None = None,
+    depth: int = 3,
+    replies_limit: int = 5,
+) -> tuple[list[CommunityComment], int | None]:
+    """A page of ``parent``'s direct replies (top-level comments if ``None``) plus their subtrees.
+
+    Returns the comments in ``path`` order, so every comment follows its parent,
+    down to ``depth`` levels below the page, and the id to continue after.
+    Below the page each comment keeps only its first ``replies_limit`` replies.
+
+    Two queries: the page itself, then every subtree at once as one range over
+    the ``(post, path)`` index (the page's comments are consecutive siblings, so
+    their subtrees are exactly the paths between the first and the last one).
+    ``ROW_NUMBER() OVER (PARTITION BY parent_id)`` drops the extra replies in
+    SQL; replies below a dropped comment are then skipped in Python.
+    """
+    roots = CommunityComment.objects.filter(post_id=post_id, parent=parent).select_related("user").order_by("id")
+    if after is not None:
+        roots = roots.filter(id__gt=after)
+    comments = list(roots[: limit + 1])
+    next_after = comments[limit - 1].id if len(comments) > limit else None
+    comments = comments[:limit]
+    if depth <= 0 or not any(comment.replies_count for comment in comments):
+        return comments, next_after
+
+    base_depth = comments[0].depth
+    subtree = (
+        CommunityComment.objects.filter(
+            post_id=post_id,
+            # Segmen path hanya berisi angka, jadi ":" (sesudah "9") menutup rentang subtree terakhir
+            path__gt=comments[0].path,
+            path__lt=comments[-1].path + ":",
+            depth__gt=base_depth,
+            depth__lte=base_depth + depth,
+        )
+        .annotate(sibling_rank=Window(RowNumber(), partition_by=F("parent_id"), order_by=F("id").asc()))
+        .filter(sibling_rank__lte=replies_limit)
+        .select_related("user")
+        .order_by("path")
+    )
+    kept = {comment.id for comment in comments}
+    for comment in subtree:
+        if comment.parent_id in kept:
+            comments.append(comment)
+            kept.add(comment.id)
+    comments.sort(key=lambda comment: comment.path)
+    return comments, next_after
+
+
+def _replies_subquery() -> Coalesce:
+    counts = (
+        CommunityComment.objects.filter(parent=OuterRef("pk"))
+        .order_by()
+        .values("parent")
+        .annotate(total=Count("pk"))
+        .values("total")
+    )
+    return Coalesce(Subquery(counts, output_field=IntegerField()), Value(0))
+
+
+def reconcile_post_counters(queryset: QuerySet | None = None, dry_run: bool = False) -> int:
+    """Recount ``upvotes``/``comments_count`` of posts and ``replies_count`` of their comments.
+
+    Returns how many posts drifted, counting a post whose own counters are
+    right but one of whose comments has a wrong ``replies_count``.
+    """
+    queryset = CommunityPost.objects.all() if queryset is None else queryset
+    drifted_comments = (
+        CommunityComment.objects.filter(post__in=queryset.values("id"))
+        .alias(actual_replies=_replies_subquery())
+        .exclude(replies_count=F("actual_replies"))
+    )
+    drifted = queryset.alias(
+        actual_likes=_count_subquery(CommunityPostLike),
+        actual_comments=_count_subquery(CommunityComment),
+    ).filter(
+        ~Q(upvotes=F("actual_likes"))
+        | ~Q(comments_count=F("actual_comments"))
+        | Q(id__in=drifted_comments.values("post_id"))
+    )
+    if dry_run:
+        return drifted.count()
+    with transaction.atomic():
+        # Post lebih dulu: filter-nya ikut membaca replies_count yang belum diperbaiki
+        repaired = CommunityPost.objects.filter(id__in=drifted.values("id")).update(
+            upvotes=_count_subquery(CommunityPostLike),
+            comments_count=_count_subquery(CommunityComment),
+        )
+        CommunityComment.objects.filter(id__in=drifted_comments.values("id")).update(
+            replies_count=_replies_subquery()
+        )
+    if repaired:
+        transaction.on_commit(post_fragment_cache.invalidate_all)
+    return repaired
+
+
+# Harus sama dengan konfigurasi di trigger migrasi 0007_post_search
+SEARCH_CONFIG = "indonesian"
+
+
+def search_posts(text: str, tags: list[str], limit: int, cursor: str | None = None) -> tuple[list[int], str | None]:
+    """Ids of posts matching ``text`` and carrying every tag in ``tags``, plus the next cursor.
+
+    On PostgreSQL the text goes through ``websearch_to_tsquery`` against the
+    trigger-maintained ``search_vector`` and results are ordered by rank, and
+    tags use JSONB containment; both are GIN-indexed. Other backends (SQLite
+    test runs) fall back to ``icontains`` per word, newest first.
+    Raises ``ValueError`` for a cursor that does not belong to this kind of search.
+    """
+    queryset = CommunityPost.objects.all()
+    postgres = connections[queryset.db].vendor == "postgresql"
+    text = " ".join(text.split())
+
+    if tags:
+        if postgres:
+            queryset = queryset.filter(tags__contains=tags)
+        else:
+            for tag in tags:
+                queryset = queryset.filter(tags__icontains=json.dumps(tag))
+
+    if text and postgres:
+        query = SearchQuery(text, search_type="websearch", config=SEARCH_CONFIG)
+        queryset = (
+            queryset.filter(search_vector=query)
+            # ts_rank() returns float4; as float8 the value read into Python compares equal when sent back
+            .annotate(rank=Cast(SearchRank(F("search_vector"), query), FloatField()))
+            .order_by("-rank", "-id")
+        )
+        if cursor:
+            rank, pk = decode_rank_cursor(cursor)
+            queryset = queryset.filter(Q(rank__lt=rank) | Q(rank=rank, id__lt=pk))
+        rows = list(queryset.values_list("id", "rank")[: limit + 1])
+        next_cursor = None
+        if len(rows) > limit:
+            last_id, last_rank = rows[limit - 1]
+            next_cursor = encode_rank_cursor(last_rank, last_id)
+        return [post_id for post_id, _ in rows[:limit]], next_cursor
+
+    for word in text.split():
+        queryset = queryset.filter(Q(title__icontains=word) | Q(body__icontains=word))
+    rows, next_cursor = keyset_page(queryset.only("id", "created_at"), limit, cursor)
+    return [row.id for row in rows], next_cursor
+
+
+TAG_MAX_LENGTH = CommunityTagStat._meta.get_field("tag").max_length
+
+
+def normalize_tags(tags: Iterable[str] | None) -> set[str]:
+    return {tag.strip()[:TAG_MAX_LENGTH] for tag in tags or [] if isinstance(tag, str) and tag.strip()}
+
+
+def update_tag_stats(old_tags: Iterable[str] | None, new_tags: Iterable[str] | None, created_at: datetime) -> None:
+    """Apply the difference between a post's old and new tags to the facet tables.
+
+    Call inside the transaction that writes the post; pass ``[]`` as old tags
+    for a new post and as new tags for a deleted one.
+    """
+    old, new = normalize_tags(old_tags), normalize_tags(new_tags)
+    day = timezone.localdate(created_at)
+    with transaction.atomic():
+        for tag in sorted(old ^ new):
+            delta = 1 if tag in new else -1
+            increment(CommunityTagStat, {"tag": tag}, post_count=delta)
+            increment(CommunityTagDaily, {"tag": tag, "day": day}, post_count=delta)
+
+
+def tag_facets(limit: int, days: int | None = None) -> list[tuple[str, int]]:
+    """Most used tags, overall or among posts created in the last ``days`` days."""
+    if not days:
+        rows = CommunityTagStat.objects.filter(post_count__gt=0).order_by("-post_count", "tag")
+        return list(rows.values_list("tag", "post_count")[:limit])
+    since: date = timezone.localdate() - timedelta(days=days - 1)
+    rows = (
+        CommunityTagDaily.objects.filter(day__gte=since)
+        .values("tag")
+        .annotate(total=Sum("post_count"))
+        .filter(total__gt=0)
+        .order_by("-total", "tag")
+        .values_list("tag", "total")
+    )
+    return list(rows[:limit])
+
+
+def rebuild_tag_stats(batch_size: int = 5000) -> int:
+    """Recompute both facet tables from every post; returns the number of distinct tags."""
+    totals: Counter[str] = Counter()
+    daily: Counter[tuple[str, date]] = Counter()
+    posts = CommunityPost.objects.order_by().values_list("tags", "created_at")
+    for tags, created_at in posts.iterator(chunk_size=batch_size):
+        day = timezone.localdate(created_at)
+        for tag in normalize_tags(tags if isinstance(tags, list) else []):
+            totals[tag] += 1
+            daily[tag, day] += 1
+
+    with transaction.atomic():
+        CommunityTagStat.objects.all().delete()
+        CommunityTagDaily.objects.all().delete()
+        CommunityTagStat.objects.bulk_create(
+            (CommunityTagStat(tag=tag, post_count=count) for tag, count in totals.items()),
+            batch_size=batch_size,
+        )
+        CommunityTagDaily.objects.bulk_create(
+            (CommunityTagDaily(tag=tag, day=day, post_count=count) for (tag, day), count in daily.items()),
+            batch_size=batch_size,
+        )
+    return len(totals)
@@ -1,3 +1,495 @@
-from django.test import TestCase
+from datetime import timedelta
+from io import StringIO
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from ninja_jwt.tokens import RefreshToken
+
+from dashboard.models import DailyPostRollup
+from dashboard.services import rebuild_rollups
+
+from .cache import post_fragment_cache
+from .models import CommunityComment, CommunityPost, CommunityPostLike, CommunityTagDaily, CommunityTagStat
+from .services import comment_thread_page, create_comment, delete_comment, reconcile_post_counters, toggle_like
+
+User = get_user_model()
+
+
+def _auth(user) -> dict:
+    return {"headers": {"Authorization": f"Bearer {RefreshToken.for_user(user).access_token}"}}
+
+
+def _post_rollups() -> dict:
+    return {
+        row.day: (row.posts, row.positive_posts)
+        for row in DailyPostRollup.objects.all()
+        if row.posts or row.positive_posts
+    }
+
+
+class PostRollupTests(TestCase):
+    """The post rollups written by ``record_post`` must equal a ``rebuild_rollups()`` from scratch."""
+
+    def setUp(self):
+        self.author = User.objects.create_user(email="penulis@example.com", password="x", username="penulis")
+        self.reader = User.objects.create_user(email="pembaca@example.com", password="x", username="pembaca")
+
+    def create_post(self, tags: list[str], user=None) -> int:
+        response = self.client.post(
+            "/api/community/posts",
+            data={"title": "Daun menguning", "body": "Kenapa daun cabai menguning?", "tags": tags},
+            content_type="application/json",
+            **_auth(user or self.author),
+        )
+        self.assertEqual(response.status_code, 200)
+        return response.json()["id"]
+
+    def toggle_like(self, post_id: int, user) -> dict:
+        return self.client.post(f"/api/community/posts/{post_id}/like", **_auth(user)).json()
+
+    def assert_matches_rebuild(self):
+        rollups = _post_rollups()
+        rebuild_rollups()
+        self.assertEqual(_post_rollups(), rollups)
+
+    def test_post_lifecycle_matches_rebuild(self):
+        first = self.create_post(["Cabai", "hama"])
+        second = self.create_post(["cabai"])
+        self.create_post([], user=self.reader)
+        # Tanggal mundur ditulis langsung, jadi rollup disusun ulang sebagai titik awal
+        CommunityPost.objects.filter(id=second).update(created_at=timezone.now() - timedelta(days=3))
+        rebuild_rollups()
+
+        self.assertEqual(self.toggle_like(first, self.reader), {"liked": True, "likes": 1})
+        self.toggle_like(first, self.author)
+        self.toggle_like(second, self.reader)
+        self.toggle_like(second, self.reader)
+        self.assertEqual(_post_rollups()[timezone.localdate()], (2, 1))
+
+        response = self.client.patch(
+            f"/api/community/posts/{second}",
+            data={"tags": ["tomat", "hama"]},
+            content_type="application/json",
+            **_auth(self.author),
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assert_matches_rebuild()
+
+        self.assertEqual(self.client.delete(f"/api/community/posts/{first}", **_auth(self.author)).status_code, 200)
+        self.assertEqual(self.client.delete(f"/api/community/posts/{first}", **_auth(self.author)).status_code, 404)
+        self.assert_matches_rebuild()
+
+
+class PostCacheTests(TestCase):
+    """Cached post fragments are shared by every viewer; ``isLiked``/``isOwner`` never are."""
+
+    def setUp(self):
+        cache.clear()
+        self.author = User.objects.create_user(email="penulis@example.com", password="x", username="penulis")
+        self.reader = User.objects.create_user(email="pembaca@example.com", password="x", username="pembaca")
+        self.post_id = self.write("post", "/api/community/posts", self.author, {"title": "Daun", "body": "isi"})["id"]
+
+    def write(self, method: str, path: str, user, data: dict | None = None) -> dict:
+        # Cache dibersihkan lewat on_commit, yang di TestCase hanya jalan bila dijalankan eksplisit
+        with self.captureOnCommitCallbacks(execute=True):
+            response = getattr(self.client, method)(path, data=data, content_type="application/json", **_auth(user))
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def feed_item(self, user) -> dict:
+        items = self.client.get("/api/community/posts", **_auth(user)).json()["items"]
+        return next(item for item in items if item["id"] == self.post_id)
+
+    def test_viewer_fields_are_not_shared(self):
+        self.write("post", f"/api/community/posts/{self.post_id}/like", self.reader)
+        as_reader, as_author = self.feed_item(self.reader), self.feed_item(self.author)
+        self.assertEqual((as_reader["isLiked"], as_reader["isOwner"]), (True, False))
+        self.assertEqual((as_author["isLiked"], as_author["isOwner"]), (False, True))
+        self.assertEqual(as_reader["likes"], as_author["likes"])
+        self.assertGreaterEqual(post_fragment_cache.stats.snapshot()["hits"], 1)
+
+    def test_writes_replace_the_cached_fragment(self):
+        self.feed_item(self.reader)
+        self.write("patch", f"/api/community/posts/{self.post_id}", self.author, {"title": "Daun menguning"})
+        self.write("post", f"/api/community/posts/{self.post_id}/like", self.reader)
+        self.write("post", f"/api/community/posts/{self.post_id}/comments", self.reader, {"body": "Cek akar."})
+
+        item = self.feed_item(self.author)
+        self.assertEqual((item["title"], item["likes"], item["commentsCount"]), ("Daun menguning", 1, 1))
+        self.assertTrue(self.feed_item(self.reader)["isLiked"])
+        self.write("post", f"/api/community/posts/{self.post_id}/like", self.reader)
+        self.assertFalse(self.feed_item(self.reader)["isLiked"])
+
+    def test_cache_stats_are_admin_only(self):
+        self.feed_item(self.reader)
+        self.feed_item(self.author)
+        self.assertEqual(self.client.get("/api/community/cache/stats", **_auth(self.reader)).status_code, 403)
+
+        admin = User.objects.create_user(email="admin@example.com", password="x", username="admin", is_staff=True)
+        response = self.client.get("/api/community/cache/stats", **_auth(admin))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["posts"], {"hits": 1, "misses": 1, "hitRatio": 0.5})
+
+
+class PostEngagementTests(TestCase):
+    """Feed counts come from the denormalized counters and ``isLiked`` from the viewer's likes only."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(email="penulis@example.com", password="x", username="penulis")
+        cls.readers = User.objects.bulk_create(
+            User(email=f"pembaca{n}@example.com", username=f"pembaca{n}") for n in range(5)
+        )
+        cls.popular, cls.quiet, cls.new = (
+            CommunityPost.objects.create(user=cls.author, title=title, body="isi") for title in ("Populer", "Sepi", "Baru")
+        )
+        cls.engage(cls.popular, cls.readers)
+        toggle_like(cls.quiet.id, cls.readers[0])
+
+    @staticmethod
+    def engage(post: CommunityPost, users) -> None:
+        for user in users:
+            toggle_like(post.id, user)
+            create_comment(post, user, None, "Saya juga mengalami ini.")
+
+    def feed(self, user) -> dict[int, dict]:
+        cache.clear()
+        response = self.client.get("/api/community/posts", **_auth(user))
+        self.assertEqual(response.status_code, 200)
+        return {item["id"]: item for item in response.json()["items"]}
+
+    def test_payload_counts_and_viewer_flags(self):
+        feed = self.feed(self.readers[0])
+        self.assertEqual(
+            [(feed[post.id]["likes"], feed[post.id]["commentsCount"], feed[post.id]["isLiked"]) for post in (self.popular, self.quiet, self.new)],
+            [(5, 5, True), (1, 0, True), (0, 0, False)],
+        )
+        feed = self.feed(self.author)
+        self.assertFalse(any(item["isLiked"] for item in feed.values()))
+        self.assertTrue(all(item["isOwner"] for item in feed.values()))
+
+    def test_feed_never_reads_engagement_rows(self):
+        with CaptureQueriesContext(connection) as queries:
+            self.feed(self.readers[0])
+        sql = [query["sql"] for query in queries.captured_queries]
+        self.assertFalse([query for query in sql if "community_communitycomment" in query])
+        likes = [query for query in sql if "community_communitypostlike" in query]
+        self.assertEqual(len(likes), 1)
+        self.assertIn('"community_communitypostlike"."user_id" =', likes[0])
+
+        self.engage(self.popular, User.objects.bulk_create(User(email=f"lain{n}@example.com", username=f"lain{n}") for n in range(10)))
+        with CaptureQueriesContext(connection) as after:
+            self.feed(self.readers[0])
+        self.assertEqual(len(after), len(queries))
+
+    def test_single_post_uses_an_exists_subquery(self):
+        toggle_like(self.popular.id, self.author)
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.patch(
+                f"/api/community/posts/{self.popular.id}",
+                data={"title": "Populer sekali"},
+                content_type="application/json",
+                **_auth(self.author),
+            )
+        body = response.json()
+        self.assertEqual((body["likes"], body["commentsCount"], body["isLiked"], body["isOwner"]), (6, 5, True, True))
+
+
+class FeedPaginationTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(email="feed@example.com", password="x", username="feed")
+        posts = CommunityPost.objects.bulk_create(
+            CommunityPost(user=self.user, title=f"Post {n}", body="isi") for n in range(7)
+        )
+        # Dua kelompok waktu yang sama persis: urutan di dalamnya hanya ditentukan id
+        moment = timezone.now()
+        CommunityPost.objects.filter(id__in=[post.id for post in posts[:4]]).update(created_at=moment)
+        CommunityPost.objects.filter(id__in=[post.id for post in posts[4:]]).update(created_at=moment - timedelta(hours=1))
+        self.expected = list(CommunityPost.objects.order_by("-created_at", "-id").values_list("id", flat=True))
+
+    def walk(self, limit: int) -> list[list[int]]:
+        pages, cursor = [], None
+        while True:
+            params = {"limit": limit, **({"cursor": cursor} if cursor else {})}
+            body = self.client.get("/api/community/posts", params, **_auth(self.user)).json()
+            pages.append([item["id"] for item in body["items"]])
+            cursor = body["nextCursor"]
+            if cursor is None:
+                return pages
+
+    def test_pages_cover_ties_exactly_once(self):
+        for limit in (1, 2, 3, 4, 7, 10):
+            with self.subTest(limit=limit):
+                pages = self.walk(limit)
+                self.assertEqual([post_id for page in pages for post_id in page], self.expected)
+                self.assertTrue(all(pages), "no empty page before the last cursor")
+
+    def test_last_full_page_has_no_cursor(self):
+        self.assertEqual(self.walk(7), [self.expected])
+
+    def test_invalid_cursor_is_rejected(self):
+        response = self.client.get("/api/community/posts", {"cursor": "bukan-cursor"}, **_auth(self.user))
+        self.assertEqual(response.status_code, 400)
+
+
+class PostCounterTests(TestCase):
+    """``upvotes``/``comments_count`` are moved with ``F()`` increments and must equal a recount."""
+
+    def setUp(self):
+        self.author = User.objects.create_user(email="penulis@example.com", password="x", username="penulis")
+        self.reader = User.objects.create_user(email="pembaca@example.com", password="x", username="pembaca")
+        self.post = CommunityPost.objects.create(user=self.author, title="Daun menguning", body="Kenapa?")
+
+    def toggle_like(self, user) -> dict:
+        return self.client.post(f"/api/community/posts/{self.post.id}/like", **_auth(user)).json()
+
+    def comment(self, parent_id: int | None = None) -> int:
+        response = self.client.post(
+            f"/api/community/posts/{self.post.id}/comments",
+            data={"body": "Coba cek akarnya.", "parentId": parent_id},
+            content_type="application/json",
+            **_auth(self.reader),
+        )
+        self.assertEqual(response.status_code, 200)
+        return response.json()["id"]
+
+    def counters(self) -> tuple[int, int]:
+        self.post.refresh_from_db()
+        return self.post.upvotes, self.post.comments_count
+
+    def test_likes_toggle(self):
+        self.assertEqual(self.toggle_like(self.reader), {"liked": True, "likes": 1})
+        self.assertEqual(self.toggle_like(self.author), {"liked": True, "likes": 2})
+        self.assertEqual(self.toggle_like(self.reader), {"liked": False, "likes": 1})
+        self.assertEqual(self.counters()[0], CommunityPostLike.objects.filter(post=self.post).count())
+        self.assertEqual(reconcile_post_counters(dry_run=True), 0)
+
+    def test_deleting_a_comment_removes_its_replies_from_the_count(self):
+        root = self.comment()
+        reply = self.comment(root)
+        self.comment(reply)
+        self.comment()
+        self.assertEqual(self.counters()[1], 4)
+
+        response = self.client.delete(f"/api/community/posts/{self.post.id}/comments/{root}", **_auth(self.reader))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.counters()[1], 1)
+        self.assertEqual(CommunityComment.objects.filter(post=self.post).count(), 1)
+        self.assertEqual(reconcile_post_counters(dry_run=True), 0)
+
+    def test_reconcile_repairs_drifted_counters(self):
+        self.toggle_like(self.reader)
+        self.comment()
+        untouched = CommunityPost.objects.create(user=self.author, title="Lain", body="isi")
+        CommunityPost.objects.filter(id=self.post.id).update(upvotes=7, comments_count=0)
+
+        self.assertEqual(reconcile_post_counters(dry_run=True), 1)
+        self.assertEqual(self.counters(), (7, 0))
+        out = StringIO()
+        call_command("reconcile_post_counters", batch_size=1, stdout=out)
+        self.assertIn("Repaired 1 post(s)", out.getvalue())
+        self.assertEqual(self.counters(), (1, 1))
+        untouched.refresh_from_db()
+        self.assertEqual((untouched.upvotes, untouched.comments_count), (0, 0))
+
+
+class PostSearchTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(email="cari@example.com", password="x", username="cari")
+        rows = [
+            ("Daun cabai menguning", "Daun bawah menguning lalu rontok.", ["cabai", "hara"]),
+            ("Cabai keriting", "Daun menguning di pucuk, ada kutu.", ["cabai", "hama"]),
+            ("Tomat layu", "Batang layu siang hari.", ["tomat"]),
+            ("Pupuk untuk padi", "Kapan waktu pemupukan susulan?", ["padi", "hara"]),
+        ]
+        cls.posts = {
+            title: CommunityPost.objects.create(user=cls.user, title=title, body=body, tags=tags).id
+            for title, body, tags in rows
+        }
+
+    def search(self, **params):
+        return self.client.get("/api/community/posts/search", params, **_auth(self.user))
+
+    def found(self, **params) -> set[int]:
+        response = self.search(**params)
+        self.assertEqual(response.status_code, 200)
+        return {item["id"] for item in response.json()["items"]}
+
+    def test_text_matches_title_or_body(self):
+        self.assertEqual(self.found(q="menguning"), {self.posts["Daun cabai menguning"], self.posts["Cabai keriting"]})
+        self.assertEqual(self.found(q="batang layu"), {self.posts["Tomat layu"]})
+
+    def test_tags_must_all_match(self):
+        self.assertEqual(self.found(tags=["hara"]), {self.posts["Daun cabai menguning"], self.posts["Pupuk untuk padi"]})
+        self.assertEqual(self.found(tags=["cabai", "hara"]), {self.posts["Daun cabai menguning"]})
+        self.assertEqual(self.found(q="menguning", tags=["hama"]), {self.posts["Cabai keriting"]})
+
+    def test_pages_do_not_repeat_results(self):
+        seen, cursor = [], None
+        while True:
+            params = {"tags": ["cabai"], "limit": 1, **({"cursor": cursor} if cursor else {})}
+            body = self.search(**params).json()
+            seen += [item["id"] for item in body["items"]]
+            cursor = body["nextCursor"]
+            if cursor is None:
+                break
+        self.assertCountEqual(seen, [self.posts["Daun cabai menguning"], self.posts["Cabai keriting"]])
+
+    def test_bad_requests(self):
+        self.assertEqual(self.search(q="  ").status_code, 400)
+        self.assertEqual(self.search(q="daun", cursor="bukan-cursor").status_code, 400)
+
+
+def _tag_stats() -> tuple[dict, dict]:
+    totals = {row.tag: row.post_count for row in CommunityTagStat.objects.filter(post_count__gt=0)}
+    daily = {(row.tag, row.day): row.post_count for row in CommunityTagDaily.objects.filter(post_count__gt=0)}
+    return totals, daily
+
+
+class TagFacetTests(TestCase):
+    """The facet tables are maintained by diffing tags on every write and must equal a rebuild."""
+
+    def setUp(self):
+        self.user = User.objects.create_user(email="penulis@example.com", password="x", username="penulis")
+
+    def create_post(self, tags: list[str]) -> int:
+        response = self.client.post(
+            "/api/community/posts",
+            data={"title": "Daun menguning", "body": "Kenapa?", "tags": tags},
+            content_type="application/json",
+            **_auth(self.user),
+        )
+        self.assertEqual(response.status_code, 200)
+        return response.json()["id"]
+
+    def facets(self, **params) -> list[tuple[str, int]]:
+        response = self.client.get("/api/community/tags", params, **_auth(self.user))
+        self.assertEqual(response.status_code, 200)
+        return [(row["tag"], row["count"]) for row in response.json()]
+
+    def assert_matches_rebuild(self):
+        expected = _tag_stats()
+        call_command("rebuild_tag_stats", batch_size=1, stdout=StringIO())
+        self.assertEqual(_tag_stats(), expected)
+
+    def test_writes_keep_the_facets_in_step(self):
+        first = self.create_post(["cabai", " hama ", "cabai"])
+        second = self.create_post(["cabai"])
+        self.create_post(["tomat"])
+        self.assertEqual(self.facets(), [("cabai", 2), ("hama", 1), ("tomat", 1)])
+        self.assert_matches_rebuild()
+
+        response = self.client.patch(
+            f"/api/community/posts/{second}",
+            data={"tags": ["tomat", "hama"]},
+            content_type="application/json",
+            **_auth(self.user),
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.facets(limit=2), [("hama", 2), ("tomat", 2)])
+        self.assert_matches_rebuild()
+
+        self.assertEqual(self.client.delete(f"/api/community/posts/{first}", **_auth(self.user)).status_code, 200)
+        self.assertEqual(self.facets(), [("tomat", 2), ("hama", 1)])
+        self.assert_matches_rebuild()
+
+    def test_windowed_counts_only_include_recent_posts(self):
+        old = self.create_post(["cabai", "padi"])
+        self.create_post(["cabai"])
+        # Tanggal mundur ditulis langsung, jadi tabel facet disusun ulang sebagai titik awal
+        CommunityPost.objects.filter(id=old).update(created_at=timezone.now() - timedelta(days=10))
+        call_command("rebuild_tag_stats", stdout=StringIO())
+
+        self.assertEqual(self.facets(days=7), [("cabai", 1)])
+        self.assertEqual(self.facets(days=11), [("cabai", 2), ("padi", 1)])
+        self.assertEqual(self.facets(), [("cabai", 2), ("padi", 1)])
+
+    @override_settings(COMMUNITY_TAG_FACET_MAX_DAYS=30)
+    def test_window_is_bounded(self):
+        self.assertEqual(self.client.get("/api/community/tags", {"days": 30}, **_auth(self.user)).status_code, 200)
+        for days in (0, 31):
+            with self.subTest(days=days):
+                response = self.client.get("/api/community/tags", {"days": days}, **_auth(self.user))
+                self.assertEqual(response.status_code, 400)
+
+
+class CommentTreeTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(email="pembaca@example.com", password="x", username="pembaca")
+        cls.post = CommunityPost.objects.create(user=cls.user, title="Daun menguning", body="Kenapa?")
+
+        def reply(parent=None):
+            return create_comment(cls.post, cls.user, parent, "Coba cek akarnya.")
+
+        cls.roots = [reply() for _ in range(3)]
+        cls.children = [reply(cls.roots[0]) for _ in range(7)]
+        cls.grandchildren = [reply(cls.children[0]) for _ in range(2)]
+        cls.great = reply(cls.grandchildren[0])
+        cls.beyond = reply(cls.great)
+        cls.hidden = reply(cls.children[6])  # di bawah balasan ke-7, yang terpotong repliesLimit
+        reply(cls.roots[2])
+
+    def tree(self, path: str = "comments/tree", **params) -> dict:
+        response = self.client.get(f"/api/community/posts/{self.post.id}/{path}", params, **_auth(self.user))
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_page_nests_subtrees_with_a_reply_limit_per_comment(self):
+        body = self.tree(limit=2, repliesLimit=5, depth=3)
+        self.assertEqual([item["id"] for item in body["items"]], [root.id for root in self.roots[:2]])
+        self.assertEqual(body["nextCursor"], str(self.roots[1].id))
+
+        first = body["items"][0]
+        self.assertEqual(first["replyCount"], 7)
+        self.assertEqual([node["id"] for node in first["replies"]], [child.id for child in self.children[:5]])
+        grandchildren = first["replies"][0]["replies"]
+        self.assertEqual([node["id"] for node in grandchildren], [child.id for child in self.grandchildren])
+        self.assertEqual([node["id"] for node in grandchildren[0]["replies"]], [self.great.id])
+        self.assertEqual(grandchildren[0]["replies"][0]["replies"], [])
+        self.assertEqual(body["items"][1]["replies"], [])
+
+        body = self.tree(limit=2, cursor=body["nextCursor"])
+        self.assertEqual([item["id"] for item in body["items"]], [self.roots[2].id])
+        self.assertEqual(len(body["items"][0]["replies"]), 1)
+        self.assertIsNone(body["nextCursor"])
+
+    def test_page_costs_two_queries_whatever_the_depth(self):
+        for depth in (1, 3, 10):
+            with self.subTest(depth=depth), self.assertNumQueries(2):
+                comments, _ = comment_thread_page(self.post.id, None, 20, depth=depth, replies_limit=50)
+        self.assertEqual(len(comments), len(CommunityComment.objects.filter(post=self.post)))
+
+        comments, _ = comment_thread_page(self.post.id, None, 20, depth=10, replies_limit=5)
+        self.assertNotIn(self.hidden.id, {comment.id for comment in comments})
+        with self.assertNumQueries(1):
+            comment_thread_page(self.post.id, None, 20, depth=0)
+
+    def test_replies_of_a_comment(self):
+        body = self.tree(f"comments/{self.children[0].id}/replies", depth=1)
+        self.assertEqual([item["id"] for item in body["items"]], [child.id for child in self.grandchildren])
+        self.assertEqual([node["id"] for node in body["items"][0]["replies"]], [self.great.id])
+        self.assertEqual(body["items"][0]["replies"][0]["replies"], [])
+
+    def test_deleting_twice_decrements_the_parent_once(self):
+        # Dua permintaan hapus yang bersamaan memegang salinan komentar yang sama
+        first, second = (CommunityComment.objects.get(id=self.grandchildren[1].id) for _ in range(2))
+        self.assertEqual(delete_comment(first), 1)
+        self.assertEqual(delete_comment(second), 0)
+        self.children[0].refresh_from_db()
+        self.assertEqual(self.children[0].replies_count, 1)
+        self.assertEqual(reconcile_post_counters(dry_run=True), 0)
+
+    def test_reconcile_repairs_reply_counts(self):
+        CommunityComment.objects.filter(id=self.roots[0].id).update(replies_count=2)
+        CommunityComment.objects.filter(id=self.roots[1].id).update(replies_count=4)
+        self.assertEqual(reconcile_post_counters(dry_run=True), 1)
+        self.assertEqual(reconcile_post_counters(), 1)
+        counts = dict(CommunityComment.objects.filter(id__in=[root.id for root in self.roots]).values_list("id", "replies_count"))
+        self.assertEqual(counts, {self.roots[0].id: 7, self.roots[1].id: 0, self.roots[2].id: 1})
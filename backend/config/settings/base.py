@@ -33,10 +33,12 @@ INSTALLED_APPS = [
     "logs",
     "community",
     "dashboard",
+    "benchmarks",
 ]
 
 
 MIDDLEWARE = [
+    "services.metrics.metrics_middleware",
     "corsheaders.middleware.CorsMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
@@ -121,3 +123,75 @@ MEDIA_ROOT = BASE_DIR / "media"
 STATIC_URL = "/static/"
 STATIC_ROOT = BASE_DIR / "staticfiles"
 STATICFILES_DIRS: list[str | Path] = []
+
+# Varian gambar "model input" yang dikirim ke agen vision & diagnosis
+VISION_INPUT_MAX_EDGE = env.int("VISION_INPUT_MAX_EDGE", default=1280)
+VISION_INPUT_FORMAT = env("VISION_INPUT_FORMAT", default="WEBP")
+VISION_INPUT_QUALITY = env.int("VISION_INPUT_QUALITY", default=80)
+
+# Cache hasil vision untuk foto yang (hampir) identik, berbasis perceptual hash
+VISION_CACHE_TTL = env.int("VISION_CACHE_TTL", default=60 * 60 * 24 * 3)
+VISION_CACHE_MAX_DISTANCE = env.int("VISION_CACHE_MAX_DISTANCE", default=4)
+
+# Mode scan: "sync" menunggu analisis selesai, "job" dikerjakan oleh `manage.py run_scan_worker`
+VISION_SCAN_DEFAULT_MODE = env("VISION_SCAN_DEFAULT_MODE", default="sync")
+VISION_WORKER_CONCURRENCY = env.int("VISION_WORKER_CONCURRENCY", default=4)
+VISION_WORKER_POLL_INTERVAL = env.float("VISION_WORKER_POLL_INTERVAL", default=2.0)
+VISION_WORKER_STALE_AFTER = env.int("VISION_WORKER_STALE_AFTER", default=300)
+VISION_WORKER_MAX_ATTEMPTS = env.int("VISION_WORKER_MAX_ATTEMPTS", default=3)
+
+# Penjadwal bersama untuk semua panggilan LLM (vision & diagnosis)
+LLM_MAX_IN_FLIGHT = env.int("LLM_MAX_IN_FLIGHT", default=8)
+LLM_MAX_QUEUE = env.int("LLM_MAX_QUEUE", default=32)
+LLM_QUEUE_TIMEOUT = env.float("LLM_QUEUE_TIMEOUT", default=60.0)
+# LLM_MAX_IN_FLIGHT berlaku per proses; batas global untuk semua proses (API + scan worker) dijaga lewat
+# slot di cache bersama (Redis). Slot diperpanjang selama panggilan berjalan, TTL hanya menentukan berapa lama
+# slot milik proses yang mati tetap terkunci.
+LLM_GLOBAL_MAX_IN_FLIGHT = env.int("LLM_GLOBAL_MAX_IN_FLIGHT", default=8)
+LLM_SLOT_TTL = env.int("LLM_SLOT_TTL", default=60)
+
+VISION_BATCH_MAX_IMAGES = env.int("VISION_BATCH_MAX_IMAGES", default=6)
+VISION_BATCH_CONCURRENCY = env.int("VISION_BATCH_CONCURRENCY", default=3)
+
+# Cache hasil diagnosis untuk input checklist yang sama
+DIAGNOSIS_CACHE_TTL = env.int("DIAGNOSIS_CACHE_TTL", default=60 * 60 * 24)
+
+# Cache hasil tool pencarian (Google, DuckDuckGo, arXiv) yang dipakai agen
+TOOL_CACHE_TTL = env.int("TOOL_CACHE_TTL", default=60 * 60 * 6)
+TOOL_CACHE_MAXSIZE = env.int("TOOL_CACHE_MAXSIZE", default=2048)
+TOOL_CACHE_USE_REDIS = env.bool("TOOL_CACHE_USE_REDIS", default=True)
+
+# Indeks BM25 lokal atas sumber diagnosis yang sudah tersimpan
+EVIDENCE_INDEX_REFRESH_INTERVAL = env.int("EVIDENCE_INDEX_REFRESH_INTERVAL", default=300)
+
+# Provider LLM: "gemini" (produksi) atau "stub" (offline, untuk load test & benchmark)
+LLM_PROVIDER = env("LLM_PROVIDER", default="gemini")
+LLM_MODEL_ID = env("LLM_MODEL_ID", default="gemini-2.0-flash")
+# Distribusi latensi stub: "fixed", "uniform" (median ± spread ms) atau "lognormal" (sigma = spread)
+LLM_STUB_LATENCY_DISTRIBUTION = env("LLM_STUB_LATENCY_DISTRIBUTION", default="lognormal")
+LLM_STUB_LATENCY_MS = env.float("LLM_STUB_LATENCY_MS", default=800.0)
+LLM_STUB_LATENCY_SPREAD = env.float("LLM_STUB_LATENCY_SPREAD", default=0.5)
+LLM_STUB_ERROR_RATE = env.float("LLM_STUB_ERROR_RATE", default=0.0)
+LLM_STUB_SEED = env.int("LLM_STUB_SEED", default=42)
+
+# Metrik Prometheus di /api/metrics; set PROMETHEUS_MULTIPROC_DIR (env proses) untuk mode multi-proses
+METRICS_ENABLED = env.bool("METRICS_ENABLED", default=True)
+METRICS_AUTH_TOKEN = env("METRICS_AUTH_TOKEN", default="")
+METRICS_EXECUTOR_PROBE_RATE = env.float("METRICS_EXECUTOR_PROBE_RATE", default=0.05)
+
+# Cache fragmen postingan komunitas (bagian yang sama untuk semua user) & set like per user
+COMMUNITY_POST_CACHE_TTL = env.int("COMMUNITY_POST_CACHE_TTL", default=60 * 10)
+COMMUNITY_LIKED_CACHE_TTL = env.int("COMMUNITY_LIKED_CACHE_TTL", default=60 * 10)
+# Rentang maksimal (hari) untuk facet tag per periode di /community/tags?days=
+COMMUNITY_TAG_FACET_MAX_DAYS = env.int("COMMUNITY_TAG_FACET_MAX_DAYS", default=366)
+
+# Cache metrik dashboard: segar selama TTL, lalu disajikan basi (stale) sambil dihitung ulang di latar
+DASHBOARD_METRICS_TTL = env.int("DASHBOARD_METRICS_TTL", default=60)
+DASHBOARD_METRICS_STALE_TTL = env.int("DASHBOARD_METRICS_STALE_TTL", default=60 * 10)
+DASHBOARD_METRICS_LOCK_TIMEOUT = env.int("DASHBOARD_METRICS_LOCK_TIMEOUT", default=30)
+DASHBOARD_METRICS_WAIT_TIMEOUT = env.float("DASHBOARD_METRICS_WAIT_TIMEOUT", default=2.0)
+# Interval perintah warm_dashboard_metrics (detik); sebaiknya < DASHBOARD_METRICS_TTL
+DASHBOARD_WARM_INTERVAL = env.float("DASHBOARD_WARM_INTERVAL", default=30.0)
+
+# Cache deret waktu diagnosis per user (dibuang otomatis saat diagnosis/scan user berubah)
+DASHBOARD_SERIES_CACHE_TTL = env.int("DASHBOARD_SERIES_CACHE_TTL", default=60 * 15)
@@ -27,8 +27,9 @@ from diagnosis.api import DiagnosisController
 from logs.api import LogbookController, ReminderController
 from community.api import CommunityController
 from dashboard.api import DashboardController
+from services.metrics import TimedJSONRenderer, metrics_view
 
-api = NinjaExtraAPI(title="Plantify API", version="1.0.0")
+api = NinjaExtraAPI(title="Plantify API", version="1.0.0", renderer=TimedJSONRenderer())
 
 api.register_controllers(AsyncNinjaJWTDefaultController)
 api.register_controllers(
@@ -43,5 +44,6 @@ api.register_controllers(
 
 urlpatterns = [
     path('admin/', admin.site.urls),
+    path("api/metrics", metrics_view, name="metrics"),
     path("api/", api.urls),
 ] + static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
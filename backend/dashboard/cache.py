@@ -0,0 +1,192 @@
+from __future__ import annotations
+
+import hashlib
+import logging
+import threading
+import time
+import uuid
+from typing import Callable, Hashable
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import close_old_connections
+
+from services.cache_stats import CacheStats
+
+logger = logging.getLogger(__name__)
+
+Compute = Callable[[], list[dict]]
+
+
+class DashboardMetricsCache:
+    """Shared cache of the dashboard metrics with stampede protection.
+
+    An entry is fresh for ``DASHBOARD_METRICS_TTL`` seconds and then served
+    stale for up to ``DASHBOARD_METRICS_STALE_TTL`` more while one worker
+    recomputes it in the background. Only the holder of the cache lock
+    recomputes; on a cold cache other requests wait briefly for its result.
+    """
+
+    def __init__(self, alias: str = "default", prefix: str = "dashboard:metrics") -> None:
+        self.alias = alias
+        self.prefix = prefix
+        self.stats = CacheStats(prefix, alias=alias)
+
+    @property
+    def cache(self):
+        return caches[self.alias]
+
+    def _entry_key(self) -> str:
+        return f"{self.prefix}:entry"
+
+    def _lock_key(self) -> str:
+        return f"{self.prefix}:lock"
+
+    def _acquire(self) -> str | None:
+        token = uuid.uuid4().hex
+        if self.cache.add(self._lock_key(), token, timeout=settings.DASHBOARD_METRICS_LOCK_TIMEOUT):
+            return token
+        return None
+
+    def _release(self, token: str) -> None:
+        # Lepas hanya bila lock masih milik kita (bisa saja sudah kedaluwarsa & diambil worker lain)
+        if self.cache.get(self._lock_key()) == token:
+            self.cache.delete(self._lock_key())
+
+    def _store(self, data: list[dict]) -> None:
+        ttl = settings.DASHBOARD_METRICS_TTL
+        entry = {"data": data, "fresh_until": time.time() + ttl}
+        self.cache.set(self._entry_key(), entry, timeout=ttl + settings.DASHBOARD_METRICS_STALE_TTL)
+
+    def refresh(self, compute: Compute, token: str | None = None) -> list[dict] | None:
+        """Recompute and store the metrics if we hold (or can take) the lock; ``None`` if someone else does."""
+        token = token or self._acquire()
+        if token is None:
+            return None
+        try:
+            data = compute()
+            try:
+                self._store(data)
+            except Exception as exc:
+                logger.warning("Dashboard metrics cache store failed: %s", exc)
+            return data
+        finally:
+            try:
+                self._release(token)
+            except Exception as exc:
+                # Lock tetap kedaluwarsa sendiri setelah DASHBOARD_METRICS_LOCK_TIMEOUT
+                logger.warning("Dashboard metrics cache lock release failed: %s", exc)
+
+    def _refresh_in_background(self, compute: Compute, token: str) -> None:
+        def _run() -> None:
+            try:
+                self.refresh(compute, token)
+            except Exception:
+                logger.exception("Background refresh of dashboard metrics failed")
+            finally:
+                close_old_connections()
+
+        threading.Thread(target=_run, name="dashboard-metrics-refresh", daemon=True).start()
+
+    def _wait_for_entry(self) -> dict | None:
+        deadline = time.monotonic() + settings.DASHBOARD_METRICS_WAIT_TIMEOUT
+        while time.monotonic() < deadline:
+            time.sleep(0.05)
+            entry = self.cache.get(self._entry_key())
+            if entry is not None:
+                return entry
+        return None
+
+    def get(self, compute: Compute) -> list[dict]:
+        try:
+            entry = self.cache.get(self._entry_key())
+        except Exception as exc:
+            logger.warning("Dashboard metrics cache lookup failed: %s", exc)
+            return compute()
+
+        if entry is not None:
+            self.stats.hit()
+            if entry["fresh_until"] <= time.time():
+                try:
+                    token = self._acquire()
+                except Exception as exc:
+                    logger.warning("Dashboard metrics cache lock failed; serving stale metrics: %s", exc)
+                    token = None
+                if token is not None:
+                    self._refresh_in_background(compute, token)
+            return entry["data"]
+
+        self.stats.miss()
+        try:
+            token = self._acquire()
+        except Exception as exc:
+            logger.warning("Dashboard metrics cache lock failed: %s", exc)
+            return compute()
+        if token is not None:
+            return self.refresh(compute, token)
+        try:
+            entry = self._wait_for_entry()
+        except Exception as exc:
+            logger.warning("Dashboard metrics cache lookup failed while waiting: %s", exc)
+            return compute()
+        if entry is not None:
+            return entry["data"]
+        logger.warning("Timed out waiting for dashboard metrics; computing without the lock")
+        return compute()
+
+    def invalidate(self) -> None:
+        self.cache.delete(self._entry_key())
+
+
+class UserSeriesCache:
+    """Per-user time series keyed by their query parameters.
+
+    Each user has a version counter that is bumped whenever their diagnoses or
+    scans change, so every cached range for that user is dropped in one write.
+    """
+
+    def __init__(self, alias: str = "default", prefix: str = "dashboard:series") -> None:
+        self.alias = alias
+        self.prefix = prefix
+        self.stats = CacheStats(prefix, alias=alias)
+
+    @property
+    def cache(self):
+        return caches[self.alias]
+
+    def _version_key(self, user_id: int) -> str:
+        return f"{self.prefix}:{user_id}:version"
+
+    def _key(self, user_id: int, params: tuple[Hashable, ...]) -> str:
+        version = self.cache.get_or_set(self._version_key(user_id), 1, timeout=None)
+        digest = hashlib.sha1("|".join(str(part) for part in params).encode("utf-8")).hexdigest()
+        return f"{self.prefix}:{user_id}:v{version}:{digest}"
+
+    def get(self, user_id: int, params: tuple[Hashable, ...], loader: Callable[[], list[dict]]) -> list[dict]:
+        try:
+            key = self._key(user_id, params)
+            series = self.cache.get(key)
+        except Exception as exc:
+            logger.warning("Dashboard series cache lookup failed for user %s: %s", user_id, exc)
+            return loader()
+        if series is not None:
+            self.stats.hit()
+            return series
+        self.stats.miss()
+        series = loader()
+        try:
+            self.cache.set(key, series, timeout=settings.DASHBOARD_SERIES_CACHE_TTL)
+        except Exception as exc:
+            logger.warning("Dashboard series cache store failed for user %s: %s", user_id, exc)
+        return series
+
+    def invalidate(self, user_id: int) -> None:
+        try:
+            self.cache.get_or_set(self._version_key(user_id), 1, timeout=None)
+            self.cache.incr(self._version_key(user_id))
+        except Exception as exc:
+            logger.warning("Dashboard series cache invalidation failed for user %s: %s", user_id, exc)
+
+
+dashboard_metrics_cache = DashboardMetricsCache()
+user_series_cache = UserSeriesCache()
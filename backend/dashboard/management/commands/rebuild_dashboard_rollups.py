@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from dashboard.services import rebuild_rollups
+
+
+class Command(BaseCommand):
+    help = "Recompute the daily dashboard rollups from every diagnosis and community post."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=5000, help="Rollup rows inserted per batch.")
+
+    def handle(self, *args, **options):
+        created = rebuild_rollups(batch_size=max(1, options["batch_size"]))
+        summary = ", ".join(f"{count} {name.replace('_', ' ')}" for name, count in created.items())
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt dashboard rollups: {summary}."))
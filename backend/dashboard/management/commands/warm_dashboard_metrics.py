@@ -0,0 +1,31 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from dashboard.cache import dashboard_metrics_cache
+from dashboard.services import compute_metrics
+
+
+class Command(BaseCommand):
+    help = "Keep the cached dashboard metrics warm by recomputing them before they go stale."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--interval", type=float, default=None, help="Seconds between refreshes.")
+        parser.add_argument("--once", action="store_true", help="Refresh a single time and exit.")
+
+    def handle(self, *args, **options):
+        interval = options["interval"] or settings.DASHBOARD_WARM_INTERVAL
+        refreshed = 0
+        try:
+            while True:
+                close_old_connections()
+                if dashboard_metrics_cache.refresh(compute_metrics) is not None:
+                    refreshed += 1
+                if options["once"]:
+                    break
+                time.sleep(interval)
+        except KeyboardInterrupt:
+            pass
+        self.stdout.write(self.style.SUCCESS(f"Refreshed dashboard metrics {refreshed} time(s)."))
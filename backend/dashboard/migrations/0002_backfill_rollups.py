@@ -0,0 +1,64 @@
+from django.db import migrations
+from django.db.models import Count, Q, Sum
+from django.db.models.functions import TruncDate
+
+
+def backfill_rollups(apps, schema_editor):
+    Diagnosis = apps.get_model("diagnosis", "Diagnosis")
+    CommunityPost = apps.get_model("community", "CommunityPost")
+    DailyDiagnosisRollup = apps.get_model("dashboard", "DailyDiagnosisRollup")
+    DailyIssueRollup = apps.get_model("dashboard", "DailyIssueRollup")
+    DailyPostRollup = apps.get_model("dashboard", "DailyPostRollup")
+
+    diagnoses = (
+        Diagnosis.objects.annotate(day=TruncDate("created_at"))
+        .values("day")
+        .annotate(n=Count("id"), confidence_total=Sum("confidence"), confidence_n=Count("confidence"))
+        .order_by()
+    )
+    DailyDiagnosisRollup.objects.bulk_create(
+        [
+            DailyDiagnosisRollup(
+                day=row["day"],
+                diagnoses=row["n"],
+                confidence_sum=row["confidence_total"] or 0.0,
+                confidence_count=row["confidence_n"],
+            )
+            for row in diagnoses
+        ],
+        batch_size=5000,
+    )
+    issues = (
+        Diagnosis.objects.exclude(issue="")
+        .annotate(day=TruncDate("created_at"))
+        .values("day", "issue")
+        .annotate(n=Count("id"))
+        .order_by()
+    )
+    DailyIssueRollup.objects.bulk_create(
+        [DailyIssueRollup(day=row["day"], issue=row["issue"], diagnoses=row["n"]) for row in issues],
+        batch_size=5000,
+    )
+    posts = (
+        CommunityPost.objects.annotate(day=TruncDate("created_at"))
+        .values("day")
+        .annotate(n=Count("id"), positive=Count("id", filter=Q(upvotes__gt=0)))
+        .order_by()
+    )
+    DailyPostRollup.objects.bulk_create(
+        [DailyPostRollup(day=row["day"], posts=row["n"], positive_posts=row["positive"]) for row in posts],
+        batch_size=5000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dashboard', '0001_initial'),
+        ('diagnosis', '0002_initial'),
+        ('community', '0008_tag_stats'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_rollups, migrations.RunPython.noop),
+    ]
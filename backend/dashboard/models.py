@@ -1,3 +1,38 @@
 from django.db import models
 
-# Create your models here.
+
+class DailyDiagnosisRollup(models.Model):
+    """Ringkasan diagnosis per hari, diperbarui setiap kali diagnosis disimpan atau dihapus."""
+
+    day = models.DateField(unique=True)
+    diagnoses = models.PositiveIntegerField(default=0)
+    confidence_sum = models.FloatField(default=0.0)
+    confidence_count = models.PositiveIntegerField(default=0)
+
+    def __str__(self) -> str:
+        return f"{self.day}: {self.diagnoses} diagnosis"
+
+
+class DailyIssueRollup(models.Model):
+    day = models.DateField()
+    issue = models.CharField(max_length=255)
+    diagnoses = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["day", "issue"], name="unique_issue_day"),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.day}: {self.issue} ({self.diagnoses})"
+
+
+class DailyPostRollup(models.Model):
+    """Postingan komunitas per hari pembuatan; ``positive_posts`` = postingan dengan minimal satu like."""
+
+    day = models.DateField(unique=True)
+    posts = models.PositiveIntegerField(default=0)
+    positive_posts = models.PositiveIntegerField(default=0)
+
+    def __str__(self) -> str:
+        return f"{self.day}: {self.posts} post"
@@ -0,0 +1,314 @@
+from __future__ import annotations
+
+from datetime import date, datetime, time, timedelta
+
+from django.db import transaction
+from django.db.models import Count, Q, Sum
+from django.db.models.functions import Trunc, TruncDate
+from django.utils import timezone
+
+from community.models import CommunityPost
+from diagnosis.models import Diagnosis
+from services.counters import increment
+from vision.models import ScanSession
+
+from .models import DailyDiagnosisRollup, DailyIssueRollup, DailyPostRollup
+
+WINDOW_DAYS = 7
+SERIES_BUCKETS = ("day", "week", "month")
+MAX_SERIES_DAYS = 366 * 3
+
+
+def record_diagnosis(created_at: datetime, issue: str, confidence: float, sign: int = 1) -> None:
+    """Add (``sign=1``) or remove (``sign=-1``) one diagnosis from the daily rollups."""
+    day = timezone.localdate(created_at)
+    increment(
+        DailyDiagnosisRollup,
+        {"day": day},
+        diagnoses=sign,
+        confidence_sum=sign * (confidence or 0.0),
+        confidence_count=sign,
+    )
+    if issue:
+        increment(DailyIssueRollup, {"day": day, "issue": issue}, diagnoses=sign)
+
+
+def record_post(created_at: datetime, posts: int = 0, positive_posts: int = 0) -> None:
+    increment(DailyPostRollup, {"day": timezone.localdate(created_at)}, posts=posts, positive_posts=positive_posts)
+
+
+def _windows(today: date) -> tuple[Q, Q]:
+    recent_start = today - timedelta(days=WINDOW_DAYS - 1)
+    previous_start = recent_start - timedelta(days=WINDOW_DAYS)
+    return Q(day__gte=recent_start), Q(day__gte=previous_start, day__lt=recent_start)
+
+
+def diagnosis_stats(today: date) -> dict:
+    """Totals and confidence sums overall, for the last 7 days and for the 7 days before."""
+    recent, previous = _windows(today)
+    return DailyDiagnosisRollup.objects.aggregate(
+        total=Sum("diagnoses", default=0),
+        recent_total=Sum("diagnoses", filter=recent, default=0),
+        previous_total=Sum("diagnoses", filter=previous, default=0),
+        confidence_total=Sum("confidence_sum"),
+        confidence_n=Sum("confidence_count"),
+        recent_confidence_total=Sum("confidence_sum", filter=recent),
+        recent_confidence_n=Sum("confidence_count", filter=recent),
+        previous_confidence_total=Sum("confidence_sum", filter=previous),
+        previous_confidence_n=Sum("confidence_count", filter=previous),
+    )
+
+
+def top_issue_stats(today: date) -> dict | None:
+    recent, previous = _windows(today)
+    return (
+        DailyIssueRollup.objects.exclude(issue="")
+        .values("issue")
+        .annotate(
+            total=Sum("diagnoses"),
+            recent_total=Sum("diagnoses", filter=recent, default=0),
+            previous_total=Sum("diagnoses", filter=previous, default=0),
+        )
+        .filter(total__gt=0)
+        .order_by("-total", "issue")
+        .first()
+    )
+
+
+def post_stats(today: date) -> dict:
+    recent, previous = _windows(today)
+    return DailyPostRollup.objects.aggregate(
+        total=Sum("posts", default=0),
+        positive=Sum("positive_posts", default=0),
+        recent_total=Sum("posts", filter=recent, default=0),
+        recent_positive=Sum("positive_posts", filter=recent, default=0),
+        previous_total=Sum("posts", filter=previous, default=0),
+        previous_positive=Sum("positive_posts", filter=previous, default=0),
+    )
+
+
+def rebuild_rollups(batch_size: int = 5000) -> dict[str, int]:
+    """Recompute every rollup table from ``Diagnosis`` and ``CommunityPost`` with GROUP BY day."""
+    diagnoses = (
+        Diagnosis.objects.annotate(day=TruncDate("created_at"))
+        .values("day")
+        .annotate(n=Count("id"), confidence_total=Sum("confidence"), confidence_n=Count("confidence"))
+        .order_by()
+    )
+    issues = (
+        Diagnosis.objects.exclude(issue="")
+        .annotate(day=TruncDate("created_at"))
+        .values("day", "issue")
+        .annotate(n=Count("id"))
+        .order_by()
+    )
+    posts = (
+        CommunityPost.objects.annotate(day=TruncDate("created_at"))
+        .values("day")
+        .annotate(n=Count("id"), positive=Count("id", filter=Q(upvotes__gt=0)))
+        .order_by()
+    )
+
+    with transaction.atomic():
+        for model in (DailyDiagnosisRollup, DailyIssueRollup, DailyPostRollup):
+            model.objects.all().delete()
+        created = {
+            "diagnosis_days": len(
+                DailyDiagnosisRollup.objects.bulk_create(
+                    [
+                        DailyDiagnosisRollup(
+                            day=row["day"],
+                            diagnoses=row["n"],
+                            confidence_sum=row["confidence_total"] or 0.0,
+                            confidence_count=row["confidence_n"],
+                        )
+                        for row in diagnoses
+                    ],
+                    batch_size=batch_size,
+                )
+            ),
+            "issue_days": len(
+                DailyIssueRollup.objects.bulk_create(
+                    [DailyIssueRollup(day=row["day"], issue=row["issue"], diagnoses=row["n"]) for row in issues],
+                    batch_size=batch_size,
+                )
+            ),
+            "post_days": len(
+                DailyPostRollup.objects.bulk_create(
+                    [DailyPostRollup(day=row["day"], posts=row["n"], positive_posts=row["positive"]) for row in posts],
+                    batch_size=batch_size,
+                )
+            ),
+        }
+    return created
+
+
+def _relative_delta(current: int | float | None, previous: int | float | None) -> float | None:
+    if current is None or previous is None or previous == 0:
+        return None
+    return round(((current - previous) / (previous) * 100), 1)
+
+
+def _percent_point_delta(current: float | None, previous: float | None) -> float | None:
+    if current is None or previous is None:
+        return None
+    return round(current - previous, 1)
+
+
+def _average(total: float | None, count: int | None) -> float | None:
+    if not count:
+        return None
+    return total / count
+
+
+def _to_percent(value: float | None) -> float | None:
+    if value is None:
+        return None
+    return round(value * 100, 1)
+
+
+def _format_percent(value: float | None) -> str:
+    if value is None:
+        return "0%"
+    return f"{value:.1f}%"
+
+
+def compute_metrics() -> list[dict]:
+    """Dashboard metrics for everyone (they are not user-scoped): one aggregate query per rollup table."""
+    today = timezone.localdate()
+    diagnoses = diagnosis_stats(today)
+    top_issue = top_issue_stats(today)
+    feedback = post_stats(today)
+    total_diagnoses = diagnoses["total"]
+    last_week_diagnoses = diagnoses["recent_total"]
+    prev_week_diagnoses = diagnoses["previous_total"]
+    overall_avg = _average(diagnoses["confidence_total"], diagnoses["confidence_n"])
+    recent_avg = _average(diagnoses["recent_confidence_total"], diagnoses["recent_confidence_n"])
+    previous_avg = _average(diagnoses["previous_confidence_total"], diagnoses["previous_confidence_n"])
+
+    metrics: list[dict] = [
+        dict(
+            label="Total Diagnosis",
+            value=total_diagnoses,
+            delta=_relative_delta(last_week_diagnoses, prev_week_diagnoses),
+        )
+    ]
+
+    overall_avg_percent = _to_percent(overall_avg)
+    recent_avg_percent = _to_percent(recent_avg)
+    previous_avg_percent = _to_percent(previous_avg)
+    metrics.append(
+        dict(
+            label="Confidence Rata-rata",
+            value=_format_percent(overall_avg_percent),
+            delta=_percent_point_delta(recent_avg_percent, previous_avg_percent),
+        )
+    )
+
+    if top_issue:
+        metrics.append(
+            dict(
+                label="Penyakit Teratas",
+                value=f"{top_issue['issue']} ({top_issue['total']})",
+                delta=_relative_delta(top_issue["recent_total"], top_issue["previous_total"]),
+            )
+        )
+    else:
+        metrics.append(
+            dict(
+                label="Penyakit Teratas",
+                value="Belum ada data",
+                delta=None,
+            )
+        )
+
+    total_posts = feedback["total"]
+    positive_posts = feedback["positive"]
+    overall_feedback_percent = _to_percent((positive_posts / total_posts) if total_posts else None)
+    recent_feedback_percent = _to_percent(
+        (feedback["recent_positive"] / feedback["recent_total"]) if feedback["recent_total"] else None
+    )
+    previous_feedback_percent = _to_percent(
+        (feedback["previous_positive"] / feedback["previous_total"]) if feedback["previous_total"] else None
+    )
+    metrics.append(
+        dict(
+            label="Feedback Positif",
+            value=_format_percent(overall_feedback_percent),
+            delta=_percent_point_delta(recent_feedback_percent, previous_feedback_percent),
+        )
+    )
+
+    return metrics
+
+
+def _bucket_start(day: date, bucket: str) -> date:
+    if bucket == "week":
+        return day - timedelta(days=day.weekday())
+    if bucket == "month":
+        return day.replace(day=1)
+    return day
+
+
+def _bucket_starts(start: date, end: date, bucket: str) -> list[date]:
+    starts = []
+    current = _bucket_start(start, bucket)
+    while current <= end:
+        starts.append(current)
+        if bucket == "day":
+            current += timedelta(days=1)
+        elif bucket == "week":
+            current += timedelta(weeks=1)
+        else:
+            current = (current + timedelta(days=32)).replace(day=1)
+    return starts
+
+
+def diagnosis_series(user_id: int, start: date, end: date, bucket: str = "day", plant: str | None = None) -> list[dict]:
+    """Per-bucket diagnosis count, average confidence, top issue and scan count for one user.
+
+    Buckets come from ``date_trunc`` in the database (local time zone, weeks start on
+    Monday) and empty buckets are filled with zeros so charts get a continuous axis.
+    """
+    tz = timezone.get_current_timezone()
+    since = timezone.make_aware(datetime.combine(start, time.min), tz)
+    until = timezone.make_aware(datetime.combine(end + timedelta(days=1), time.min), tz)
+    diagnoses = Diagnosis.objects.filter(user_id=user_id, created_at__gte=since, created_at__lt=until)
+    scans = ScanSession.objects.filter(user_id=user_id, created_at__gte=since, created_at__lt=until)
+    if plant:
+        diagnoses = diagnoses.filter(scan__plant_name__iexact=plant)
+        scans = scans.filter(plant_name__iexact=plant)
+
+    truncated = Trunc("created_at", bucket, tzinfo=tz)
+    # Satu GROUP BY (bucket, issue) memberi jumlah, rata-rata confidence dan penyakit teratas sekaligus
+    groups = (
+        diagnoses.annotate(bucket=truncated)
+        .values("bucket", "issue")
+        .annotate(n=Count("id"), confidence_total=Sum("confidence"), confidence_n=Count("confidence"))
+        .order_by("bucket", "-n", "issue")
+    )
+    scan_counts = scans.annotate(bucket=truncated).values("bucket").annotate(n=Count("id")).order_by()
+
+    def _day(value: datetime) -> date:
+        return timezone.localtime(value, tz).date() if timezone.is_aware(value) else value.date()
+
+    points = {
+        day: {"bucket": day, "diagnoses": 0, "scans": 0, "avgConfidence": None, "topIssue": None, "topIssueCount": 0}
+        for day in _bucket_starts(start, end, bucket)
+    }
+    confidence: dict[date, list[float]] = {}
+    for row in groups:
+        day = _day(row["bucket"])
+        point = points[day]
+        point["diagnoses"] += row["n"]
+        sums = confidence.setdefault(day, [0.0, 0])
+        sums[0] += row["confidence_total"] or 0.0
+        sums[1] += row["confidence_n"]
+        if row["issue"] and point["topIssue"] is None:
+            point["topIssue"] = row["issue"]
+            point["topIssueCount"] = row["n"]
+    for day, (total, count) in confidence.items():
+        points[day]["avgConfidence"] = _average(total, count)
+    for row in scan_counts:
+        points[_day(row["bucket"])]["scans"] = row["n"]
+    return list(points.values())
@@ -1,3 +1,218 @@
-from django.test import TestCase
+import uuid
+from datetime import date, datetime, time, timedelta
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from ninja_jwt.tokens import RefreshToken
+
+from diagnosis.models import Diagnosis
+from diagnosis.services import save_diagnosis
+from services.ai_agent import AgentResponse
+from vision.models import ScanSession
+
+from .cache import DashboardMetricsCache, dashboard_metrics_cache, user_series_cache
+from .models import DailyDiagnosisRollup, DailyIssueRollup
+from .services import rebuild_rollups, record_diagnosis
+
+User = get_user_model()
+
+
+def _agent_result(issue: str, confidence: float) -> AgentResponse:
+    return AgentResponse.model_validate(
+        {
+            "diagnosis": {"issue": issue, "confidence": confidence, "summary": "ringkas", "plantPart": "daun"},
+            "checklist": [],
+            "recommendations": [],
+            "sources": [],
+        }
+    )
+
+
+def _rollups() -> tuple[dict, dict]:
+    diagnoses = {
+        row.day: (row.diagnoses, round(row.confidence_sum, 6), row.confidence_count)
+        for row in DailyDiagnosisRollup.objects.filter(diagnoses__gt=0)
+    }
+    issues = {(row.day, row.issue): row.diagnoses for row in DailyIssueRollup.objects.filter(diagnoses__gt=0)}
+    return diagnoses, issues
+
+
+class DiagnosisRollupTests(TestCase):
+    """The rollups written by ``record_diagnosis`` must equal a ``rebuild_rollups()`` from scratch."""
+
+    def setUp(self):
+        self.user = User.objects.create_user(email="petani@example.com", password="x", username="petani")
+
+    def diagnose(self, issue: str, confidence: float) -> int:
+        scan = ScanSession.objects.create(user=self.user, image="scans/daun.jpg", status=ScanSession.STATUS_COMPLETED)
+        return save_diagnosis(self.user, scan, ["bercak"], _agent_result(issue, confidence))
+
+    def assert_matches_rebuild(self):
+        expected = _rollups()
+        rebuild_rollups()
+        self.assertEqual(_rollups(), expected)
+
+    def test_saves_and_deletes_match_rebuild(self):
+        first = self.diagnose("Antraknosa", 0.8)
+        self.diagnose("Antraknosa", 0.6)
+        self.diagnose("Layu fusarium", 0.9)
+        self.diagnose("", 0.4)
+        self.assertEqual(_rollups()[0][timezone.localdate()], (4, 2.7, 4))
+        self.assert_matches_rebuild()
+
+        headers = {"Authorization": f"Bearer {RefreshToken.for_user(self.user).access_token}"}
+        response = self.client.delete(f"/api/diagnosis/{first}", headers=headers)
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(Diagnosis.objects.filter(id=first).exists())
+        self.assert_matches_rebuild()
+
+    def test_removing_every_diagnosis_cancels_out(self):
+        days = [timezone.now(), timezone.now() - timedelta(days=10)]
+        for created_at in days:
+            record_diagnosis(created_at, "Antraknosa", 0.5)
+            record_diagnosis(created_at, "", 0.25)
+        for created_at in days:
+            record_diagnosis(created_at, "Antraknosa", 0.5, sign=-1)
+            record_diagnosis(created_at, "", 0.25, sign=-1)
+
+        self.assertEqual(_rollups(), ({}, {}))
+        self.assertEqual(DailyDiagnosisRollup.objects.filter(confidence_count__gt=0).count(), 0)
+        self.assert_matches_rebuild()
+
+
+class Counter:
+    def __init__(self):
+        self.calls = 0
+
+    def __call__(self) -> list[dict]:
+        self.calls += 1
+        return [{"label": "Total Diagnosis", "value": self.calls, "delta": None}]
+
+
+@override_settings(DASHBOARD_METRICS_WAIT_TIMEOUT=0.1)
+class DashboardMetricsCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.metrics = DashboardMetricsCache(prefix=f"test:dashboard:{uuid.uuid4().hex}")
+        self.compute = Counter()
+
+    def test_computes_once_then_serves_from_cache(self):
+        first = self.metrics.get(self.compute)
+        self.assertEqual(self.metrics.get(self.compute), first)
+        self.assertEqual(self.compute.calls, 1)
+        self.assertEqual(self.metrics.stats.snapshot(), {"hits": 1, "misses": 1, "hitRatio": 0.5})
+
+    def test_lock_holder_that_never_finishes_does_not_block_forever(self):
+        self.assertIsNotNone(self.metrics._acquire())
+        with self.assertLogs("dashboard.cache", "WARNING"):
+            self.assertEqual(self.metrics.get(self.compute)[0]["value"], 1)
+
+    def test_lock_errors_fall_back_to_computing(self):
+        with (
+            mock.patch.object(self.metrics, "_acquire", side_effect=ConnectionError("cache down")),
+            self.assertLogs("dashboard.cache", "WARNING"),
+        ):
+            self.assertEqual(self.metrics.get(self.compute)[0]["value"], 1)
+
+    def test_errors_while_waiting_fall_back_to_computing(self):
+        self.metrics._acquire()
+        with (
+            mock.patch.object(self.metrics, "_wait_for_entry", side_effect=ConnectionError("cache down")),
+            self.assertLogs("dashboard.cache", "WARNING"),
+        ):
+            self.assertEqual(self.metrics.get(self.compute)[0]["value"], 1)
+
+    def test_store_errors_still_return_the_metrics(self):
+        with (
+            mock.patch.object(self.metrics, "_store", side_effect=ConnectionError("cache down")),
+            self.assertLogs("dashboard.cache", "WARNING"),
+        ):
+            self.assertEqual(self.metrics.get(self.compute)[0]["value"], 1)
+        self.assertIsNotNone(self.metrics._acquire(), "lock harus dilepas")
+
+    def test_endpoint_survives_a_broken_cache(self):
+        user = User.objects.create_user(email="petani@example.com", password="x", username="petani")
+        headers = {"Authorization": f"Bearer {RefreshToken.for_user(user).access_token}"}
+        with (
+            mock.patch.object(dashboard_metrics_cache, "_acquire", side_effect=ConnectionError("cache down")),
+            self.assertLogs("dashboard.cache", "WARNING"),
+        ):
+            response = self.client.get("/api/dashboard/metrics", headers=headers)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()[0]["label"], "Total Diagnosis")
+
+
+class TimeSeriesTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(email="petani@example.com", password="x", username="petani")
+        self.headers = {"Authorization": f"Bearer {RefreshToken.for_user(self.user).access_token}"}
+
+    def diagnose(self, day: date, issue: str, confidence: float, plant: str = "Cabai", user=None) -> None:
+        user = user or self.user
+        created_at = timezone.make_aware(datetime.combine(day, time(12)))
+        scan = ScanSession.objects.create(user=user, image="scans/daun.jpg", plant_name=plant)
+        diagnosis_id = save_diagnosis(user, scan, ["bercak"], _agent_result(issue, confidence))
+        ScanSession.objects.filter(id=scan.id).update(created_at=created_at)
+        Diagnosis.objects.filter(id=diagnosis_id).update(created_at=created_at)
+
+    def series(self, expected_status: int = 200, **params):
+        response = self.client.get("/api/dashboard/timeseries", params, headers=self.headers)
+        self.assertEqual(response.status_code, expected_status)
+        return response.json()
+
+    def test_daily_buckets_are_continuous(self):
+        self.diagnose(date(2026, 3, 2), "Antraknosa", 0.8)
+        self.diagnose(date(2026, 3, 2), "Antraknosa", 0.6)
+        self.diagnose(date(2026, 3, 2), "Layu", 0.4)
+        self.diagnose(date(2026, 3, 4), "Layu", 0.9)
+
+        points = self.series(start="2026-03-01", end="2026-03-04")
+        self.assertEqual([point["bucket"] for point in points], ["2026-03-01", "2026-03-02", "2026-03-03", "2026-03-04"])
+        self.assertEqual(
+            points[1],
+            {"bucket": "2026-03-02", "diagnoses": 3, "scans": 3, "avgConfidence": 0.6, "topIssue": "Antraknosa", "topIssueCount": 2},
+        )
+        self.assertEqual((points[0]["diagnoses"], points[0]["avgConfidence"], points[0]["topIssue"]), (0, None, None))
+        self.assertEqual((points[3]["diagnoses"], points[3]["topIssue"]), (1, "Layu"))
+
+    def test_week_and_month_buckets_with_a_plant_filter(self):
+        self.diagnose(date(2026, 3, 1), "Antraknosa", 0.8)  # Minggu, masuk pekan 23 Februari
+        self.diagnose(date(2026, 3, 2), "Layu", 0.6)
+        self.diagnose(date(2026, 3, 3), "Busuk buah", 0.6, plant="Tomat")
+
+        weeks = self.series(start="2026-02-25", end="2026-03-08", bucket="week")
+        self.assertEqual([(point["bucket"], point["diagnoses"]) for point in weeks], [("2026-02-23", 1), ("2026-03-02", 2)])
+        months = self.series(start="2026-02-01", end="2026-03-31", bucket="month", plant="tomat")
+        self.assertEqual(
+            [(point["bucket"], point["diagnoses"], point["scans"], point["topIssue"]) for point in months],
+            [("2026-02-01", 0, 0, None), ("2026-03-01", 1, 1, "Busuk buah")],
+        )
+
+    def test_results_are_cached_until_the_user_diagnoses_again(self):
+        self.diagnose(date(2026, 3, 2), "Antraknosa", 0.8)
+        self.assertEqual(self.series(start="2026-03-02", end="2026-03-02")[0]["diagnoses"], 1)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.diagnose(date(2026, 3, 2), "Layu", 0.6)
+        self.assertEqual(self.series(start="2026-03-02", end="2026-03-02")[0]["diagnoses"], 2)
+        self.assertEqual(user_series_cache.stats.snapshot()["misses"], 2)
+        self.series(start="2026-03-02", end="2026-03-02")
+        self.assertEqual(user_series_cache.stats.snapshot()["hits"], 1)
+
+    def test_other_users_are_admin_only(self):
+        other = User.objects.create_user(email="tetangga@example.com", password="x", username="tetangga")
+        self.diagnose(date(2026, 3, 2), "Antraknosa", 0.8, user=other)
+        params = {"start": "2026-03-02", "end": "2026-03-02", "user_id": other.id}
+        self.series(403, **params)
+        self.assertEqual(self.series(start="2026-03-02", end="2026-03-02")[0]["diagnoses"], 0)
+
+        self.user.is_staff = True
+        self.user.save()
+        self.assertEqual(self.series(**params)[0]["diagnoses"], 1)
+
+    def test_invalid_ranges_are_rejected(self):
+        self.series(400, start="2026-03-02", end="2026-03-01")
+        self.series(400, start="2020-01-01", end="2026-03-01")
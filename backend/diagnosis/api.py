@@ -1,18 +1,37 @@
-import asyncio
+import json
+import logging
+from datetime import date
+from typing import Optional
 
 from asgiref.sync import sync_to_async
 from django.db import transaction
+from django.http import StreamingHttpResponse
 from ninja import Schema
 from ninja_extra import ControllerBase, api_controller, route, status
-from ninja_extra.exceptions import NotFound, APIException
-from ninja_extra.permissions import IsAuthenticated
+from ninja_extra.exceptions import NotFound, APIException, ParseError, Throttled
+from ninja_extra.permissions import IsAdminUser, IsAuthenticated
 from ninja_jwt.authentication import AsyncJWTAuth
 
-from services.ai_agent import AgentResponse, generate_diagnosis
+from dashboard.cache import user_series_cache
+from dashboard.services import record_diagnosis
+from services.agents import AgentProviderError
+from services.ai_agent import AgentResponse, generate_diagnosis, stream_diagnosis
+from services.cache_stats import CacheStatsOut
+from services.llm_scheduler import LLMQueueFull, llm_scheduler
+from services.pagination import DEFAULT_PAGE_SIZE, clamp_limit, keyset_page
 from vision.models import ScanSession
 
+from .cache import diagnosis_cache_key, diagnosis_result_cache, scan_fingerprint
 from .models import Diagnosis
-from .schemas import DiagnosisHistorySchema, DiagnosisSchema
+from .schemas import DiagnosisHistoryPageSchema, DiagnosisHistorySchema, DiagnosisSchema
+from .services import history_queryset, save_diagnosis, serialize_recommendations, serialize_sources
+
+logger = logging.getLogger(__name__)
+
+
+class AgentUnavailable(APIException):
+    status_code = status.HTTP_502_BAD_GATEWAY
+    default_detail = "Agen AI tidak mengembalikan diagnosis."
 
 
 class ChecklistPayload(Schema):
@@ -29,6 +48,35 @@ class MessageOut(Schema):
     message: str 
     status: int 
 
+
+def _agent_kwargs(scan: ScanSession, payload: ChecklistPayload) -> dict:
+    return {
+        "confirmed_symptoms": payload.confirmedSymptoms,
+        "denied_symptoms": payload.deniedSymptoms,
+        "plant_name": scan.plant_name or None,
+        "vision_confidence": scan.analysis_confidence,
+        "user_notes": scan.notes or None,
+        "country": scan.country or "Indonesia",
+        "regulation_hint": "Ikuti regulasi Kementan setempat.",
+        "image_url": scan.model_input_path,
+    }
+
+
+def _cache_key(scan: ScanSession, agent_kwargs: dict) -> str:
+    return diagnosis_cache_key(
+        confirmed_symptoms=agent_kwargs["confirmed_symptoms"],
+        denied_symptoms=agent_kwargs["denied_symptoms"],
+        plant_name=agent_kwargs["plant_name"],
+        country=agent_kwargs["country"],
+        regulation_hint=agent_kwargs["regulation_hint"],
+        image_fingerprint=scan_fingerprint(scan),
+    )
+
+
+def _sse(event: str, data) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
 @api_controller("/diagnosis", auth=AsyncJWTAuth(), permissions=[IsAuthenticated], tags=["Diagnosis"])
 class DiagnosisController(ControllerBase):
     @route.post("/checklist", response=DiagnosisCreateOut)
@@ -44,53 +92,126 @@ class DiagnosisController(ControllerBase):
             return NotFound(str(exc))
 
 
+        agent_kwargs = _agent_kwargs(scan, payload)
+        cache_key = _cache_key(scan, agent_kwargs)
+        agent_result: AgentResponse | None = await sync_to_async(diagnosis_result_cache.get)(cache_key)
+
+        if agent_result is None:
+            try:
+                agent_result = await llm_scheduler.run(
+                    generate_diagnosis,
+                    user_id=user.id,
+                    **agent_kwargs,
+                )
+            except LLMQueueFull as exc:
+                raise Throttled(wait=exc.retry_after, detail="Agen AI sedang sibuk.")
+            except ValueError as exc:
+                raise AgentUnavailable(f"Agen AI gagal memproses: {exc}")
+            except AgentProviderError as exc:
+                logger.warning("Diagnosis provider failed for scan %s: %s", scan.id, exc)
+                raise AgentUnavailable("Layanan model AI tidak dapat dihubungi. Coba lagi.")
+            except Exception as exc:
+                # Error jaringan/SDK di luar keluarga provider tetap dijawab 502, bukan 500
+                logger.exception("Diagnosis agent failed for scan %s", scan.id)
+                raise AgentUnavailable("Agen AI gagal memproses. Coba lagi.") from exc
+            if agent_result is None:
+                raise AgentUnavailable()
+            await sync_to_async(diagnosis_result_cache.set)(cache_key, agent_result)
+
+        diagnosis_id = await sync_to_async(save_diagnosis, thread_sensitive=True)(
+            user, scan, payload.confirmedSymptoms, agent_result
+        )
+        return DiagnosisCreateOut(diagnosisId=diagnosis_id)
+
+    @route.post("/checklist/stream")
+    async def stream_checklist(self, payload: ChecklistPayload):
+        """Sama seperti ``/checklist`` tetapi hasilnya dialirkan sebagai Server-Sent Events.
+
+        Urutan event: ``status`` -> ``progress``* -> ``diagnosis`` -> ``recommendations``
+        -> ``sources`` -> ``done`` (berisi ``diagnosisId``), atau ``error``.
+
+        Agen memakai output terstruktur (``AgentResponse``) yang baru bisa divalidasi
+        setelah run selesai, jadi selama agen bekerja hanya ``progress`` (awal run dan
+        setiap pemanggilan tool) yang dialirkan; ``diagnosis``, ``recommendations`` dan
+        ``sources`` dikirim berurutan setelahnya, sebelum hasil disimpan.
+        """
+        user = self.context.request.user
+
         try:
-            agent_result: AgentResponse = await asyncio.to_thread(
-                generate_diagnosis,
-                confirmed_symptoms=payload.confirmedSymptoms,
-                denied_symptoms=payload.deniedSymptoms,
-                plant_name=scan.plant_name or None,
-                vision_confidence=scan.analysis_confidence,
-                user_notes=scan.notes or None,
-                country="Indonesia",
-                regulation_hint="Ikuti regulasi Kementan setempat.",
-                image_url=scan.image.path if scan.image else None,
+            scan = await sync_to_async(ScanSession.objects.get)(
+                id=payload.scanId,
+                user=user,
             )
-        except ValueError as exc:
-            return APIException(code=status.HTTP_400_BAD_REQUEST, detail=f"Agen AI gagal memproses: {exc}")
+        except ScanSession.DoesNotExist as exc:
+            raise NotFound(str(exc))
 
-        def _persist() -> int:
-            with transaction.atomic():
-                scan.checklist = payload.confirmedSymptoms
-                scan.save(update_fields=["checklist"])
-
-                diagnosis = Diagnosis.objects.create(
-                    user=user,
-                    scan=scan,
-                    issue=agent_result.diagnosis.issue,
-                    summary=agent_result.diagnosis.summary,
-                    plant_part=agent_result.diagnosis.plant_part or "",
-                    confidence=agent_result.diagnosis.confidence,
-                    consensus_score=agent_result.consensus_score,
-                    checklist=[item.model_dump(by_alias=True) for item in agent_result.checklist],
-                    recommendations=[
-                        {
-                            "type": rec.type,
-                            "title": rec.title,
-                            "description": rec.instructions,
-                            "caution": rec.caution,
-                            "references": rec.references,
-                        }
-                        for rec in agent_result.recommendations
-                    ],
-                    sources=[source.model_dump(by_alias=True) for source in agent_result.sources],
-                    additional_requests=[req.model_dump() for req in agent_result.additional_requests],
-                    follow_up_questions=agent_result.follow_up_questions,
+        agent_kwargs = _agent_kwargs(scan, payload)
+        cache_key = _cache_key(scan, agent_kwargs)
+
+        async def _events():
+            yield _sse("status", {"stage": "started", "scanId": scan.id})
+
+            agent_result: AgentResponse | None = await sync_to_async(diagnosis_result_cache.get)(cache_key)
+            if agent_result is None:
+                try:
+                    async for kind, data in llm_scheduler.stream(stream_diagnosis, user_id=user.id, **agent_kwargs):
+                        if kind == "progress":
+                            yield _sse("progress", data)
+                        else:
+                            agent_result = data
+                except LLMQueueFull as exc:
+                    yield _sse("error", {"detail": "Agen AI sedang sibuk.", "retryAfter": exc.retry_after})
+                    return
+                except ValueError as exc:
+                    yield _sse("error", {"detail": f"Agen AI gagal memproses: {exc}"})
+                    return
+                except AgentProviderError as exc:
+                    logger.warning("Diagnosis provider failed for scan %s: %s", scan.id, exc)
+                    yield _sse("error", {"detail": "Layanan model AI tidak dapat dihubungi. Coba lagi."})
+                    return
+                except Exception:
+                    logger.exception("Streaming diagnosis failed for scan %s", scan.id)
+                    yield _sse("error", {"detail": "Agen AI gagal memproses."})
+                    return
+                await sync_to_async(diagnosis_result_cache.set)(cache_key, agent_result)
+            else:
+                yield _sse("status", {"stage": "cached"})
+
+            yield _sse("diagnosis", {
+                "issue": agent_result.diagnosis.issue,
+                "summary": agent_result.diagnosis.summary,
+                "plantPart": agent_result.diagnosis.plant_part,
+                "confidence": agent_result.diagnosis.confidence,
+                "consensusScore": agent_result.consensus_score,
+                "checklist": [item.model_dump(by_alias=True) for item in agent_result.checklist],
+            })
+            yield _sse("recommendations", serialize_recommendations(agent_result))
+            yield _sse("sources", serialize_sources(agent_result))
+
+            try:
+                diagnosis_id = await sync_to_async(save_diagnosis, thread_sensitive=True)(
+                    user, scan, payload.confirmedSymptoms, agent_result
                 )
-                return diagnosis.id
+            except Exception:
+                logger.exception("Saving streamed diagnosis failed for scan %s", scan.id)
+                yield _sse("error", {"detail": "Diagnosis gagal disimpan."})
+                return
+            yield _sse("done", {"diagnosisId": diagnosis_id})
 
-        diagnosis_id = await sync_to_async(_persist, thread_sensitive=True)()
-        return DiagnosisCreateOut(diagnosisId=diagnosis_id)
+        response = StreamingHttpResponse(_events(), content_type="text/event-stream")
+        response["Cache-Control"] = "no-cache"
+        response["X-Accel-Buffering"] = "no"
+        return response
+
+    @route.get("/cache/stats", response=CacheStatsOut, permissions=[IsAdminUser])
+    async def cache_stats(self):
+        stats = await sync_to_async(diagnosis_result_cache.stats.snapshot)()
+        return CacheStatsOut(**stats)
+
+    @route.post("/cache/invalidate", response=MessageOut, permissions=[IsAdminUser])
+    async def invalidate_cache(self):
+        await sync_to_async(diagnosis_result_cache.invalidate_all)()
+        return MessageOut(message="Cache diagnosis dikosongkan.", status=status.HTTP_200_OK)
 
     @route.get("/{diagnosis_id}", response=DiagnosisSchema)
     async def get_diagnosis(self, diagnosis_id: int):
@@ -115,17 +236,29 @@ class DiagnosisController(ControllerBase):
             createdAt=diagnosis.created_at.isoformat(),
         )
 
-    @route.get("/", response=list[DiagnosisHistorySchema])
-    async def list_diagnoses(self):
+    @route.get("/", response=DiagnosisHistoryPageSchema)
+    async def list_diagnoses(
+        self,
+        limit: int = DEFAULT_PAGE_SIZE,
+        cursor: Optional[str] = None,
+        issue: Optional[str] = None,
+        plant: Optional[str] = None,
+        start: Optional[date] = None,
+        end: Optional[date] = None,
+    ):
         user = self.context.request.user
-        diagnoses = await sync_to_async(
-            lambda: list(
-                Diagnosis.objects.filter(user=user)
-                .select_related("scan")
-                .order_by("-created_at")
-            )
-        )()
-        return [
+        if start and end and start > end:
+            raise ParseError("Tanggal mulai harus sebelum tanggal akhir.")
+
+        def _fetch():
+            queryset = history_queryset(user, (issue or "").strip(), (plant or "").strip(), start, end)
+            return keyset_page(queryset, clamp_limit(limit), cursor)
+
+        try:
+            diagnoses, next_cursor = await sync_to_async(_fetch, thread_sensitive=True)()
+        except ValueError:
+            raise ParseError("Cursor tidak valid.")
+        items = [
             DiagnosisHistorySchema(
                 id=item.id,
                 plantName=item.scan.plant_name or None,
@@ -135,6 +268,7 @@ class DiagnosisController(ControllerBase):
             )
             for item in diagnoses
         ]
+        return DiagnosisHistoryPageSchema(items=items, nextCursor=next_cursor)
 
     @route.delete("/{diagnosis_id}", response=MessageOut)
     async def delete_diagnosis(self, diagnosis_id: int):
@@ -154,8 +288,13 @@ class DiagnosisController(ControllerBase):
                 if os.path.exists(image_path):
                     os.remove(image_path)
 
-            scan.delete()
-            diagnosis.delete()
+            with transaction.atomic():
+                removed = list(Diagnosis.objects.filter(scan=scan).values_list("created_at", "issue", "confidence"))
+                scan.delete()
+                diagnosis.delete()
+                for created_at, issue, confidence in removed:
+                    record_diagnosis(created_at, issue, confidence, sign=-1)
+                transaction.on_commit(lambda: user_series_cache.invalidate(user.id))
 
         try:
             await sync_to_async(_delete, thread_sensitive=True)()
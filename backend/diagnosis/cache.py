@@ -0,0 +1,118 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+from typing import Sequence
+
+from django.conf import settings
+from django.core.cache import caches
+from pydantic import ValidationError
+
+from services.ai_agent import AgentResponse
+from services.cache_stats import CacheStats
+
+logger = logging.getLogger(__name__)
+
+
+def _normalize(value: str | None) -> str:
+    return " ".join((value or "").split()).casefold()
+
+
+def _normalize_symptoms(symptoms: Sequence[str]) -> list[str]:
+    return sorted({normalized for symptom in symptoms if (normalized := _normalize(symptom))})
+
+
+def diagnosis_cache_key(
+    confirmed_symptoms: Sequence[str],
+    denied_symptoms: Sequence[str],
+    plant_name: str | None,
+    country: str,
+    regulation_hint: str,
+    image_fingerprint: str,
+) -> str:
+    """Canonical digest of the inputs that determine a diagnosis; order, case and spacing are ignored."""
+    canonical = json.dumps(
+        {
+            "confirmed": _normalize_symptoms(confirmed_symptoms),
+            "denied": _normalize_symptoms(denied_symptoms),
+            "plant": _normalize(plant_name),
+            "country": _normalize(country),
+            "regulation": _normalize(regulation_hint),
+            "image": image_fingerprint,
+        },
+        sort_keys=True,
+        ensure_ascii=False,
+    )
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def scan_fingerprint(scan) -> str:
+    """Perceptual hash of the scan photo, so re-uploads of the same photo share cache entries."""
+    if scan.image_hash:
+        return scan.image_hash
+    return f"scan:{scan.id}" if scan.image else ""
+
+
+class DiagnosisResultCache:
+    def __init__(self, alias: str = "default", prefix: str = "diagnosis:result", timeout: int | None = None) -> None:
+        self.alias = alias
+        self.prefix = prefix
+        self._timeout = timeout
+        self.stats = CacheStats(prefix, alias=alias)
+
+    @property
+    def cache(self):
+        return caches[self.alias]
+
+    @property
+    def timeout(self) -> int:
+        return self._timeout if self._timeout is not None else settings.DIAGNOSIS_CACHE_TTL
+
+    def _version_key(self) -> str:
+        return f"{self.prefix}:version"
+
+    def _version(self) -> int:
+        return self.cache.get_or_set(self._version_key(), 1, timeout=None)
+
+    def _key(self, digest: str) -> str:
+        return f"{self.prefix}:v{self._version()}:{digest}"
+
+    def get(self, digest: str) -> AgentResponse | None:
+        try:
+            payload = self.cache.get(self._key(digest))
+        except Exception as exc:
+            logger.warning("Diagnosis cache lookup failed: %s", exc)
+            payload = None
+
+        if payload is not None:
+            try:
+                response = AgentResponse.model_validate(payload)
+            except ValidationError as exc:
+                logger.warning("Discarding cached diagnosis %s: %s", digest, exc)
+            else:
+                self.stats.hit()
+                return response
+        self.stats.miss()
+        return None
+
+    def set(self, digest: str, response: AgentResponse) -> None:
+        try:
+            self.cache.set(
+                self._key(digest),
+                response.model_dump(mode="json", by_alias=True),
+                timeout=self.timeout,
+            )
+        except Exception as exc:
+            logger.warning("Diagnosis cache store failed: %s", exc)
+
+    def invalidate(self, digest: str) -> None:
+        self.cache.delete(self._key(digest))
+
+    def invalidate_all(self) -> int:
+        """Drop every cached diagnosis at once by moving to a new key version."""
+        self._version()
+        return self.cache.incr(self._version_key())
+
+
+diagnosis_result_cache = DiagnosisResultCache()
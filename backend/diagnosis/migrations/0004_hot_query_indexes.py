@@ -0,0 +1,24 @@
+# Generated by Django 5.2.7 on 2026-10-18 01:33
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('diagnosis', '0003_user_created_idx'),
+        ('vision', '0007_user_created_idx'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='diagnosis',
+            name='diagnosis_user_created_idx',
+        ),
+        migrations.AddIndex(
+            model_name='diagnosis',
+            index=models.Index(fields=['user', '-created_at', '-id'], name='diagnosis_user_recent_idx'),
+        ),
+    ]
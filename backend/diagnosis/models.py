@@ -17,5 +17,10 @@ class Diagnosis(models.Model):
     consensus_score = models.FloatField(null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=["user", "-created_at", "-id"], name="diagnosis_user_recent_idx"),
+        ]
+
     def __str__(self):
         return f"{self.user} - {self.issue}"
\ No newline at end of file
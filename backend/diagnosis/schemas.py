@@ -33,6 +33,11 @@ class DiagnosisHistorySchema(Schema):
     createdAt: str
 
 
+class DiagnosisHistoryPageSchema(Schema):
+    items: list[DiagnosisHistorySchema]
+    nextCursor: str | None = None
+
+
 class DiagnosisSchema(Schema):
     id: int
     plantName: str | None
@@ -0,0 +1,85 @@
+from datetime import date, datetime, time, timedelta
+from typing import Sequence
+
+from django.db import transaction
+from django.db.models import QuerySet
+from django.utils import timezone
+
+from dashboard.cache import user_series_cache
+from dashboard.services import record_diagnosis
+from services.ai_agent import AgentResponse
+from services.evidence_index import evidence_index
+from vision.models import ScanSession
+
+from .models import Diagnosis
+
+
+def serialize_recommendations(agent_result: AgentResponse) -> list[dict]:
+    return [
+        {
+            "type": rec.type,
+            "title": rec.title,
+            "description": rec.instructions,
+            "caution": rec.caution,
+            "references": rec.references,
+        }
+        for rec in agent_result.recommendations
+    ]
+
+
+def serialize_sources(agent_result: AgentResponse) -> list[dict]:
+    return [source.model_dump(by_alias=True) for source in agent_result.sources]
+
+
+def save_diagnosis(user, scan: ScanSession, confirmed_symptoms: Sequence[str], agent_result: AgentResponse) -> int:
+    with transaction.atomic():
+        scan.checklist = list(confirmed_symptoms)
+        scan.save(update_fields=["checklist"])
+
+        diagnosis = Diagnosis.objects.create(
+            user=user,
+            scan=scan,
+            issue=agent_result.diagnosis.issue,
+            summary=agent_result.diagnosis.summary,
+            plant_part=agent_result.diagnosis.plant_part or "",
+            confidence=agent_result.diagnosis.confidence,
+            consensus_score=agent_result.consensus_score,
+            checklist=[item.model_dump(by_alias=True) for item in agent_result.checklist],
+            recommendations=serialize_recommendations(agent_result),
+            sources=serialize_sources(agent_result),
+            additional_requests=[req.model_dump() for req in agent_result.additional_requests],
+            follow_up_questions=agent_result.follow_up_questions,
+        )
+        record_diagnosis(diagnosis.created_at, diagnosis.issue, diagnosis.confidence)
+        transaction.on_commit(lambda: evidence_index.add_sources(diagnosis.sources))
+        transaction.on_commit(lambda: user_series_cache.invalidate(user.id))
+        return diagnosis.id
+
+
+def history_queryset(
+    user,
+    issue: str | None = None,
+    plant: str | None = None,
+    start: date | None = None,
+    end: date | None = None,
+) -> QuerySet:
+    """The user's diagnoses reduced to the columns of ``DiagnosisHistorySchema``.
+
+    The JSON blobs (checklist, recommendations, sources, ...) are deferred, so a
+    history page only transfers a few small columns per row.
+    """
+    queryset = (
+        Diagnosis.objects.filter(user=user)
+        .select_related("scan")
+        .only("id", "issue", "confidence", "created_at", "scan__plant_name")
+    )
+    if issue:
+        queryset = queryset.filter(issue__iexact=issue)
+    if plant:
+        queryset = queryset.filter(scan__plant_name__iexact=plant)
+    tz = timezone.get_current_timezone()
+    if start:
+        queryset = queryset.filter(created_at__gte=timezone.make_aware(datetime.combine(start, time.min), tz))
+    if end:
+        queryset = queryset.filter(created_at__lt=timezone.make_aware(datetime.combine(end + timedelta(days=1), time.min), tz))
+    return queryset
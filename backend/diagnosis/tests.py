@@ -1,3 +1,242 @@
-from django.test import TestCase
+import json
+import shutil
+import tempfile
+from datetime import date, datetime, time
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.db import connection
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from ninja_jwt.tokens import RefreshToken
+
+from services.agents import reset_agents
+from vision.models import ScanSession
+
+from .cache import diagnosis_cache_key, diagnosis_result_cache
+from .models import Diagnosis
+
+User = get_user_model()
+
+STUB_PROVIDER = {
+    "LLM_PROVIDER": "stub",
+    "LLM_STUB_LATENCY_DISTRIBUTION": "fixed",
+    "LLM_STUB_LATENCY_MS": 0,
+    "LLM_STUB_ERROR_RATE": 0.0,
+}
+
+
+def _auth(user) -> dict:
+    return {"headers": {"Authorization": f"Bearer {RefreshToken.for_user(user).access_token}"}}
+
+
+def _key(confirmed, denied=(), plant="Cabai", country="Indonesia", image="f0e1d2c3b4a59687") -> str:
+    return diagnosis_cache_key(confirmed, denied, plant, country, "Cek regulasi lokal.", image)
+
+
+class DiagnosisCacheKeyTests(SimpleTestCase):
+    def test_order_case_spacing_and_duplicates_are_ignored(self):
+        self.assertEqual(
+            _key(["Daun menguning", "bercak  cokelat"], ["akar busuk"], plant=" cabai ", country="INDONESIA"),
+            _key(["bercak cokelat", "daun menguning", "DAUN MENGUNING"], ["Akar busuk"]),
+        )
+
+    def test_every_input_is_part_of_the_key(self):
+        base = _key(["daun menguning"])
+        variants = {
+            "confirmed": _key(["daun menguning", "layu"]),
+            "denied": _key(["daun menguning"], ["daun menguning"]),
+            "plant": _key(["daun menguning"], plant="Tomat"),
+            "country": _key(["daun menguning"], country="Malaysia"),
+            "image": _key(["daun menguning"], image="0000000000000000"),
+        }
+        for name, key in variants.items():
+            with self.subTest(input=name):
+                self.assertNotEqual(key, base)
+
+
+class DiagnosisTestCase(TestCase):
+    def setUp(self):
+        media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media, ignore_errors=True)
+        self.enterContext(override_settings(MEDIA_ROOT=media, **STUB_PROVIDER))
+        reset_agents()
+        self.addCleanup(reset_agents)
+        cache.clear()
+        self.user = User.objects.create_user(email="petani@example.com", password="x", username="petani")
+        self.scan = self.create_scan(self.user)
+
+    def create_scan(self, user, **fields) -> ScanSession:
+        scan = ScanSession(user=user, status=ScanSession.STATUS_COMPLETED, plant_name="Cabai", **fields)
+        scan.image.save("daun.jpg", ContentFile(b"jpeg"), save=False)
+        scan.save()
+        return scan
+
+    def submit(self, confirmed: list[str], denied: list[str] | None = None, scan: ScanSession | None = None):
+        return self.client.post(
+            "/api/diagnosis/checklist",
+            data={"scanId": (scan or self.scan).id, "confirmedSymptoms": confirmed, "deniedSymptoms": denied or []},
+            content_type="application/json",
+            **_auth(self.user),
+        )
+
+
+class ChecklistTests(DiagnosisTestCase):
+    def test_checklist_creates_a_diagnosis(self):
+        response = self.submit(["daun menguning"])
+        self.assertEqual(response.status_code, 200)
+        diagnosis = Diagnosis.objects.get(id=response.json()["diagnosisId"])
+        self.assertEqual(diagnosis.user, self.user)
+
+    @override_settings(LLM_STUB_ERROR_RATE=1.0)
+    def test_provider_failure_is_a_bad_gateway(self):
+        reset_agents()
+        with self.assertLogs("diagnosis.api", "WARNING"):
+            response = self.submit(["daun menguning"])
+        self.assertEqual(response.status_code, 502)
+        self.assertFalse(Diagnosis.objects.exists())
+
+    def test_equivalent_checklists_reuse_the_cached_result(self):
+        first = self.submit(["Daun menguning", "bercak cokelat"], ["akar busuk"])
+        with mock.patch("diagnosis.api.generate_diagnosis") as generate:
+            second = self.submit(["bercak  cokelat", "daun menguning"], ["Akar busuk"])
+        generate.assert_not_called()
+        self.assertEqual(second.status_code, 200)
+        self.assertNotEqual(second.json()["diagnosisId"], first.json()["diagnosisId"])
+        self.assertEqual(diagnosis_result_cache.stats.snapshot(), {"hits": 1, "misses": 1, "hitRatio": 0.5})
+
+        # Sidik jari foto ikut kunci: foto lain dengan checklist yang sama tidak memakai hasil tadi
+        self.scan.image_hash = "f0e1d2c3b4a59687"
+        self.scan.save(update_fields=["image_hash"])
+        self.submit(["daun menguning", "bercak cokelat"], ["akar busuk"])
+        self.assertEqual(diagnosis_result_cache.stats.snapshot()["misses"], 2)
+
+    def test_unexpected_errors_are_a_bad_gateway(self):
+        with (
+            mock.patch("diagnosis.api.generate_diagnosis", side_effect=ConnectionResetError("reset by peer")),
+            self.assertLogs("diagnosis.api", "ERROR"),
+        ):
+            response = self.submit(["daun menguning"])
+        self.assertEqual(response.status_code, 502)
+        self.assertFalse(Diagnosis.objects.exists())
+
+
+def _events(body: bytes) -> list[tuple[str, object]]:
+    events = []
+    for block in body.decode("utf-8").strip().split("\n\n"):
+        fields = dict(line.split(": ", 1) for line in block.splitlines())
+        events.append((fields["event"], json.loads(fields["data"])))
+    return events
+
+
+class ChecklistStreamTests(DiagnosisTestCase):
+    async def stream(self, confirmed: list[str], scan_id: int | None = None) -> list[tuple[str, object]]:
+        response = await self.async_client.post(
+            "/api/diagnosis/checklist/stream",
+            data={"scanId": scan_id or self.scan.id, "confirmedSymptoms": confirmed, "deniedSymptoms": []},
+            content_type="application/json",
+            **_auth(self.user),
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Content-Type"], "text/event-stream")
+        return _events(b"".join([chunk async for chunk in response.streaming_content]))
+
+    async def test_events_arrive_in_order_and_end_with_the_saved_id(self):
+        events = await self.stream(["daun menguning"])
+        names = [name for name, _ in events]
+        self.assertEqual(names[0], "status")
+        self.assertIn("progress", names)
+        self.assertEqual(names[-4:], ["diagnosis", "recommendations", "sources", "done"])
+        self.assertEqual(set(names[1:-4]), {"progress"})
+
+        payloads = dict(events)
+        diagnosis = await Diagnosis.objects.aget(id=payloads["done"]["diagnosisId"])
+        self.assertEqual(diagnosis.issue, payloads["diagnosis"]["issue"])
+        self.assertEqual(len(payloads["sources"]), len(diagnosis.sources))
+
+        events = await self.stream(["daun menguning"])
+        self.assertEqual([name for name, _ in events][:2], ["status", "status"])
+        self.assertEqual(events[1][1], {"stage": "cached"})
+        self.assertNotIn("progress", [name for name, _ in events])
+
+    @override_settings(LLM_STUB_ERROR_RATE=1.0)
+    async def test_provider_failure_ends_with_an_error_event(self):
+        reset_agents()
+        with self.assertLogs("diagnosis.api", "WARNING"):
+            events = await self.stream(["daun menguning"])
+        self.assertEqual(events[-1][0], "error")
+        self.assertNotIn("diagnosis", [name for name, _ in events])
+        self.assertFalse(await Diagnosis.objects.aexists())
+
+
+class HistoryTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(email="petani@example.com", password="x", username="petani")
+        other = User.objects.create_user(email="tetangga@example.com", password="x", username="tetangga")
+        rows = [
+            (date(2026, 3, 1), "Antraknosa", "Cabai"),
+            (date(2026, 3, 2), "Layu fusarium", "Tomat"),
+            (date(2026, 3, 2), "antraknosa", "cabai"),
+            (date(2026, 3, 5), "Blas", "Padi"),
+            (date(2026, 3, 9), "Antraknosa", "Cabai"),
+        ]
+        for day, issue, plant in rows:
+            cls.diagnose(cls.user, day, issue, plant)
+        cls.diagnose(other, date(2026, 3, 2), "Antraknosa", "Cabai")
+
+    @staticmethod
+    def diagnose(user, day: date, issue: str, plant: str) -> None:
+        scan = ScanSession.objects.create(user=user, image="scans/daun.jpg", plant_name=plant)
+        diagnosis = Diagnosis.objects.create(
+            user=user,
+            scan=scan,
+            issue=issue,
+            confidence=0.8,
+            recommendations=[{"title": "Sanitasi", "description": "x" * 2000}],
+        )
+        Diagnosis.objects.filter(id=diagnosis.id).update(created_at=timezone.make_aware(datetime.combine(day, time(12))))
+
+    def history(self, expected_status: int = 200, **params):
+        response = self.client.get("/api/diagnosis/", params, **_auth(self.user))
+        self.assertEqual(response.status_code, expected_status)
+        return response.json()
+
+    def test_pages_walk_the_history_newest_first(self):
+        expected = list(
+            Diagnosis.objects.filter(user=self.user).order_by("-created_at", "-id").values_list("id", flat=True)
+        )
+        for limit in (1, 2, 5):
+            with self.subTest(limit=limit):
+                ids, cursor = [], None
+                while True:
+                    body = self.history(limit=limit, **({"cursor": cursor} if cursor else {}))
+                    ids += [item["id"] for item in body["items"]]
+                    cursor = body["nextCursor"]
+                    if cursor is None:
+                        break
+                self.assertEqual(ids, expected)
+
+    def test_filters(self):
+        def issues(**params) -> list[str]:
+            return [item["issue"] for item in self.history(**params)["items"]]
+
+        self.assertEqual(issues(issue="ANTRAKNOSA"), ["Antraknosa", "antraknosa", "Antraknosa"])
+        self.assertEqual(issues(plant=" cabai "), ["Antraknosa", "antraknosa", "Antraknosa"])
+        self.assertEqual(issues(start="2026-03-02", end="2026-03-05"), ["Blas", "antraknosa", "Layu fusarium"])
+        self.assertEqual(issues(issue="antraknosa", start="2026-03-02", end="2026-03-02"), ["antraknosa"])
+        self.assertEqual(self.history(plant="Padi")["items"][0]["plantName"], "Padi")
+
+    def test_bad_requests(self):
+        self.history(400, start="2026-03-05", end="2026-03-01")
+        self.history(400, cursor="bukan-cursor")
+
+    def test_page_skips_the_json_columns(self):
+        with CaptureQueriesContext(connection) as queries:
+            self.history(limit=2)
+        [listing] = [query["sql"] for query in queries.captured_queries if "diagnosis_diagnosis" in query["sql"]]
+        for column in ("recommendations", "sources", "checklist", "follow_up_questions", "summary"):
+            self.assertNotIn(f'"{column}"', listing)
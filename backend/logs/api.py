@@ -10,6 +10,7 @@ from ninja_jwt.authentication import AsyncJWTAuth
 
 from .models import LogEntry, Reminder
 from .schemas import LogEntrySchema, ReminderSchema
+from .services import log_entries_queryset, reminders_queryset
 
 
 class LogEntryCreate(Schema):
@@ -52,7 +53,7 @@ class LogbookController(ControllerBase):
     async def list_logs(self):
         user = self.context.request.user
         entries = await sync_to_async(
-            lambda: list(LogEntry.objects.filter(user=user).order_by("-performed_at"))
+            lambda: list(log_entries_queryset(user))
         )()
         return [
             LogEntrySchema(
@@ -122,7 +123,7 @@ class ReminderController(ControllerBase):
     async def list_reminders(self):
         user = self.context.request.user
         reminders = await sync_to_async(
-            lambda: list(Reminder.objects.filter(user=user).order_by("-scheduled_at"))
+            lambda: list(reminders_queryset(user))
         )()
         return [
             ReminderSchema(
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.7 on 2026-10-18 01:33
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('logs', '0002_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='logentry',
+            index=models.Index(fields=['user', '-performed_at'], name='log_user_performed_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='reminder',
+            index=models.Index(fields=['user', '-scheduled_at'], name='reminder_user_scheduled_idx'),
+        ),
+    ]
@@ -18,6 +18,11 @@ class LogEntry(models.Model):
     category = models.CharField(max_length=20, choices=CATEGORY_CHOICES, default="observation")
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=["user", "-performed_at"], name="log_user_performed_idx"),
+        ]
+
 
 class Reminder(models.Model):
     FREQUENCY_CHOICES = [
@@ -30,4 +35,9 @@ class Reminder(models.Model):
     scheduled_at = models.DateTimeField()
     description = models.TextField(blank=True)
     frequency = models.CharField(max_length=20, choices=FREQUENCY_CHOICES, default="once")
-    created_at = models.DateTimeField(auto_now_add=True)
\ No newline at end of file
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["user", "-scheduled_at"], name="reminder_user_scheduled_idx"),
+        ]
@@ -0,0 +1,11 @@
+from django.db.models import QuerySet
+
+from .models import LogEntry, Reminder
+
+
+def log_entries_queryset(user) -> QuerySet:
+    return LogEntry.objects.filter(user=user).order_by("-performed_at")
+
+
+def reminders_queryset(user) -> QuerySet:
+    return Reminder.objects.filter(user=user).order_by("-scheduled_at")
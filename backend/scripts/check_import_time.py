@@ -0,0 +1,89 @@
+"""Report import-time hot spots of the Django app and fail when the cold-start budget is exceeded.
+
+Usage (from ``backend/``)::
+
+    python scripts/check_import_time.py --budget-ms 1500 --top 20
+
+The target (``django.setup()`` + ``config.urls``) is imported in a fresh
+interpreter under ``python -X importtime``. The check fails when the total
+cumulative time exceeds ``--budget-ms`` or when a module that should only be
+loaded lazily (the agent SDKs) shows up at import time.
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import re
+import subprocess
+import sys
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+TARGET = "import django; django.setup(); import config.urls"
+# Dimuat lewat services.agents.get_agent saat agen pertama kali dipakai
+LAZY_MODULES = ("agno", "google.genai", "googlesearch", "duckduckgo_search", "ddgs", "arxiv")
+LINE_RE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)$")
+
+
+def measure(target: str) -> list[tuple[str, int, int, int]]:
+    """Return ``(module, self_us, cumulative_us, depth)`` for every module imported by ``target``."""
+    env = {**os.environ, "PYTHONPATH": str(BACKEND_DIR)}
+    env.setdefault("DJANGO_SETTINGS_MODULE", "config.settings.base")
+    env.setdefault("SECRET_KEY", "import-time-check")
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", target],
+        cwd=BACKEND_DIR,
+        env=env,
+        capture_output=True,
+        text=True,
+    )
+    if completed.returncode != 0:
+        sys.stderr.write(completed.stderr)
+        raise SystemExit(f"Import target failed with exit code {completed.returncode}")
+
+    rows = []
+    for line in completed.stderr.splitlines():
+        match = LINE_RE.match(line)
+        if match:
+            self_us, cumulative_us, indent, module = match.groups()
+            rows.append((module, int(self_us), int(cumulative_us), len(indent) // 2))
+    return rows
+
+
+def is_lazy(module: str) -> bool:
+    return any(module == name or module.startswith(f"{name}.") for name in LAZY_MODULES)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--budget-ms", type=float, default=float(os.getenv("IMPORT_TIME_BUDGET_MS", 2000)))
+    parser.add_argument("--top", type=int, default=15)
+    parser.add_argument("--target", default=TARGET)
+    args = parser.parse_args()
+
+    rows = measure(args.target)
+    total_ms = sum(self_us for _, self_us, _, _ in rows) / 1000
+
+    print(f"Total import time: {total_ms:.0f} ms (budget {args.budget_ms:.0f} ms), {len(rows)} modules")
+    print(f"\nTop {args.top} by cumulative time (top-level packages):")
+    top_level = sorted((row for row in rows if row[3] == 0), key=lambda row: row[2], reverse=True)
+    for module, _, cumulative_us, _ in top_level[: args.top]:
+        print(f"  {cumulative_us / 1000:8.1f} ms  {module}")
+    print(f"\nTop {args.top} by self time:")
+    for module, self_us, _, _ in sorted(rows, key=lambda row: row[1], reverse=True)[: args.top]:
+        print(f"  {self_us / 1000:8.1f} ms  {module}")
+
+    failed = False
+    eager = sorted({module for module, *_ in rows if is_lazy(module)})
+    if eager:
+        failed = True
+        print(f"\nFAIL: lazily-loaded modules imported at startup: {', '.join(eager[:10])}", file=sys.stderr)
+    if total_ms > args.budget_ms:
+        failed = True
+        print(f"\nFAIL: import time {total_ms:.0f} ms exceeds budget {args.budget_ms:.0f} ms", file=sys.stderr)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
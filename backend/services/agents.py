@@ -0,0 +1,53 @@
+from __future__ import annotations
+
+import threading
+from typing import Any, Callable
+
+from django.conf import settings
+
+AgentBuilder = Callable[[], Any]
+
+
+class AgentProviderError(RuntimeError):
+    """The model provider behind an agent failed (outage, rate limit, timeout)."""
+
+_builders: dict[tuple[str, str], AgentBuilder] = {}
+_agents: dict[tuple[str, str], Any] = {}
+_lock = threading.Lock()
+
+
+def register_agent(name: str, provider: str = "gemini") -> Callable[[AgentBuilder], AgentBuilder]:
+    """Register a builder for ``name`` on ``provider``; it runs on the first ``get_agent(name)``.
+
+    Builders should import agno, the model SDK and the toolkits themselves so
+    that importing the modules that define them stays cheap.
+    """
+
+    def decorator(builder: AgentBuilder) -> AgentBuilder:
+        _builders[(name, provider)] = builder
+        return builder
+
+    return decorator
+
+
+def get_agent(name: str, provider: str | None = None) -> Any:
+    """Return the agent ``name`` for ``provider`` (default: ``settings.LLM_PROVIDER``)."""
+    key = (name, provider or settings.LLM_PROVIDER)
+    agent = _agents.get(key)
+    if agent is not None:
+        return agent
+    with _lock:
+        agent = _agents.get(key)
+        if agent is None:
+            try:
+                builder = _builders[key]
+            except KeyError:
+                raise LookupError(f"Unknown agent '{key[0]}' for provider '{key[1]}'") from None
+            agent = _agents[key] = builder()
+        return agent
+
+
+def reset_agents() -> None:
+    """Drop built agents so the next ``get_agent`` rebuilds them."""
+    with _lock:
+        _agents.clear()
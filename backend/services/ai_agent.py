@@ -1,17 +1,14 @@
 from __future__ import annotations
 
 import os
-from typing import List, Literal, Optional, Sequence
-
-from agno.agent import Agent
-from agno.media import Image
-from agno.models.google import Gemini
-from agno.tools.arxiv import ArxivTools
-from agno.tools.duckduckgo import DuckDuckGoTools
-from agno.tools.googlesearch import GoogleSearchTools
+from typing import Any, Iterator, List, Literal, Optional, Sequence
+
+from django.conf import settings
 from dotenv import load_dotenv
 from pydantic import BaseModel, Field, ValidationError
 
+from services.agents import AgentProviderError, get_agent, register_agent
+
 load_dotenv()
 
 
@@ -86,12 +83,24 @@ Tugas:
 """
 
 
-agent = Agent(
-    model=Gemini(id="gemini-2.0-flash", api_key=os.getenv("GEMINI_API_KEY")),
-    output_schema=AgentResponse,
-    description="Anda adalah Agen Bukti AgriCare untuk Plantify.",
-    instructions="""Anda adalah Agen Bukti AgriCare untuk Plantify.
+@register_agent("diagnosis")
+def build_diagnosis_agent():
+    from agno.agent import Agent
+    from agno.models.google import Gemini
+    from agno.tools.arxiv import ArxivTools
+    from agno.tools.duckduckgo import DuckDuckGoTools
+    from agno.tools.googlesearch import GoogleSearchTools
+
+    from services.evidence_tools import LocalEvidenceTools
+    from services.tool_cache import cached_toolkit
+
+    return Agent(
+        model=Gemini(id=settings.LLM_MODEL_ID, api_key=os.getenv("GEMINI_API_KEY")),
+        output_schema=AgentResponse,
+        description="Anda adalah Agen Bukti AgriCare untuk Plantify.",
+        instructions="""Anda adalah Agen Bukti AgriCare untuk Plantify.
 Aturan:
+0. Cari bukti terlebih dahulu dengan `search_local_evidence` (pustaka sumber Plantify yang sudah terverifikasi); gunakan pencarian web hanya jika hasilnya kurang atau tidak relevan.
 1. Selalu mencari bukti eksternal (fokus pada lembaga penelitian pertanian, FAO, IRRI, penyuluhan universitas, buletin pemerintah, jurnal ilmiah dan buku ilmiah).
 2. Setiap rekomendasi harus mencantumkan minimal satu sumber terpercaya.
 3. Prioritaskan praktik budaya non-kimia sebelum menyarankan bahan aktif.
@@ -101,11 +110,23 @@ Aturan:
 7. Fokus ketat pada kesehatan tanaman; jangan memberikan saran medis untuk manusia.
 8. Jika situasi dapat menyebabkan kerugian panen besar, pertimbangkan saran eskalasi (konsultasi dengan agronom).
 """,
-    tools=[GoogleSearchTools(), DuckDuckGoTools(), ArxivTools()],
-)
+        tools=[
+            LocalEvidenceTools(),
+            cached_toolkit(GoogleSearchTools()),
+            cached_toolkit(DuckDuckGoTools()),
+            cached_toolkit(ArxivTools()),
+        ],
+    )
 
 
-def generate_diagnosis(
+@register_agent("diagnosis", provider="stub")
+def build_stub_diagnosis_agent():
+    from services.stub_agent import StubAgent, stub_agent_response
+
+    return StubAgent("diagnosis", stub_agent_response)
+
+
+def build_diagnosis_prompt(
     confirmed_symptoms: Sequence[str],
     denied_symptoms: Sequence[str],
     plant_name: Optional[str] = None,
@@ -113,9 +134,8 @@ def generate_diagnosis(
     user_notes: Optional[str] = None,
     country: str = "Indonesia",
     regulation_hint: str = "Cek regulasi lokal Kementan.",
-    image_url: Optional[str] = None,
-) -> AgentResponse:
-    payload = USER_PROMPT_TEMPLATE.format(
+) -> str:
+    return USER_PROMPT_TEMPLATE.format(
         confirmed_symptoms="\n".join(f"- {symptom}" for symptom in confirmed_symptoms) or "- (tidak ada)",
         denied_symptoms="\n".join(f"- {symptom}" for symptom in denied_symptoms) or "- (tidak ada)",
         plant_name=plant_name or "Tidak diketahui",
@@ -125,7 +145,35 @@ def generate_diagnosis(
         regulation_hint=regulation_hint,
     )
 
-    result = agent.run(payload, images=[Image(filepath=image_url)] if image_url else None)
+
+def generate_diagnosis(
+    confirmed_symptoms: Sequence[str],
+    denied_symptoms: Sequence[str],
+    plant_name: Optional[str] = None,
+    vision_confidence: Optional[float] = None,
+    user_notes: Optional[str] = None,
+    country: str = "Indonesia",
+    regulation_hint: str = "Cek regulasi lokal Kementan.",
+    image_url: Optional[str] = None,
+) -> AgentResponse:
+    from agno.media import Image
+
+    payload = build_diagnosis_prompt(
+        confirmed_symptoms,
+        denied_symptoms,
+        plant_name,
+        vision_confidence,
+        user_notes,
+        country,
+        regulation_hint,
+    )
+
+    from agno.exceptions import ModelProviderError
+
+    try:
+        result = get_agent("diagnosis").run(payload, images=[Image(filepath=image_url)] if image_url else None)
+    except ModelProviderError as exc:
+        raise AgentProviderError(str(exc)) from exc
 
     try:
         if isinstance(result.content, AgentResponse):
@@ -134,7 +182,58 @@ def generate_diagnosis(
         raise ValueError(f"AI response does not match schema: {exc}\nRaw: {result.content}")
 
 
+def stream_diagnosis(
+    confirmed_symptoms: Sequence[str],
+    denied_symptoms: Sequence[str],
+    plant_name: Optional[str] = None,
+    vision_confidence: Optional[float] = None,
+    user_notes: Optional[str] = None,
+    country: str = "Indonesia",
+    regulation_hint: str = "Cek regulasi lokal Kementan.",
+    image_url: Optional[str] = None,
+) -> Iterator[tuple[str, Any]]:
+    """Streaming variant of ``generate_diagnosis``.
+
+    Yields ``("progress", {...})`` while the agent works (run start, each tool
+    call) and finally ``("result", AgentResponse)``.
+    """
+    from agno.exceptions import ModelProviderError
+    from agno.media import Image
+    from agno.run.agent import RunEvent
+
+    payload = build_diagnosis_prompt(
+        confirmed_symptoms,
+        denied_symptoms,
+        plant_name,
+        vision_confidence,
+        user_notes,
+        country,
+        regulation_hint,
+    )
 
-
-
-
+    result: Optional[AgentResponse] = None
+    events = get_agent("diagnosis").run(
+        payload,
+        images=[Image(filepath=image_url)] if image_url else None,
+        stream=True,
+        stream_events=True,
+    )
+    try:
+        for event in events:
+            name = getattr(event, "event", "")
+            if name == RunEvent.run_started.value:
+                yield "progress", {"stage": "started"}
+            elif name == RunEvent.tool_call_started.value and event.tool is not None:
+                yield "progress", {"stage": "tool_started", "tool": event.tool.tool_name, "args": event.tool.tool_args}
+            elif name == RunEvent.tool_call_completed.value and event.tool is not None:
+                yield "progress", {"stage": "tool_completed", "tool": event.tool.tool_name}
+            elif name == RunEvent.run_error.value:
+                raise ValueError(f"AI run failed: {event.content}")
+            elif isinstance(getattr(event, "content", None), AgentResponse):
+                result = event.content
+    except ModelProviderError as exc:
+        raise AgentProviderError(str(exc)) from exc
+
+    if result is None:
+        raise ValueError("AI response does not match schema.")
+    yield "result", result
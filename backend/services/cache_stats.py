@@ -0,0 +1,61 @@
+from __future__ import annotations
+
+import logging
+
+from django.core.cache import caches
+from ninja import Schema
+
+logger = logging.getLogger(__name__)
+
+
+class CacheStatsOut(Schema):
+    """Response schema for ``CacheStats.snapshot()``, shared by the cache stats endpoints."""
+
+    hits: int
+    misses: int
+    hitRatio: float | None
+
+
+class CacheStats:
+    """Hit/miss counters kept in the shared cache so every worker process reports into one total."""
+
+    def __init__(self, namespace: str, alias: str = "default") -> None:
+        self.namespace = namespace
+        self.alias = alias
+
+    def _key(self, field: str) -> str:
+        return f"stats:{self.namespace}:{field}"
+
+    def _incr(self, field: str, delta: int = 1) -> None:
+        if delta <= 0:
+            return
+        cache = caches[self.alias]
+        key = self._key(field)
+        try:
+            try:
+                cache.incr(key, delta)
+            except ValueError:
+                cache.add(key, 0, timeout=None)
+                cache.incr(key, delta)
+        except Exception as exc:  # counters must never break the request path
+            logger.debug("Could not update cache stats %s: %s", key, exc)
+
+    def hit(self, count: int = 1) -> None:
+        self._incr("hits", count)
+
+    def miss(self, count: int = 1) -> None:
+        self._incr("misses", count)
+
+    def snapshot(self) -> dict:
+        values = caches[self.alias].get_many([self._key("hits"), self._key("misses")])
+        hits = int(values.get(self._key("hits"), 0))
+        misses = int(values.get(self._key("misses"), 0))
+        total = hits + misses
+        return {
+            "hits": hits,
+            "misses": misses,
+            "hitRatio": round(hits / total, 4) if total else None,
+        }
+
+    def reset(self) -> None:
+        caches[self.alias].delete_many([self._key("hits"), self._key("misses")])
@@ -0,0 +1,28 @@
+from __future__ import annotations
+
+from django.db import IntegrityError, models, transaction
+from django.db.models import F
+from django.db.models.functions import Greatest
+
+
+def increment(model: type[models.Model], lookup: dict, **deltas: int | float) -> None:
+    """Add ``deltas`` to the counter columns of the row matching ``lookup``, creating it if needed.
+
+    Uses ``UPDATE ... SET col = col + delta`` so concurrent writers never lose
+    an update. Negative deltas are floored at zero and never create a row.
+    """
+    deltas = {field: delta for field, delta in deltas.items() if delta}
+    if not deltas:
+        return
+    updates = {
+        field: Greatest(F(field) + delta, 0) if delta < 0 else F(field) + delta
+        for field, delta in deltas.items()
+    }
+    if model.objects.filter(**lookup).update(**updates) or any(delta < 0 for delta in deltas.values()):
+        return
+    try:
+        with transaction.atomic():
+            model.objects.create(**lookup, **deltas)
+    except IntegrityError:
+        # Baris dibuat oleh transaksi paralel di antara UPDATE dan INSERT
+        model.objects.filter(**lookup).update(**updates)
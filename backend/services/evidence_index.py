@@ -0,0 +1,133 @@
+from __future__ import annotations
+
+import logging
+import math
+import re
+import threading
+import time
+from collections import Counter, defaultdict
+from dataclasses import dataclass
+from typing import Iterable
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+STOPWORDS = {
+    "dan", "yang", "di", "ke", "dari", "pada", "untuk", "dengan", "atau", "ini", "itu", "dalam",
+    "oleh", "sebagai", "akan", "juga", "tidak", "the", "of", "and", "in", "on", "for", "to", "a",
+    "an", "is", "are", "with", "by", "from", "at", "as",
+}
+
+
+def tokenize(text: str) -> list[str]:
+    return [token for token in TOKEN_RE.findall(text.casefold()) if token not in STOPWORDS and len(token) > 1]
+
+
+@dataclass
+class EvidenceDocument:
+    title: str
+    url: str
+    source: str
+    summary: str
+    publishedAt: str | None = None
+
+
+class EvidenceIndex:
+    """In-process BM25 index over the sources of previously saved diagnoses.
+
+    Documents are deduplicated by URL, so feeding the same sources twice (from
+    ``add_sources`` after a save and again from ``refresh``) is harmless.
+    """
+
+    k1 = 1.5
+    b = 0.75
+    title_weight = 2
+
+    def __init__(self) -> None:
+        self._lock = threading.RLock()
+        self._documents: list[EvidenceDocument] = []
+        self._by_url: dict[str, int] = {}
+        self._postings: dict[str, dict[int, int]] = defaultdict(dict)
+        self._lengths: list[int] = []
+        self._total_length = 0
+        self._last_diagnosis_id = 0
+        self._refreshed_at: float | None = None
+
+    def __len__(self) -> int:
+        return len(self._documents)
+
+    def add_sources(self, sources: Iterable[dict]) -> int:
+        added = 0
+        with self._lock:
+            for source in sources:
+                url = (source.get("url") or "").strip()
+                if not url or url in self._by_url:
+                    continue
+                document = EvidenceDocument(
+                    title=source.get("title") or "",
+                    url=url,
+                    source=source.get("source") or "",
+                    summary=source.get("summary") or "",
+                    publishedAt=source.get("publishedAt") or source.get("published_at"),
+                )
+                terms = tokenize(document.title) * self.title_weight
+                terms += tokenize(document.summary) + tokenize(document.source)
+                doc_id = len(self._documents)
+                self._documents.append(document)
+                self._by_url[url] = doc_id
+                for term, frequency in Counter(terms).items():
+                    self._postings[term][doc_id] = frequency
+                self._lengths.append(len(terms))
+                self._total_length += len(terms)
+                added += 1
+        return added
+
+    def refresh(self) -> int:
+        """Index sources of diagnoses saved since the last refresh, including those written by other processes."""
+        from diagnosis.models import Diagnosis
+
+        rows = (
+            Diagnosis.objects.filter(id__gt=self._last_diagnosis_id)
+            .order_by("id")
+            .values_list("id", "sources")
+        )
+        added = 0
+        for diagnosis_id, sources in rows.iterator(chunk_size=500):
+            added += self.add_sources(source for source in sources or [] if isinstance(source, dict))
+            self._last_diagnosis_id = diagnosis_id
+        self._refreshed_at = time.monotonic()
+        if added:
+            logger.info("Evidence index: added %d source(s), %d total", added, len(self))
+        return added
+
+    def ensure_fresh(self) -> None:
+        interval = settings.EVIDENCE_INDEX_REFRESH_INTERVAL
+        if self._refreshed_at is None or time.monotonic() - self._refreshed_at > interval:
+            with self._lock:
+                if self._refreshed_at is None or time.monotonic() - self._refreshed_at > interval:
+                    self.refresh()
+
+    def search(self, query: str, limit: int = 5) -> list[tuple[float, EvidenceDocument]]:
+        terms = set(tokenize(query))
+        with self._lock:
+            count = len(self._documents)
+            if not terms or not count:
+                return []
+            average_length = self._total_length / count
+            scores: dict[int, float] = defaultdict(float)
+            for term in terms:
+                postings = self._postings.get(term)
+                if not postings:
+                    continue
+                idf = math.log(1 + (count - len(postings) + 0.5) / (len(postings) + 0.5))
+                for doc_id, frequency in postings.items():
+                    norm = self.k1 * (1 - self.b + self.b * self._lengths[doc_id] / average_length)
+                    scores[doc_id] += idf * frequency * (self.k1 + 1) / (frequency + norm)
+            ranked = sorted(scores.items(), key=lambda item: item[1], reverse=True)[:limit]
+            return [(round(score, 4), self._documents[doc_id]) for doc_id, score in ranked]
+
+
+evidence_index = EvidenceIndex()
+
@@ -0,0 +1,35 @@
+from __future__ import annotations
+
+import json
+import logging
+from dataclasses import asdict
+
+from agno.tools import Toolkit
+
+from .evidence_index import EvidenceIndex, evidence_index
+
+logger = logging.getLogger(__name__)
+
+
+class LocalEvidenceTools(Toolkit):
+    def __init__(self, index: EvidenceIndex | None = None, **kwargs):
+        self.index = index or evidence_index
+        super().__init__(name="local_evidence", tools=[self.search_local_evidence], **kwargs)
+
+    def search_local_evidence(self, query: str, max_results: int = 5) -> str:
+        """Search Plantify's library of credible sources already vetted in earlier diagnoses.
+        Use this before any web search; only search the web when these results are missing or insufficient.
+
+        Args:
+            query (str): Disease, pest, symptom or plant to look up, e.g. "bercak daun cabai".
+            max_results (int): Maximum number of sources to return.
+
+        Returns:
+            str: JSON list of sources with title, url, source, summary, publishedAt and a relevance score.
+        """
+        try:
+            self.index.ensure_fresh()
+        except Exception as exc:
+            logger.warning("Evidence index refresh failed: %s", exc)
+        results = self.index.search(query, limit=max_results)
+        return json.dumps([{**asdict(document), "score": score} for score, document in results], ensure_ascii=False)
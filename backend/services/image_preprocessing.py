@@ -0,0 +1,187 @@
+from __future__ import annotations
+
+import io
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import BinaryIO, Iterator
+
+from django.conf import settings
+from PIL import Image, ImageOps
+
+from .metrics import PREPROCESS_BYTES, PREPROCESS_IMAGES, PREPROCESS_STAGE_DURATION
+
+logger = logging.getLogger(__name__)
+
+FORMAT_EXTENSIONS = {"WEBP": "webp", "JPEG": "jpg", "PNG": "png"}
+STAGES = ("decode", "orient", "resize", "encode")
+
+
+@dataclass
+class PreprocessResult:
+    content: bytes
+    extension: str
+    width: int
+    height: int
+    original_bytes: int
+    timings: dict[str, float] = field(default_factory=dict)
+
+    @property
+    def output_bytes(self) -> int:
+        return len(self.content)
+
+    @property
+    def bytes_saved(self) -> int:
+        return max(self.original_bytes - self.output_bytes, 0)
+
+
+class PreprocessCounters:
+    """Process-wide totals so the size/accuracy tradeoff can be tuned from real traffic.
+
+    Every sample is also exported to Prometheus (``plantify_preprocess_*``) so the
+    numbers from all workers show up at ``/api/metrics``.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        with self._lock:
+            self.images = 0
+            self.failures = 0
+            self.original_bytes = 0
+            self.output_bytes = 0
+            self.stage_seconds = {stage: 0.0 for stage in STAGES}
+
+    def record(self, result: PreprocessResult) -> None:
+        with self._lock:
+            self.images += 1
+            self.original_bytes += result.original_bytes
+            self.output_bytes += result.output_bytes
+            for stage, seconds in result.timings.items():
+                self.stage_seconds[stage] = self.stage_seconds.get(stage, 0.0) + seconds
+        PREPROCESS_IMAGES.labels("ok").inc()
+        PREPROCESS_BYTES.labels("original").inc(result.original_bytes)
+        PREPROCESS_BYTES.labels("output").inc(result.output_bytes)
+        for stage, seconds in result.timings.items():
+            PREPROCESS_STAGE_DURATION.labels(stage).observe(seconds)
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self.failures += 1
+        PREPROCESS_IMAGES.labels("failed").inc()
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "images": self.images,
+                "failures": self.failures,
+                "originalBytes": self.original_bytes,
+                "outputBytes": self.output_bytes,
+                "bytesSaved": max(self.original_bytes - self.output_bytes, 0),
+                "stageSeconds": dict(self.stage_seconds),
+            }
+
+
+counters = PreprocessCounters()
+
+
+@contextmanager
+def _stage(timings: dict[str, float], name: str) -> Iterator[None]:
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings[name] = time.perf_counter() - started
+
+
+def _source_size(source: str | os.PathLike | BinaryIO) -> int:
+    if isinstance(source, (str, os.PathLike)):
+        return os.path.getsize(source)
+    position = source.tell()
+    source.seek(0, os.SEEK_END)
+    size = source.tell()
+    source.seek(position)
+    return size
+
+
+def perceptual_hash(source: str | os.PathLike | BinaryIO, hash_size: int = 8) -> str:
+    """Difference hash (dHash) of an image as a hex string of ``hash_size ** 2`` bits."""
+    with Image.open(source) as opened:
+        opened.draft("L", (hash_size * 8, hash_size * 8))
+        image = ImageOps.exif_transpose(opened).convert("L")
+        image = image.resize((hash_size + 1, hash_size), Image.Resampling.LANCZOS)
+        pixels = image.tobytes()
+
+    value = 0
+    for row in range(hash_size):
+        offset = row * (hash_size + 1)
+        for col in range(hash_size):
+            value = (value << 1) | (pixels[offset + col] > pixels[offset + col + 1])
+    return f"{value:0{hash_size * hash_size // 4}x}"
+
+
+def hamming_distance(first: str, second: str) -> int:
+    return (int(first, 16) ^ int(second, 16)).bit_count()
+
+
+def preprocess_image(
+    source: str | os.PathLike | BinaryIO,
+    *,
+    max_edge: int | None = None,
+    image_format: str | None = None,
+    quality: int | None = None,
+) -> PreprocessResult:
+    """Build the compact "model input" variant of an uploaded photo.
+
+    The image is EXIF-rotated, downscaled so its longest edge is at most
+    ``max_edge`` pixels and re-encoded. Raises ``OSError`` (including
+    ``PIL.UnidentifiedImageError``) when the source is not a readable image.
+    """
+    max_edge = max_edge or settings.VISION_INPUT_MAX_EDGE
+    image_format = (image_format or settings.VISION_INPUT_FORMAT).upper()
+    quality = quality or settings.VISION_INPUT_QUALITY
+    if image_format not in FORMAT_EXTENSIONS:
+        raise ValueError(f"Unsupported model input format: {image_format}")
+
+    timings: dict[str, float] = {}
+    original_bytes = _source_size(source)
+
+    with Image.open(source) as opened:
+        with _stage(timings, "decode"):
+            # JPEG sources can be decoded at a reduced DCT scale that still covers max_edge.
+            opened.draft("RGB", (max_edge, max_edge))
+            opened.load()
+        with _stage(timings, "orient"):
+            image = ImageOps.exif_transpose(opened)
+        with _stage(timings, "resize"):
+            image.thumbnail((max_edge, max_edge), Image.Resampling.LANCZOS)
+            keep_alpha = image_format != "JPEG" and image.mode in {"RGBA", "LA", "PA"}
+            if image.mode not in {"RGB", "RGBA"} or (image.mode == "RGBA" and not keep_alpha):
+                image = image.convert("RGBA" if keep_alpha else "RGB")
+        with _stage(timings, "encode"):
+            buffer = io.BytesIO()
+            image.save(buffer, format=image_format, quality=quality, optimize=True)
+
+    result = PreprocessResult(
+        content=buffer.getvalue(),
+        extension=FORMAT_EXTENSIONS[image_format],
+        width=image.width,
+        height=image.height,
+        original_bytes=original_bytes,
+        timings=timings,
+    )
+    counters.record(result)
+    logger.info(
+        "Preprocessed image %dx%d: %d -> %d bytes (%s)",
+        result.width,
+        result.height,
+        result.original_bytes,
+        result.output_bytes,
+        ", ".join(f"{stage}={seconds * 1000:.1f}ms" for stage, seconds in timings.items()),
+    )
+    return result
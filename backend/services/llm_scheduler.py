@@ -0,0 +1,418 @@
+from __future__ import annotations
+
+import asyncio
+import functools
+import heapq
+import itertools
+import logging
+import math
+import random
+import threading
+import time
+import uuid
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from enum import IntEnum
+from typing import Any, AsyncIterator, Callable, Iterator, TypeVar
+
+from django.conf import settings
+from django.core.cache import caches
+
+from .metrics import LLM_CALL_DURATION, LLM_CALLS, LLM_IN_FLIGHT, LLM_QUEUE_WAIT, LLM_QUEUED
+
+T = TypeVar("T")
+
+logger = logging.getLogger(__name__)
+
+
+class Priority(IntEnum):
+    INTERACTIVE = 0
+    BACKGROUND = 10
+
+
+class LLMQueueFull(Exception):
+    """Raised instead of queueing when the scheduler cannot take more work."""
+
+    def __init__(self, retry_after: int) -> None:
+        super().__init__(f"LLM queue is full, retry after {retry_after}s")
+        self.retry_after = retry_after
+
+
+@dataclass(order=True)
+class _Waiter:
+    priority: int
+    round: int
+    seq: int
+    user_key: str = field(compare=False)
+    loop: asyncio.AbstractEventLoop = field(compare=False, repr=False)
+    future: asyncio.Future = field(compare=False, repr=False)
+    cancelled: bool = field(default=False, compare=False)
+    granted: bool = field(default=False, compare=False)
+
+
+def _grant(future: asyncio.Future) -> None:
+    if not future.done():
+        future.set_result(True)
+
+
+async def _wait_for_thread(future: asyncio.Future) -> None:
+    """Wait until an executor call has returned, even if the waiting task is cancelled again meanwhile."""
+    while not future.done():
+        try:
+            await asyncio.wait({future})
+        except asyncio.CancelledError:
+            continue
+
+
+@dataclass
+class _Lease:
+    key: str
+    token: str
+    heartbeat: asyncio.Task | None = None
+
+
+class SharedSlots:
+    """Counting semaphore kept in the shared cache, so the limit holds across every process.
+
+    Slot ``i`` is the key ``<prefix>:<i>``; a holder owns it by ``cache.add``-ing
+    a random token with a TTL and refreshes the TTL while its call runs. A
+    process that dies mid-call therefore frees its slot after ``ttl`` seconds.
+    If the cache is unreachable the semaphore fails open and only the local
+    limit applies.
+    """
+
+    def __init__(self, alias: str = "default", prefix: str = "llm:slot", limit: int | None = None, ttl: int | None = None) -> None:
+        self.alias = alias
+        self.prefix = prefix
+        self._limit = limit
+        self._ttl = ttl
+
+    @property
+    def cache(self):
+        return caches[self.alias]
+
+    @property
+    def limit(self) -> int:
+        return self._limit if self._limit is not None else settings.LLM_GLOBAL_MAX_IN_FLIGHT
+
+    @property
+    def ttl(self) -> int:
+        return self._ttl or settings.LLM_SLOT_TTL
+
+    def _try_acquire(self) -> _Lease | None:
+        token = uuid.uuid4().hex
+        offset = random.randrange(self.limit)
+        for index in range(self.limit):
+            key = f"{self.prefix}:{(offset + index) % self.limit}"
+            if self.cache.add(key, token, timeout=self.ttl):
+                return _Lease(key, token)
+        return None
+
+    async def acquire(self, timeout: float) -> _Lease | None:
+        """Wait up to ``timeout`` seconds for a slot; ``None`` means no global limit applies (disabled or cache down)."""
+        if self.limit <= 0:
+            return None
+        deadline = time.monotonic() + timeout
+        delay = 0.05
+        while True:
+            try:
+                lease = await asyncio.to_thread(self._try_acquire)
+            except Exception as exc:
+                logger.warning("Shared LLM slots unavailable, using the local limit only: %s", exc)
+                return None
+            if lease is not None:
+                lease.heartbeat = asyncio.create_task(self._keep_alive(lease))
+                return lease
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise TimeoutError
+            await asyncio.sleep(min(delay, remaining))
+            delay = min(delay * 2, 0.25)
+
+    async def _keep_alive(self, lease: _Lease) -> None:
+        while True:
+            await asyncio.sleep(self.ttl / 3)
+            try:
+                await asyncio.to_thread(self.cache.touch, lease.key, self.ttl)
+            except Exception as exc:
+                logger.warning("Could not extend LLM slot %s: %s", lease.key, exc)
+
+    def _delete(self, lease: _Lease) -> None:
+        # Hapus hanya bila slot masih milik kita (bisa saja sudah kedaluwarsa & diambil proses lain)
+        if self.cache.get(lease.key) == lease.token:
+            self.cache.delete(lease.key)
+
+    async def release(self, lease: _Lease | None) -> None:
+        if lease is None:
+            return
+        if lease.heartbeat is not None:
+            lease.heartbeat.cancel()
+        try:
+            await asyncio.to_thread(self._delete, lease)
+        except Exception as exc:
+            logger.warning("Could not release LLM slot %s; it expires in %ss: %s", lease.key, self.ttl, exc)
+
+
+class LLMScheduler:
+    """Gate in front of every LLM call.
+
+    Within a process at most ``max_in_flight`` calls run at once, on a
+    dedicated thread pool of the same size. Waiting calls are ordered by
+    priority first and then by their owner's outstanding work, so one user's
+    burst cannot starve others. The call at the head of that local queue must
+    also take one of the ``LLM_GLOBAL_MAX_IN_FLIGHT`` slots in the shared cache
+    (``SharedSlots``), which caps concurrent calls across all API workers and
+    scan workers together. Once ``max_queue`` calls are waiting (or a call
+    waited ``queue_timeout`` seconds) ``LLMQueueFull`` is raised so the API can
+    answer 429 instead of piling up threads.
+    """
+
+    def __init__(
+        self,
+        max_in_flight: int | None = None,
+        max_queue: int | None = None,
+        queue_timeout: float | None = None,
+        shared_slots: SharedSlots | None = None,
+    ) -> None:
+        self.shared_slots = shared_slots or SharedSlots()
+        self._max_in_flight = max_in_flight
+        self._max_queue = max_queue
+        self._queue_timeout = queue_timeout
+        self._lock = threading.Lock()
+        self._heap: list[_Waiter] = []
+        self._queued = 0
+        self._in_flight = 0
+        self._user_load: Counter[str] = Counter()
+        self._seq = itertools.count()
+        self._executor: ThreadPoolExecutor | None = None
+        self._avg_duration = 10.0
+
+    @property
+    def max_in_flight(self) -> int:
+        return self._max_in_flight or settings.LLM_MAX_IN_FLIGHT
+
+    @property
+    def max_queue(self) -> int:
+        return self._max_queue if self._max_queue is not None else settings.LLM_MAX_QUEUE
+
+    @property
+    def queue_timeout(self) -> float:
+        return self._queue_timeout or settings.LLM_QUEUE_TIMEOUT
+
+    @property
+    def in_flight(self) -> int:
+        return self._in_flight
+
+    @property
+    def queued(self) -> int:
+        return self._queued
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.max_in_flight,
+                    thread_name_prefix="llm",
+                )
+            return self._executor
+
+    def _publish(self) -> None:
+        LLM_IN_FLIGHT.set(self._in_flight)
+        LLM_QUEUED.set(self._queued)
+
+    def retry_after(self) -> int:
+        waiting = self._queued + 1
+        return max(1, math.ceil(self._avg_duration * waiting / self.max_in_flight))
+
+    async def _acquire(self, user_key: str, priority: Priority) -> None:
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            if self._in_flight < self.max_in_flight and not self._queued:
+                self._in_flight += 1
+                self._user_load[user_key] += 1
+                self._publish()
+                return
+            if self._queued >= self.max_queue:
+                raise LLMQueueFull(self.retry_after())
+            waiter = _Waiter(
+                priority=int(priority),
+                round=self._user_load[user_key],
+                seq=next(self._seq),
+                user_key=user_key,
+                loop=loop,
+                future=loop.create_future(),
+            )
+            heapq.heappush(self._heap, waiter)
+            self._queued += 1
+            self._user_load[user_key] += 1
+            self._publish()
+
+        try:
+            # Bukan wait_for: wait_for menelan pembatalan yang tiba tepat setelah slot diberikan
+            async with asyncio.timeout(self.queue_timeout):
+                await asyncio.shield(waiter.future)
+        except (asyncio.TimeoutError, asyncio.CancelledError) as exc:
+            with self._lock:
+                granted = waiter.granted
+                if not granted:
+                    waiter.cancelled = True
+                    self._queued -= 1
+                    self._decrement_user(user_key)
+                    self._publish()
+            if granted:
+                self._release(user_key)
+            if isinstance(exc, asyncio.TimeoutError):
+                raise LLMQueueFull(self.retry_after()) from exc
+            raise
+
+    def _decrement_user(self, user_key: str) -> None:
+        self._user_load[user_key] -= 1
+        if self._user_load[user_key] <= 0:
+            del self._user_load[user_key]
+
+    def _release(self, user_key: str) -> None:
+        with self._lock:
+            self._in_flight -= 1
+            self._decrement_user(user_key)
+            while self._heap and self._in_flight < self.max_in_flight:
+                waiter = heapq.heappop(self._heap)
+                if waiter.cancelled:
+                    continue
+                self._queued -= 1
+                self._in_flight += 1
+                waiter.granted = True
+                waiter.loop.call_soon_threadsafe(_grant, waiter.future)
+            self._publish()
+
+    @asynccontextmanager
+    async def slot(
+        self,
+        user_id: Any = None,
+        priority: Priority = Priority.INTERACTIVE,
+    ) -> AsyncIterator[None]:
+        user_key = str(user_id) if user_id is not None else "anonymous"
+        started = time.monotonic()
+        await self._acquire(user_key, priority)
+        try:
+            remaining = max(self.queue_timeout - (time.monotonic() - started), 0.0)
+            lease = await self.shared_slots.acquire(remaining)
+        except TimeoutError as exc:
+            self._release(user_key)
+            raise LLMQueueFull(self.retry_after()) from exc
+        except BaseException:
+            self._release(user_key)
+            raise
+        LLM_QUEUE_WAIT.observe(time.monotonic() - started)
+        try:
+            yield
+        finally:
+            try:
+                await self.shared_slots.release(lease)
+            finally:
+                self._release(user_key)
+
+    async def run(
+        self,
+        func: Callable[..., T],
+        *args: Any,
+        user_id: Any = None,
+        priority: Priority = Priority.INTERACTIVE,
+        **kwargs: Any,
+    ) -> T:
+        """Run a blocking LLM call on the scheduler's own thread pool once a slot is free.
+
+        A running call cannot be interrupted: if the caller is cancelled (client
+        disconnect, a failed sibling in a batch) the slot stays taken until the
+        thread returns, so the concurrency limits hold for abandoned calls too.
+        """
+        call = getattr(func, "__name__", "llm")
+        async with self._metered_slot(call, user_id, priority):
+            started = time.monotonic()
+            outcome = "error"
+            future = asyncio.get_running_loop().run_in_executor(
+                self._get_executor(),
+                functools.partial(func, *args, **kwargs),
+            )
+            try:
+                result = await asyncio.shield(future)
+                outcome = "ok"
+                return result
+            except asyncio.CancelledError:
+                # Thread tidak bisa dihentikan; slot (lokal & global) baru dilepas setelah panggilannya selesai
+                outcome = "cancelled"
+                await _wait_for_thread(future)
+                raise
+            finally:
+                self._record_duration(call, outcome, time.monotonic() - started)
+
+    async def stream(
+        self,
+        func: Callable[..., Iterator[T]],
+        *args: Any,
+        user_id: Any = None,
+        priority: Priority = Priority.INTERACTIVE,
+        **kwargs: Any,
+    ) -> AsyncIterator[T]:
+        """Like ``run`` for a blocking generator; items are relayed to the caller as they are produced.
+
+        If the caller stops iterating (e.g. the client disconnected) the producer
+        stops after its current item, and the slot is held until it has.
+        """
+        call = getattr(func, "__name__", "llm")
+        async with self._metered_slot(call, user_id, priority):
+            loop = asyncio.get_running_loop()
+            queue: asyncio.Queue = asyncio.Queue()
+            stopped = threading.Event()
+            finished = object()
+
+            def _produce() -> None:
+                iterator = func(*args, **kwargs)
+                try:
+                    for item in iterator:
+                        loop.call_soon_threadsafe(queue.put_nowait, (item, None))
+                        if stopped.is_set():
+                            break
+                except BaseException as exc:
+                    loop.call_soon_threadsafe(queue.put_nowait, (finished, exc))
+                else:
+                    loop.call_soon_threadsafe(queue.put_nowait, (finished, None))
+                finally:
+                    close = getattr(iterator, "close", None)
+                    if close is not None:
+                        close()
+
+            started = time.monotonic()
+            outcome = "error"
+            producer = loop.run_in_executor(self._get_executor(), _produce)
+            try:
+                while True:
+                    item, error = await queue.get()
+                    if item is finished:
+                        if error is not None:
+                            raise error
+                        break
+                    yield item
+                outcome = "ok"
+            finally:
+                stopped.set()
+                await _wait_for_thread(producer)
+                self._record_duration(call, outcome, time.monotonic() - started)
+
+    @asynccontextmanager
+    async def _metered_slot(self, call: str, user_id: Any, priority: Priority) -> AsyncIterator[None]:
+        try:
+            async with self.slot(user_id=user_id, priority=priority):
+                yield
+        except LLMQueueFull:
+            LLM_CALLS.labels(call, "rejected").inc()
+            raise
+
+    def _record_duration(self, call: str, outcome: str, elapsed: float) -> None:
+        self._avg_duration = 0.8 * self._avg_duration + 0.2 * elapsed
+        LLM_CALL_DURATION.labels(call, outcome).observe(elapsed)
+        LLM_CALLS.labels(call, outcome).inc()
+
+
+llm_scheduler = LLMScheduler()
@@ -0,0 +1,197 @@
+"""Prometheus metrics for the API, the LLM scheduler and image preprocessing.
+
+With ``PROMETHEUS_MULTIPROC_DIR`` set (before the process starts) every worker
+process writes its samples to that directory and ``/api/metrics`` aggregates
+them, so the numbers stay correct behind gunicorn/uvicorn with several workers.
+"""
+
+from __future__ import annotations
+
+import os
+import random
+import time
+
+from asgiref.sync import iscoroutinefunction, sync_to_async
+from django.conf import settings
+from django.http import HttpRequest, HttpResponse
+from django.utils.decorators import sync_and_async_middleware
+from ninja.renderers import JSONRenderer
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+
+from .query_tracking import install as install_query_tracking, track_queries
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+LLM_BUCKETS = (0.5, 1, 2.5, 5, 10, 20, 30, 45, 60, 90, 120, 180)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 89, 144, 233)
+PREPROCESS_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5)
+
+HTTP_REQUEST_DURATION = Histogram(
+    "plantify_http_request_duration_seconds",
+    "End-to-end request latency per route.",
+    ["method", "route", "status"],
+    buckets=LATENCY_BUCKETS,
+)
+HTTP_REQUESTS_IN_FLIGHT = Gauge(
+    "plantify_http_requests_in_flight",
+    "Requests currently being handled.",
+    multiprocess_mode="livesum",
+)
+DB_QUERIES = Histogram(
+    "plantify_db_queries_per_request",
+    "Database queries issued per request.",
+    ["route"],
+    buckets=QUERY_COUNT_BUCKETS,
+)
+DB_DURATION = Histogram(
+    "plantify_db_duration_seconds",
+    "Time spent executing database queries per request.",
+    ["route"],
+    buckets=LATENCY_BUCKETS,
+)
+SYNC_EXECUTOR_WAIT = Histogram(
+    "plantify_sync_executor_wait_seconds",
+    "Sampled delay before a thread-sensitive sync_to_async call starts running.",
+    buckets=LATENCY_BUCKETS,
+)
+SERIALIZATION_DURATION = Histogram(
+    "plantify_serialization_duration_seconds",
+    "Time spent rendering API responses to JSON.",
+    ["route"],
+    buckets=LATENCY_BUCKETS,
+)
+LLM_CALL_DURATION = Histogram(
+    "plantify_llm_call_duration_seconds",
+    "Duration of LLM calls once they hold a scheduler slot.",
+    ["call", "outcome"],
+    buckets=LLM_BUCKETS,
+)
+LLM_CALLS = Counter(
+    "plantify_llm_calls_total",
+    "LLM calls by outcome (ok, error, cancelled, rejected).",
+    ["call", "outcome"],
+)
+LLM_QUEUE_WAIT = Histogram(
+    "plantify_llm_queue_wait_seconds",
+    "Time LLM calls waited for a scheduler slot.",
+    buckets=LATENCY_BUCKETS,
+)
+LLM_IN_FLIGHT = Gauge(
+    "plantify_llm_in_flight",
+    "LLM calls currently holding a scheduler slot.",
+    multiprocess_mode="livesum",
+)
+LLM_QUEUED = Gauge(
+    "plantify_llm_queued",
+    "LLM calls waiting for a scheduler slot.",
+    multiprocess_mode="livesum",
+)
+PREPROCESS_STAGE_DURATION = Histogram(
+    "plantify_preprocess_stage_duration_seconds",
+    "Time spent in each image preprocessing stage (decode, orient, resize, encode).",
+    ["stage"],
+    buckets=PREPROCESS_BUCKETS,
+)
+PREPROCESS_IMAGES = Counter(
+    "plantify_preprocess_images_total",
+    "Images preprocessed before being sent to the AI agents, by outcome (ok, failed).",
+    ["outcome"],
+)
+PREPROCESS_BYTES = Counter(
+    "plantify_preprocess_bytes_total",
+    "Image bytes before (original) and after (output) preprocessing; the difference is the bytes saved.",
+    ["kind"],
+)
+
+
+def route_label(request: HttpRequest) -> str:
+    match = getattr(request, "resolver_match", None)
+    return match.route if match is not None else "unmatched"
+
+
+class TimedJSONRenderer(JSONRenderer):
+    def render(self, request: HttpRequest, data, *, response_status: int):
+        started = time.perf_counter()
+        try:
+            return super().render(request, data, response_status=response_status)
+        finally:
+            SERIALIZATION_DURATION.labels(route_label(request)).observe(time.perf_counter() - started)
+
+
+def _observe(request: HttpRequest, response: HttpResponse | None, elapsed: float, stats) -> None:
+    route = route_label(request)
+    status = response.status_code if response is not None else 500
+    HTTP_REQUEST_DURATION.labels(request.method, route, status).observe(elapsed)
+    DB_QUERIES.labels(route).observe(stats.count)
+    DB_DURATION.labels(route).observe(stats.duration)
+
+
+def _noop() -> None:
+    return None
+
+
+async def _probe_executor_wait() -> None:
+    started = time.perf_counter()
+    await sync_to_async(_noop, thread_sensitive=True)()
+    SYNC_EXECUTOR_WAIT.observe(time.perf_counter() - started)
+
+
+@sync_and_async_middleware
+def metrics_middleware(get_response):
+    install_query_tracking()
+
+    if iscoroutinefunction(get_response):
+
+        async def middleware(request):
+            if not settings.METRICS_ENABLED:
+                return await get_response(request)
+            if random.random() < settings.METRICS_EXECUTOR_PROBE_RATE:
+                await _probe_executor_wait()
+            response = None
+            HTTP_REQUESTS_IN_FLIGHT.inc()
+            started = time.perf_counter()
+            try:
+                with track_queries() as stats:
+                    response = await get_response(request)
+                return response
+            finally:
+                HTTP_REQUESTS_IN_FLIGHT.dec()
+                _observe(request, response, time.perf_counter() - started, stats)
+
+    else:
+
+        def middleware(request):
+            if not settings.METRICS_ENABLED:
+                return get_response(request)
+            response = None
+            HTTP_REQUESTS_IN_FLIGHT.inc()
+            started = time.perf_counter()
+            try:
+                with track_queries() as stats:
+                    response = get_response(request)
+                return response
+            finally:
+                HTTP_REQUESTS_IN_FLIGHT.dec()
+                _observe(request, response, time.perf_counter() - started, stats)
+
+    return middleware
+
+
+def metrics_view(request: HttpRequest) -> HttpResponse:
+    token = settings.METRICS_AUTH_TOKEN
+    if token and request.headers.get("Authorization") != f"Bearer {token}":
+        return HttpResponse(status=401)
+
+    registry = REGISTRY
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    return HttpResponse(generate_latest(registry), content_type=CONTENT_TYPE_LATEST)
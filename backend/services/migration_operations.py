@@ -0,0 +1,41 @@
+from __future__ import annotations
+
+from django.db.migrations.operations.base import Operation
+
+
+class PostgreSQLOnly(Operation):
+    """Apply the wrapped operation's schema change only on PostgreSQL.
+
+    The migration state still records it, so models can declare Postgres-only
+    indexes (GIN, triggers via ``RunSQL``) while SQLite test runs migrate cleanly.
+    """
+
+    reduces_to_sql = True
+
+    def __init__(self, operation: Operation) -> None:
+        self.operation = operation
+
+    @property
+    def reversible(self) -> bool:
+        return self.operation.reversible
+
+    def deconstruct(self):
+        return self.__class__.__qualname__, [self.operation], {}
+
+    def state_forwards(self, app_label, state):
+        self.operation.state_forwards(app_label, state)
+
+    def database_forwards(self, app_label, schema_editor, from_state, to_state):
+        if schema_editor.connection.vendor == "postgresql":
+            self.operation.database_forwards(app_label, schema_editor, from_state, to_state)
+
+    def database_backwards(self, app_label, schema_editor, from_state, to_state):
+        if schema_editor.connection.vendor == "postgresql":
+            self.operation.database_backwards(app_label, schema_editor, from_state, to_state)
+
+    def describe(self):
+        return f"{self.operation.describe()} (PostgreSQL only)"
+
+    @property
+    def migration_name_fragment(self):
+        return self.operation.migration_name_fragment
@@ -0,0 +1,82 @@
+from __future__ import annotations
+
+import base64
+import json
+from datetime import datetime
+from typing import Any, Sequence
+
+from django.db.models import Q, QuerySet
+
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+
+
+def _encode(values: list) -> str:
+    raw = json.dumps(values, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).rstrip(b"=").decode()
+
+
+def _decode(cursor: str) -> list:
+    raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+    values = json.loads(raw)
+    if not isinstance(values, list) or len(values) != 2:
+        raise ValueError("Invalid cursor")
+    return values
+
+
+def encode_cursor(created_at: datetime, pk: int) -> str:
+    return _encode([created_at.isoformat(), pk])
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, int]:
+    """Inverse of ``encode_cursor``; raises ``ValueError`` for anything it did not produce."""
+    try:
+        created_at, pk = _decode(cursor)
+        return datetime.fromisoformat(created_at), int(pk)
+    except (TypeError, ValueError, json.JSONDecodeError) as exc:
+        raise ValueError("Invalid cursor") from exc
+
+
+def encode_rank_cursor(rank: float, pk: int) -> str:
+    return _encode([rank, pk])
+
+
+def decode_rank_cursor(cursor: str) -> tuple[float, int]:
+    """Inverse of ``encode_rank_cursor``; raises ``ValueError`` for anything it did not produce."""
+    try:
+        rank, pk = _decode(cursor)
+        if not isinstance(rank, (int, float)) or isinstance(rank, bool):
+            raise ValueError("Invalid cursor")
+        return float(rank), int(pk)
+    except (TypeError, ValueError, json.JSONDecodeError) as exc:
+        raise ValueError("Invalid cursor") from exc
+
+
+def clamp_limit(limit: int | None, default: int = DEFAULT_PAGE_SIZE, maximum: int = MAX_PAGE_SIZE) -> int:
+    if not limit or limit < 1:
+        return default
+    return min(limit, maximum)
+
+
+def keyset_page(
+    queryset: QuerySet,
+    limit: int,
+    cursor: str | None = None,
+    field: str = "created_at",
+) -> tuple[list[Any], str | None]:
+    """Newest-first page of ``queryset`` ordered by ``(field, id)`` after ``cursor``.
+
+    The filter is written as ``field <= ts AND (field < ts OR id < pk)`` so the
+    leading condition bounds an index range scan on ``(field, id)``.
+    Returns the rows and the cursor of the next page (``None`` on the last page).
+    """
+    queryset = queryset.order_by(f"-{field}", "-id")
+    if cursor:
+        created_at, pk = decode_cursor(cursor)
+        queryset = queryset.filter(Q(**{f"{field}__lte": created_at}) & (Q(**{f"{field}__lt": created_at}) | Q(id__lt=pk)))
+    rows: Sequence[Any] = list(queryset[: limit + 1])
+    if len(rows) <= limit:
+        return list(rows), None
+    rows = rows[:limit]
+    last = rows[-1]
+    return list(rows), encode_cursor(getattr(last, field), last.id)
@@ -0,0 +1,71 @@
+from __future__ import annotations
+
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Iterator
+
+from django.db import connections
+from django.db.backends.signals import connection_created
+
+
+@dataclass
+class QueryStats:
+    count: int = 0
+    duration: float = 0.0
+
+
+# Semua blok track_queries yang sedang aktif, dari yang terluar
+_active: ContextVar[tuple[QueryStats, ...]] = ContextVar("query_stats", default=())
+
+
+def _execute_wrapper(execute, sql, params, many, context):
+    active = _active.get()
+    if not active:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        elapsed = time.perf_counter() - started
+        for stats in active:
+            stats.count += 1
+            stats.duration += elapsed
+
+
+def _attach(connection) -> None:
+    if _execute_wrapper not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_execute_wrapper)
+
+
+def _on_connection_created(sender, connection, **kwargs) -> None:
+    _attach(connection)
+
+
+def install() -> None:
+    """Attach the counting wrapper to every database connection opened from now on.
+
+    Call it at startup (the metrics middleware does when it is loaded):
+    connections already open in other threads are not reachable from here.
+    """
+    connection_created.connect(_on_connection_created, dispatch_uid="services.query_tracking")
+    for connection in connections.all(initialized_only=True):
+        _attach(connection)
+
+
+@contextmanager
+def track_queries() -> Iterator[QueryStats]:
+    """Count the queries (and their time) issued inside the block.
+
+    Works across ``sync_to_async`` because asgiref copies the context into the
+    worker thread, so queries run there land on the same ``QueryStats``. Blocks
+    nest: a query counts toward every enclosing block, so the benchmark's
+    per-request totals still see the queries the metrics middleware tracks.
+    """
+    stats = QueryStats()
+    token = _active.set((*_active.get(), stats))
+    try:
+        yield stats
+    finally:
+        _active.reset(token)
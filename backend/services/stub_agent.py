@@ -0,0 +1,203 @@
+from __future__ import annotations
+
+import hashlib
+import logging
+import random
+import threading
+import time
+from dataclasses import dataclass, field
+from types import SimpleNamespace
+from typing import Any, Callable, Iterator
+
+from django.conf import settings
+from pydantic import BaseModel
+
+from services.agents import AgentProviderError
+from services.ai_agent import (
+    AgentResponse,
+    DiagnosisResult,
+    DiagnosticChecklistItem,
+    RecommendationSchema,
+    SourceSchema,
+)
+from services.vision_agent import VisionAnalysis
+
+logger = logging.getLogger(__name__)
+
+# Nilai string sama dengan agno.run.agent.RunEvent, supaya stream_diagnosis tidak perlu tahu provider-nya
+RUN_STARTED = "RunStarted"
+TOOL_CALL_STARTED = "ToolCallStarted"
+TOOL_CALL_COMPLETED = "ToolCallCompleted"
+RUN_COMPLETED = "RunCompleted"
+
+
+class StubProviderError(AgentProviderError):
+    """Injected failure, standing in for a provider outage or timeout."""
+
+
+@dataclass
+class LatencyModel:
+    """Latency in milliseconds drawn from ``fixed``, ``uniform`` or ``lognormal``.
+
+    ``median_ms`` is the typical latency; ``spread`` is the half-width in ms for
+    ``uniform`` and sigma for ``lognormal`` (1.0 gives a long p99 tail).
+    """
+
+    distribution: str = "lognormal"
+    median_ms: float = 800.0
+    spread: float = 0.5
+
+    def sample(self, rng: random.Random) -> float:
+        if self.distribution == "fixed":
+            return self.median_ms
+        if self.distribution == "uniform":
+            return max(0.0, rng.uniform(self.median_ms - self.spread, self.median_ms + self.spread))
+        if self.distribution == "lognormal":
+            return self.median_ms * rng.lognormvariate(0.0, self.spread)
+        raise ValueError(f"Unknown latency distribution '{self.distribution}'")
+
+
+@dataclass
+class StubRunOutput:
+    content: Any
+    run_id: str
+    metrics: dict = field(default_factory=dict)
+
+
+class StubAgent:
+    """Offline stand-in for ``agno.agent.Agent`` used for load tests and benchmarks.
+
+    Content is a deterministic function of the prompt (same input, same
+    answer); latency and injected errors come from a seeded RNG so a benchmark
+    run is reproducible.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        respond: Callable[[str, random.Random], BaseModel],
+        latency: LatencyModel | None = None,
+        error_rate: float | None = None,
+        seed: int | None = None,
+    ) -> None:
+        self.name = name
+        self.respond = respond
+        self.latency = latency or LatencyModel(
+            distribution=settings.LLM_STUB_LATENCY_DISTRIBUTION,
+            median_ms=settings.LLM_STUB_LATENCY_MS,
+            spread=settings.LLM_STUB_LATENCY_SPREAD,
+        )
+        self.error_rate = settings.LLM_STUB_ERROR_RATE if error_rate is None else error_rate
+        self._rng = random.Random(settings.LLM_STUB_SEED if seed is None else seed)
+        self._lock = threading.Lock()
+
+    def _draw(self) -> tuple[float, bool]:
+        with self._lock:
+            return self.latency.sample(self._rng), self._rng.random() < self.error_rate
+
+    def _content(self, message: str) -> BaseModel:
+        digest = hashlib.sha256(f"{self.name}:{message}".encode()).digest()
+        return self.respond(message, random.Random(digest))
+
+    def run(self, message: str, images: Any = None, stream: bool = False, **kwargs: Any):
+        latency_ms, fail = self._draw()
+        run_id = hashlib.sha1(f"{self.name}:{message}:{time.monotonic_ns()}".encode()).hexdigest()[:12]
+        if stream:
+            return self._stream(message, run_id, latency_ms, fail)
+        time.sleep(latency_ms / 1000)
+        if fail:
+            raise StubProviderError(f"Stub {self.name} agent: injected failure")
+        return StubRunOutput(content=self._content(message), run_id=run_id, metrics={"latency_ms": latency_ms})
+
+    def _stream(self, message: str, run_id: str, latency_ms: float, fail: bool) -> Iterator[SimpleNamespace]:
+        tool = SimpleNamespace(tool_name="search_local_evidence", tool_args={"query": message[:60]})
+        yield SimpleNamespace(event=RUN_STARTED, run_id=run_id, content=None, tool=None)
+        time.sleep(latency_ms / 3000)
+        yield SimpleNamespace(event=TOOL_CALL_STARTED, run_id=run_id, content=None, tool=tool)
+        time.sleep(latency_ms / 3000)
+        yield SimpleNamespace(event=TOOL_CALL_COMPLETED, run_id=run_id, content=None, tool=tool)
+        time.sleep(latency_ms / 3000)
+        if fail:
+            raise StubProviderError(f"Stub {self.name} agent: injected failure")
+        yield SimpleNamespace(event=RUN_COMPLETED, run_id=run_id, content=self._content(message), tool=None)
+
+
+STUB_ISSUES = [
+    ("Antraknosa", "buah"),
+    ("Bercak daun Cercospora", "daun"),
+    ("Busuk pangkal batang", "batang"),
+    ("Serangan kutu daun", "daun"),
+]
+STUB_SOURCES = [
+    SourceSchema(
+        title="Plant Protection and Production Guidelines",
+        url="https://www.fao.org/plant-production-protection",
+        source="FAO",
+        publishedAt="2023-01-01",
+        summary="Panduan umum pengendalian penyakit tanaman secara terpadu.",
+    ),
+    SourceSchema(
+        title="Pengendalian Hama dan Penyakit Terpadu",
+        url="https://www.litbang.pertanian.go.id",
+        source="Balitbangtan",
+        publishedAt=None,
+        summary="Praktik budaya dan bahan aktif yang terdaftar untuk tanaman hortikultura.",
+    ),
+]
+
+
+def stub_agent_response(message: str, rng: random.Random) -> AgentResponse:
+    confirmed = []
+    for line in message.split("Gejala ditolak", 1)[0].splitlines():
+        if line.startswith("- ") and line != "- (tidak ada)":
+            confirmed.append(line[2:])
+    issue, plant_part = rng.choice(STUB_ISSUES)
+    return AgentResponse(
+        diagnosis=DiagnosisResult(
+            issue=issue,
+            confidence=round(rng.uniform(0.5, 0.9), 2),
+            summary=f"Gejala yang dikonfirmasi konsisten dengan {issue.lower()} (hasil stub).",
+            plantPart=plant_part,
+        ),
+        checklist=[
+            DiagnosticChecklistItem(symptom=symptom, aiDetected=True, userConfirmed=True) for symptom in confirmed
+        ],
+        recommendations=[
+            RecommendationSchema(
+                type="non_chemical",
+                title="Sanitasi kebun",
+                instructions="Buang dan musnahkan bagian tanaman yang terinfeksi.",
+                references=[0],
+            ),
+            RecommendationSchema(
+                type="active_ingredient",
+                title="Fungisida berbahan aktif mankozeb",
+                instructions="Semprot sesuai dosis label setiap 7 hari.",
+                caution="Gunakan APD dan patuhi masa tunggu panen.",
+                references=[1],
+            ),
+        ],
+        sources=STUB_SOURCES,
+        consensusScore=1.0,
+        followUpQuestions=["Apakah gejala menyebar ke tanaman di sekitarnya?"],
+    )
+
+
+STUB_CATALOGUE = [
+    ("Cabai", ["Antraknosa", "Bercak daun Cercospora"], ["bercak cokelat cekung pada buah", "daun menguning"]),
+    ("Tomat", ["Busuk daun (late blight)", "Layu Fusarium"], ["bercak basah pada daun", "batang layu"]),
+    ("Padi", ["Blas", "Hawar daun bakteri"], ["bercak belah ketupat pada daun", "ujung daun mengering"]),
+    ("Jagung", ["Bulai", "Karat daun"], ["garis klorotik pada daun", "pustul oranye pada daun"]),
+]
+
+
+def stub_vision_analysis(message: str, rng: random.Random) -> VisionAnalysis:
+    plant, issues, symptoms = rng.choice(STUB_CATALOGUE)
+    return VisionAnalysis(
+        plantName=plant,
+        probableIssues=issues,
+        symptoms=symptoms,
+        summary=f"Terlihat gejala yang mengarah ke {issues[0].lower()} pada {plant.lower()} (hasil stub).",
+        confidence=round(rng.uniform(0.55, 0.95), 2),
+        recommendations=["Pisahkan tanaman yang bergejala", "Pantau perkembangan gejala 3 hari ke depan"],
+    )
@@ -0,0 +1,631 @@
+import asyncio
+import json
+import os
+import random
+import subprocess
+import sys
+import threading
+import time
+import uuid
+from datetime import timedelta
+from unittest import mock, skipUnless
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.utils import timezone
+from ninja_jwt.tokens import RefreshToken
+from prometheus_client import REGISTRY
+
+from community.models import CommunityPost
+from community.services import search_posts
+from diagnosis.models import Diagnosis
+from logs.models import LogEntry
+from vision.models import ScanSession
+
+from . import agents
+from .agents import AgentProviderError, get_agent, register_agent, reset_agents
+from .ai_agent import build_diagnosis_prompt, stream_diagnosis
+from .evidence_index import EvidenceIndex, tokenize
+from .evidence_tools import LocalEvidenceTools
+from .llm_scheduler import LLMQueueFull, LLMScheduler, Priority, SharedSlots
+from .metrics import DB_QUERIES, HTTP_REQUEST_DURATION, LLM_CALLS
+from .pagination import (
+    clamp_limit,
+    decode_cursor,
+    decode_rank_cursor,
+    encode_cursor,
+    encode_rank_cursor,
+    keyset_page,
+)
+from .query_tracking import install as install_query_tracking, track_queries
+from .stub_agent import (
+    RUN_COMPLETED,
+    RUN_STARTED,
+    TOOL_CALL_COMPLETED,
+    TOOL_CALL_STARTED,
+    LatencyModel,
+    StubAgent,
+    stub_agent_response,
+)
+from .tool_cache import ToolResultCache, cached_toolkit
+
+User = get_user_model()
+
+
+class CursorEncodingTests(SimpleTestCase):
+    def test_keyset_cursor_round_trips(self):
+        moment = timezone.now()
+        self.assertEqual(decode_cursor(encode_cursor(moment, 42)), (moment, 42))
+
+    def test_malformed_cursors_are_rejected(self):
+        for cursor in ("xx", "", encode_cursor(timezone.now(), 1)[:-4]):
+            with self.subTest(cursor=cursor):
+                with self.assertRaises(ValueError):
+                    decode_cursor(cursor)
+
+    def test_rank_cursor_round_trips_floats_exactly(self):
+        for rank in (0.0607927, 1e-20, 0.1 + 0.2, 1.0):
+            with self.subTest(rank=rank):
+                self.assertEqual(decode_rank_cursor(encode_rank_cursor(rank, 7)), (rank, 7))
+
+    def test_cursors_of_the_other_kind_are_rejected(self):
+        keyset = encode_cursor(timezone.now(), 1)
+        rank = encode_rank_cursor(0.5, 1)
+        for decode, cursor in ((decode_rank_cursor, keyset), (decode_cursor, rank), (decode_rank_cursor, "")):
+            with self.subTest(decode=decode.__name__, cursor=cursor):
+                with self.assertRaises(ValueError):
+                    decode(cursor)
+
+    def test_clamp_limit(self):
+        self.assertEqual(clamp_limit(None), 20)
+        self.assertEqual(clamp_limit(0), 20)
+        self.assertEqual(clamp_limit(5), 5)
+        self.assertEqual(clamp_limit(500), 100)
+
+
+class KeysetPageTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        user = User.objects.create_user(email="log@example.com", password="x", username="log")
+        moment = timezone.now()
+        # Tiga entri berbagi waktu yang sama persis di tengah urutan
+        offsets = [0, 1, 1, 1, 2, 3]
+        LogEntry.objects.bulk_create(
+            LogEntry(user=user, title=f"Log {n}", note="", category="watering", performed_at=moment - timedelta(hours=offset))
+            for n, offset in enumerate(offsets)
+        )
+        cls.expected = list(LogEntry.objects.order_by("-performed_at", "-id").values_list("id", flat=True))
+
+    def walk(self, limit: int) -> list[list[int]]:
+        pages, cursor = [], None
+        while True:
+            rows, cursor = keyset_page(LogEntry.objects.all(), limit, cursor, field="performed_at")
+            pages.append([row.id for row in rows])
+            if cursor is None:
+                return pages
+
+    def test_every_page_size_visits_each_row_once(self):
+        for limit in range(1, len(self.expected) + 2):
+            with self.subTest(limit=limit):
+                pages = self.walk(limit)
+                self.assertEqual([pk for page in pages for pk in page], self.expected)
+                self.assertTrue(all(len(page) == limit for page in pages[:-1]))
+                self.assertTrue(pages[-1])
+
+    def test_cursor_on_a_tie_continues_inside_the_tie(self):
+        rows, cursor = keyset_page(LogEntry.objects.all(), 2, field="performed_at")
+        self.assertEqual([row.id for row in rows], self.expected[:2])
+        rows, _ = keyset_page(LogEntry.objects.all(), 2, cursor, field="performed_at")
+        self.assertEqual([row.id for row in rows], self.expected[2:4])
+
+
+@skipUnless(connection.vendor == "postgresql", "Rank cursors need PostgreSQL full-text search.")
+class RankCursorTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        user = User.objects.create_user(email="cari@example.com", password="x", username="cari")
+        # Isi identik memberi rank yang sama, jadi urutan di dalamnya hanya ditentukan id
+        bodies = ["daun cabai menguning"] * 4 + ["daun cabai menguning dan daun rontok"] * 2 + ["cabai berbuah"]
+        CommunityPost.objects.bulk_create(CommunityPost(user=user, title="Cabai", body=body) for body in bodies)
+
+    def walk(self, limit: int) -> list[list[int]]:
+        pages, cursor = [], None
+        while True:
+            ids, cursor = search_posts("daun", [], limit, cursor)
+            pages.append(ids)
+            if cursor is None:
+                return pages
+
+    def test_pages_cover_tied_ranks_exactly_once(self):
+        expected = search_posts("daun", [], 100)[0]
+        self.assertEqual(len(expected), 6)
+        for limit in range(1, 8):
+            with self.subTest(limit=limit):
+                pages = self.walk(limit)
+                self.assertEqual([pk for page in pages for pk in page], expected)
+                self.assertTrue(all(len(page) == limit for page in pages[:-1]))
+
+
+def _scheduler(max_in_flight: int = 1, max_queue: int = 8, queue_timeout: float = 5.0, global_limit: int = 0, slots=None):
+    return LLMScheduler(
+        max_in_flight=max_in_flight,
+        max_queue=max_queue,
+        queue_timeout=queue_timeout,
+        shared_slots=slots or SharedSlots(prefix=f"test:llm:{uuid.uuid4().hex}", limit=global_limit),
+    )
+
+
+class Gate:
+    """A blocking "LLM call" that runs until the test opens the gate."""
+
+    def __init__(self) -> None:
+        self.started = threading.Event()
+        self.opened = threading.Event()
+        self.finished = threading.Event()
+
+    def __call__(self, result="ok"):
+        self.started.set()
+        self.opened.wait(5)
+        self.finished.set()
+        return result
+
+    async def wait_started(self) -> None:
+        if not await asyncio.to_thread(self.started.wait, 5):
+            raise AssertionError("call did not start")
+
+
+async def _until(predicate, timeout: float = 5.0) -> None:
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not predicate():
+        if asyncio.get_running_loop().time() > deadline:
+            raise AssertionError("condition not reached")
+        await asyncio.sleep(0.01)
+
+
+class LLMSchedulerTests(SimpleTestCase):
+    async def test_run_returns_the_call_result(self):
+        scheduler = _scheduler()
+        self.assertEqual(await scheduler.run(lambda a, b=0: a + b, 2, b=3), 5)
+        self.assertEqual((scheduler.in_flight, scheduler.queued), (0, 0))
+
+    async def test_full_queue_is_rejected_immediately(self):
+        scheduler = _scheduler(max_in_flight=1, max_queue=1)
+        gate = Gate()
+        running = asyncio.create_task(scheduler.run(gate))
+        await gate.wait_started()
+        queued = asyncio.create_task(scheduler.run(lambda: "queued"))
+        await _until(lambda: scheduler.queued == 1)
+
+        with self.assertRaises(LLMQueueFull) as raised:
+            await scheduler.run(lambda: "rejected")
+        self.assertGreaterEqual(raised.exception.retry_after, 1)
+
+        gate.opened.set()
+        self.assertEqual(await running, "ok")
+        self.assertEqual(await queued, "queued")
+        self.assertEqual((scheduler.in_flight, scheduler.queued), (0, 0))
+
+    async def test_waiting_past_the_queue_timeout_is_rejected(self):
+        scheduler = _scheduler(max_in_flight=1, queue_timeout=0.1)
+        gate = Gate()
+        running = asyncio.create_task(scheduler.run(gate))
+        await gate.wait_started()
+        with self.assertRaises(LLMQueueFull):
+            await scheduler.run(lambda: "late")
+        self.assertEqual(scheduler.queued, 0)
+        gate.opened.set()
+        await running
+
+    async def test_queued_calls_are_ordered_by_priority_then_per_user_load(self):
+        scheduler = _scheduler(max_in_flight=1)
+        gate = Gate()
+        order: list[str] = []
+        running = asyncio.create_task(scheduler.run(gate, user_id="other"))
+        await gate.wait_started()
+
+        def submit(label: str, user_id: str, priority: Priority = Priority.INTERACTIVE):
+            return asyncio.create_task(scheduler.run(order.append, label, user_id=user_id, priority=priority))
+
+        tasks = [submit("background", "batch", Priority.BACKGROUND)]
+        await _until(lambda: scheduler.queued == 1)
+        for label in ("a1", "a2", "a3"):
+            tasks.append(submit(label, "alice"))
+            await _until(lambda: scheduler.queued == len(tasks))
+        tasks.append(submit("b1", "bob"))
+        await _until(lambda: scheduler.queued == len(tasks))
+
+        gate.opened.set()
+        await asyncio.gather(running, *tasks)
+        # Burst alice tidak boleh membuat bob menunggu di belakang semua permintaannya
+        self.assertEqual(order, ["a1", "b1", "a2", "a3", "background"])
+
+    async def test_cancelled_call_keeps_its_slot_until_the_thread_returns(self):
+        scheduler = _scheduler(max_in_flight=1)
+        gate = Gate()
+        abandoned = asyncio.create_task(scheduler.run(gate))
+        await gate.wait_started()
+        follower_ran = threading.Event()
+        follower = asyncio.create_task(scheduler.run(follower_ran.set))
+        await _until(lambda: scheduler.queued == 1)
+
+        abandoned.cancel()
+        await asyncio.sleep(0.05)
+        self.assertFalse(abandoned.done())
+        self.assertEqual(scheduler.in_flight, 1)
+        self.assertFalse(follower_ran.is_set())
+
+        gate.opened.set()
+        with self.assertRaises(asyncio.CancelledError):
+            await abandoned
+        self.assertTrue(gate.finished.is_set())
+        await follower
+        self.assertTrue(follower_ran.is_set())
+        self.assertEqual((scheduler.in_flight, scheduler.queued), (0, 0))
+
+    async def test_shared_slots_cap_calls_across_schedulers(self):
+        slots = SharedSlots(prefix=f"test:llm:{uuid.uuid4().hex}", limit=1)
+        first, second = _scheduler(max_in_flight=2, slots=slots), _scheduler(max_in_flight=2, slots=slots)
+        gate = Gate()
+        running = asyncio.create_task(first.run(gate))
+        await gate.wait_started()
+
+        waiting = asyncio.create_task(second.run(lambda: "second"))
+        await asyncio.sleep(0.2)
+        self.assertFalse(waiting.done())
+
+        gate.opened.set()
+        await running
+        self.assertEqual(await waiting, "second")
+
+    async def test_shared_slot_timeout_frees_the_local_slot(self):
+        slots = SharedSlots(prefix=f"test:llm:{uuid.uuid4().hex}", limit=1)
+        holder, scheduler = _scheduler(slots=slots), _scheduler(queue_timeout=0.2, slots=slots)
+        gate = Gate()
+        running = asyncio.create_task(holder.run(gate))
+        await gate.wait_started()
+
+        with self.assertRaises(LLMQueueFull):
+            await scheduler.run(lambda: "never")
+        self.assertEqual(scheduler.in_flight, 0)
+        gate.opened.set()
+        await running
+
+    async def test_cancelled_shared_slot_is_released_after_the_thread_returns(self):
+        slots = SharedSlots(prefix=f"test:llm:{uuid.uuid4().hex}", limit=1)
+        first, second = _scheduler(slots=slots), _scheduler(slots=slots)
+        gate = Gate()
+        abandoned = asyncio.create_task(first.run(gate))
+        await gate.wait_started()
+        abandoned.cancel()
+        await asyncio.sleep(0.05)
+
+        waiting = asyncio.create_task(second.run(lambda: "second"))
+        await asyncio.sleep(0.2)
+        self.assertFalse(waiting.done(), "the global slot was released while the call still ran")
+        gate.opened.set()
+        with self.assertRaises(asyncio.CancelledError):
+            await abandoned
+        self.assertEqual(await waiting, "second")
+
+
+class StubAgentTests(SimpleTestCase):
+    def agent(self, error_rate: float = 0.0) -> StubAgent:
+        return StubAgent("diagnosis", stub_agent_response, latency=LatencyModel("fixed", 0.0), error_rate=error_rate)
+
+    def test_answers_are_a_function_of_the_prompt(self):
+        prompt = build_diagnosis_prompt(["daun menguning", "bercak cokelat"], [])
+        first, second = self.agent().run(prompt).content, self.agent().run(prompt).content
+        self.assertEqual(first, second)
+        self.assertEqual([item.symptom for item in first.checklist], ["daun menguning", "bercak cokelat"])
+
+    def test_injected_failures_are_provider_errors(self):
+        with self.assertRaises(AgentProviderError):
+            self.agent(error_rate=1.0).run("prompt")
+        events = self.agent(error_rate=1.0).run("prompt", stream=True)
+        with self.assertRaises(AgentProviderError):
+            list(events)
+
+    def test_stream_mirrors_agno_run_events(self):
+        from agno.run.agent import RunEvent
+
+        events = [event.event for event in self.agent().run("prompt", stream=True)]
+        self.assertEqual(events, [RUN_STARTED, TOOL_CALL_STARTED, TOOL_CALL_COMPLETED, RUN_COMPLETED])
+        self.assertEqual(
+            events,
+            [RunEvent.run_started.value, RunEvent.tool_call_started.value, RunEvent.tool_call_completed.value, RunEvent.run_completed.value],
+        )
+
+    def test_latency_models(self):
+        rng = random.Random(1)
+        self.assertEqual(LatencyModel("fixed", 250.0).sample(rng), 250.0)
+        self.assertTrue(all(150 <= LatencyModel("uniform", 200.0, 50.0).sample(rng) <= 250 for _ in range(100)))
+        self.assertTrue(all(LatencyModel("lognormal", 200.0, 1.0).sample(rng) > 0 for _ in range(100)))
+        with self.assertRaises(ValueError):
+            LatencyModel("pareto").sample(rng)
+
+    @override_settings(LLM_PROVIDER="stub", LLM_STUB_LATENCY_DISTRIBUTION="fixed", LLM_STUB_LATENCY_MS=0, LLM_STUB_ERROR_RATE=0.0)
+    def test_stub_provider_drives_the_diagnosis_stream(self):
+        reset_agents()
+        self.addCleanup(reset_agents)
+        self.assertIsInstance(get_agent("diagnosis"), StubAgent)
+
+        events = list(stream_diagnosis(["daun menguning"], ["akar busuk"], plant_name="Cabai"))
+        self.assertEqual(
+            [data["stage"] for kind, data in events if kind == "progress"],
+            ["started", "tool_started", "tool_completed"],
+        )
+        kind, result = events[-1]
+        self.assertEqual(kind, "result")
+        self.assertEqual([item.symptom for item in result.checklist], ["daun menguning"])
+
+
+class SearchTool:
+    """Stands in for an agno search function and counts how often it really runs."""
+
+    def __init__(self, result: str = "hasil"):
+        self.result = result
+        self.queries: list[str] = []
+
+    def __call__(self, query: str, max_results: int = 5) -> str:
+        self.queries.append(query)
+        return f"{self.result}: {query}"
+
+
+class ToolResultCacheTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        self.prefix = f"test:tools:{uuid.uuid4().hex}"
+
+    def tool_cache(self, **kwargs) -> ToolResultCache:
+        return ToolResultCache(**{"ttl": 60, "maxsize": 16, "use_shared": False, "prefix": self.prefix, **kwargs})
+
+    def test_queries_are_normalized_into_one_key(self):
+        tool_cache = self.tool_cache()
+        search = SearchTool()
+        wrapped = tool_cache.wrap("web.search", search)
+
+        first = wrapped("Bercak  daun cabai")
+        self.assertEqual(wrapped(" bercak daun CABAI", max_results=5), first)
+        self.assertEqual(wrapped(query="bercak daun cabai"), first)
+        wrapped("bercak daun cabai", max_results=10)
+        self.assertEqual(search.queries, ["Bercak  daun cabai", "bercak daun cabai"])
+        self.assertNotEqual(tool_cache.make_key("web.search", {"query": "x"}), tool_cache.make_key("arxiv.search", {"query": "x"}))
+        self.assertEqual(tool_cache.stats.snapshot(), {"hits": 2, "misses": 2, "hitRatio": 0.5})
+
+    def test_empty_results_are_not_cached(self):
+        queries: list[str] = []
+
+        def search(query: str) -> str:
+            queries.append(query)
+            return "  "
+
+        wrapped = self.tool_cache().wrap("web.search", search)
+        wrapped("blast padi")
+        wrapped("blast padi")
+        self.assertEqual(len(queries), 2)
+
+    def test_least_recently_used_results_are_evicted(self):
+        search = SearchTool()
+        wrapped = self.tool_cache(maxsize=2).wrap("web.search", search)
+        for query in ("blast padi", "wereng", "blast padi", "kresek"):
+            wrapped(query)
+        wrapped("blast padi")
+        wrapped("wereng")
+        self.assertEqual(search.queries, ["blast padi", "wereng", "kresek", "wereng"])
+
+    def test_shared_tier_serves_other_processes(self):
+        search = SearchTool()
+        self.tool_cache(use_shared=True).wrap("web.search", search)("blast padi")
+        other = self.tool_cache(use_shared=True).wrap("web.search", search)
+        self.assertEqual(other("Blast Padi"), "hasil: blast padi")
+        self.assertEqual(search.queries, ["blast padi"])
+
+    def test_cached_toolkit_wraps_every_function(self):
+        from agno.tools import Toolkit
+
+        search = SearchTool()
+
+        def search_web(query: str, max_results: int = 5) -> str:
+            """Search the web."""
+            return search(query, max_results)
+
+        toolkit = cached_toolkit(Toolkit(name="web", tools=[search_web]), self.tool_cache())
+        entrypoint = toolkit.functions["search_web"].entrypoint
+        entrypoint("Wereng coklat")
+        entrypoint("wereng  coklat")
+        self.assertEqual(search.queries, ["Wereng coklat"])
+
+
+def _source(slug: str, title: str, summary: str = "", source: str = "Balitbangtan") -> dict:
+    return {"title": title, "url": f"https://example.org/{slug}", "source": source, "summary": summary}
+
+
+class EvidenceIndexTests(SimpleTestCase):
+    def setUp(self):
+        self.index = EvidenceIndex()
+        self.index.add_sources(
+            [
+                _source("antraknosa", "Antraknosa pada cabai", "Bercak cekung hitam pada buah cabai."),
+                _source("blast", "Blast padi", "Bercak belah ketupat pada daun padi."),
+                _source("wereng", "Wereng coklat", "Hama pengisap batang padi; gejala mirip bercak pada daun."),
+                _source("layu", "Layu fusarium tomat", "Daun menguning lalu layu dari bawah."),
+            ]
+        )
+
+    def urls(self, query: str) -> list[str]:
+        return [document.url.rsplit("/", 1)[1] for _, document in self.index.search(query)]
+
+    def test_ranks_the_closest_source_first(self):
+        self.assertEqual(self.urls("bercak hitam pada buah cabai")[0], "antraknosa")
+        self.assertEqual(self.urls("padi")[:2], ["blast", "wereng"])
+        # Kata yang tidak ada di indeks tidak mengubah urutan
+        self.assertEqual(self.urls("kutu daun jeruk"), self.urls("daun"))
+        self.assertEqual(self.urls("kentang"), [])
+
+    def test_titles_outweigh_summaries(self):
+        self.index.add_sources([_source("bercak", "Bercak daun", "Gejala umum.")])
+        self.assertEqual(self.urls("bercak")[0], "bercak")
+
+    def test_stopwords_and_duplicates_are_ignored(self):
+        self.assertEqual(tokenize("Bercak DAUN dan yang di batang"), ["bercak", "daun", "batang"])
+        self.assertEqual(self.urls("dan yang di"), [])
+        self.assertEqual(self.index.add_sources([_source("blast", "Blast padi"), {"title": "Tanpa URL"}]), 0)
+        self.assertEqual(len(self.index), 4)
+
+
+class EvidenceRefreshTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(email="petani@example.com", password="x", username="petani")
+        self.scan = ScanSession.objects.create(user=self.user, image="scans/daun.jpg")
+
+    def diagnose(self, *sources: dict) -> None:
+        Diagnosis.objects.create(user=self.user, scan=self.scan, issue="Antraknosa", sources=list(sources))
+
+    def test_refresh_only_reads_new_diagnoses(self):
+        index = EvidenceIndex()
+        self.diagnose(_source("antraknosa", "Antraknosa pada cabai"), _source("blast", "Blast padi"))
+        self.assertEqual(index.refresh(), 2)
+        with self.assertNumQueries(1):
+            self.assertEqual(index.refresh(), 0)
+        self.diagnose(_source("blast", "Blast padi"), _source("wereng", "Wereng coklat"))
+        self.assertEqual(index.refresh(), 1)
+        self.assertEqual(len(index), 3)
+
+    def test_tool_returns_scored_json(self):
+        self.diagnose(_source("antraknosa", "Antraknosa pada cabai", "Bercak cekung pada buah."))
+        tools = LocalEvidenceTools(index=EvidenceIndex())
+        results = json.loads(tools.search_local_evidence("antraknosa cabai", max_results=3))
+        self.assertEqual([result["url"] for result in results], ["https://example.org/antraknosa"])
+        self.assertGreater(results[0]["score"], 0)
+
+        with (
+            mock.patch.object(tools.index, "refresh", side_effect=RuntimeError("db down")),
+            override_settings(EVIDENCE_INDEX_REFRESH_INTERVAL=-1),
+            self.assertLogs("services.evidence_tools", "WARNING"),
+        ):
+            self.assertEqual(len(json.loads(tools.search_local_evidence("antraknosa"))), 1)
+
+
+class AgentRegistryTests(SimpleTestCase):
+    def setUp(self):
+        self.enterContext(mock.patch.dict(agents._builders))
+        reset_agents()
+        self.addCleanup(reset_agents)
+        self.builds = 0
+
+        @register_agent("uji", provider="uji")
+        def build():
+            self.builds += 1
+            time.sleep(0.05)
+            return object()
+
+    def test_agents_are_built_once_on_first_use(self):
+        self.assertEqual(self.builds, 0)
+        agent = get_agent("uji", provider="uji")
+        self.assertIs(get_agent("uji", provider="uji"), agent)
+        reset_agents()
+        self.assertIsNot(get_agent("uji", provider="uji"), agent)
+        self.assertEqual(self.builds, 2)
+
+    def test_concurrent_first_calls_share_one_build(self):
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(get_agent("uji", provider="uji"))) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual((self.builds, len({id(agent) for agent in results})), (1, 1))
+
+    def test_unknown_agents_are_a_lookup_error(self):
+        with self.assertRaises(LookupError):
+            get_agent("uji", provider="gemini")
+        with override_settings(LLM_PROVIDER="uji"), self.assertRaises(LookupError):
+            get_agent("diagnosis")
+
+    def test_loading_the_urls_does_not_import_the_agent_sdks(self):
+        script = (
+            "import sys, django; django.setup(); import config.urls; "
+            "print([name for name in ('agno', 'google.genai', 'ddgs', 'arxiv') if name in sys.modules])"
+        )
+        completed = subprocess.run(
+            [sys.executable, "-c", script],
+            cwd=settings.BASE_DIR,
+            env=os.environ,
+            capture_output=True,
+            text=True,
+            timeout=60,
+        )
+        self.assertEqual(completed.returncode, 0, completed.stderr)
+        self.assertEqual(completed.stdout.strip(), "[]")
+
+
+def _sample(name: str, **labels) -> float:
+    return REGISTRY.get_sample_value(name, labels) or 0.0
+
+
+class QueryTrackingTests(TestCase):
+    def setUp(self):
+        install_query_tracking()
+
+    def test_nested_blocks_all_count_their_queries(self):
+        with track_queries() as outer:
+            User.objects.count()
+            with track_queries() as inner:
+                User.objects.count()
+                User.objects.exists()
+        User.objects.count()
+        self.assertEqual((outer.count, inner.count), (3, 2))
+        self.assertGreater(outer.duration, 0)
+
+    async def test_queries_in_sync_to_async_are_counted(self):
+        with track_queries() as stats:
+            await sync_to_async(User.objects.count)()
+        self.assertEqual(stats.count, 1)
+
+
+class MetricsEndpointTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(email="petani@example.com", password="x", username="petani")
+        self.headers = {"Authorization": f"Bearer {RefreshToken.for_user(self.user).access_token}"}
+
+    def test_requests_are_measured_per_route(self):
+        labels = {"method": "GET", "route": "api/community/posts", "status": "200"}
+        before = _sample("plantify_http_request_duration_seconds_count", **labels)
+        queries = _sample("plantify_db_queries_per_request_sum", route="api/community/posts")
+        self.assertEqual(self.client.get("/api/community/posts", headers=self.headers).status_code, 200)
+        self.assertEqual(_sample("plantify_http_request_duration_seconds_count", **labels), before + 1)
+        self.assertGreater(_sample("plantify_db_queries_per_request_sum", route="api/community/posts"), queries)
+
+        response = self.client.get("/api/metrics")
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response["Content-Type"].startswith("text/plain"))
+        body = response.content.decode()
+        for name in (HTTP_REQUEST_DURATION, DB_QUERIES, LLM_CALLS):
+            self.assertIn(f"# TYPE {name._name}", body)
+        self.assertIn('route="api/community/posts"', body)
+
+    @override_settings(METRICS_AUTH_TOKEN="rahasia")
+    def test_scrape_token(self):
+        self.assertEqual(self.client.get("/api/metrics").status_code, 401)
+        self.assertEqual(self.client.get("/api/metrics", headers={"Authorization": "Bearer salah"}).status_code, 401)
+        self.assertEqual(self.client.get("/api/metrics", headers={"Authorization": "Bearer rahasia"}).status_code, 200)
+
+    async def test_llm_calls_are_counted_by_outcome(self):
+        def diagnose():
+            return "ok"
+
+        def broken():
+            raise RuntimeError("provider down")
+
+        scheduler = _scheduler()
+        ok = _sample("plantify_llm_calls_total", call="diagnose", outcome="ok")
+        error = _sample("plantify_llm_calls_total", call="broken", outcome="error")
+        await scheduler.run(diagnose)
+        with self.assertRaises(RuntimeError):
+            await scheduler.run(broken)
+        self.assertEqual(_sample("plantify_llm_calls_total", call="diagnose", outcome="ok"), ok + 1)
+        self.assertEqual(_sample("plantify_llm_calls_total", call="broken", outcome="error"), error + 1)
@@ -0,0 +1,139 @@
+from __future__ import annotations
+
+import functools
+import hashlib
+import inspect
+import json
+import logging
+import threading
+from typing import Any, Callable
+
+from cachetools import TTLCache
+from django.conf import settings
+from django.core.cache import caches
+
+from .cache_stats import CacheStats
+
+logger = logging.getLogger(__name__)
+
+
+def _normalize(value: Any) -> Any:
+    if isinstance(value, str):
+        return " ".join(value.split()).casefold()
+    if isinstance(value, (list, tuple)):
+        return [_normalize(item) for item in value]
+    return value
+
+
+class ToolResultCache:
+    """Two-tier cache for search tool results.
+
+    A size-bounded in-process LRU with TTL answers repeated queries without any
+    I/O; the shared Redis cache (optional) lets every process reuse results the
+    others already fetched.
+    """
+
+    def __init__(
+        self,
+        maxsize: int | None = None,
+        ttl: int | None = None,
+        use_shared: bool | None = None,
+        alias: str = "default",
+        prefix: str = "tools:result",
+    ) -> None:
+        self._maxsize = maxsize
+        self._ttl = ttl
+        self._use_shared = use_shared
+        self.alias = alias
+        self.prefix = prefix
+        self.stats = CacheStats(prefix, alias=alias)
+        self._lock = threading.Lock()
+        self._local: TTLCache | None = None
+
+    @property
+    def ttl(self) -> int:
+        return self._ttl if self._ttl is not None else settings.TOOL_CACHE_TTL
+
+    @property
+    def use_shared(self) -> bool:
+        return self._use_shared if self._use_shared is not None else settings.TOOL_CACHE_USE_REDIS
+
+    @property
+    def local(self) -> TTLCache:
+        if self._local is None:
+            self._local = TTLCache(maxsize=self._maxsize or settings.TOOL_CACHE_MAXSIZE, ttl=self.ttl)
+        return self._local
+
+    def make_key(self, tool_name: str, arguments: dict[str, Any]) -> str:
+        canonical = json.dumps(
+            {name: _normalize(value) for name, value in arguments.items()},
+            sort_keys=True,
+            ensure_ascii=False,
+            default=str,
+        )
+        digest = hashlib.sha1(canonical.encode("utf-8")).hexdigest()
+        return f"{self.prefix}:{tool_name}:{digest}"
+
+    def get(self, key: str) -> str | None:
+        with self._lock:
+            value = self.local.get(key)
+        if value is None and self.use_shared:
+            try:
+                value = caches[self.alias].get(key)
+            except Exception as exc:
+                logger.warning("Shared tool cache lookup failed: %s", exc)
+            if value is not None:
+                with self._lock:
+                    self.local[key] = value
+        if value is None:
+            self.stats.miss()
+        else:
+            self.stats.hit()
+        return value
+
+    def set(self, key: str, value: str) -> None:
+        with self._lock:
+            self.local[key] = value
+        if self.use_shared:
+            try:
+                caches[self.alias].set(key, value, timeout=self.ttl)
+            except Exception as exc:
+                logger.warning("Shared tool cache store failed: %s", exc)
+
+    def clear(self) -> None:
+        with self._lock:
+            self.local.clear()
+
+    def wrap(self, tool_name: str, func: Callable[..., Any]) -> Callable[..., Any]:
+        signature = inspect.signature(func)
+
+        @functools.wraps(func)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            try:
+                bound = signature.bind(*args, **kwargs)
+            except TypeError:
+                return func(*args, **kwargs)
+            bound.apply_defaults()
+            key = self.make_key(tool_name, bound.arguments)
+
+            cached = self.get(key)
+            if cached is not None:
+                return cached
+            result = func(*args, **kwargs)
+            if isinstance(result, str) and result.strip():
+                self.set(key, result)
+            return result
+
+        return wrapper
+
+
+tool_result_cache = ToolResultCache()
+
+
+def cached_toolkit(toolkit, cache: ToolResultCache | None = None):
+    """Route every function registered on an agno toolkit through the tool result cache."""
+    cache = cache or tool_result_cache
+    for function in toolkit.functions.values():
+        if function.entrypoint is not None:
+            function.entrypoint = cache.wrap(f"{toolkit.name}.{function.name}", function.entrypoint)
+    return toolkit
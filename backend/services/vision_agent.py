@@ -3,15 +3,12 @@ from __future__ import annotations
 import os
 from typing import List, Optional
 
-from agno.agent import Agent
-from agno.media import Image
-from agno.models.google import Gemini
-from agno.tools.arxiv import ArxivTools
-from agno.tools.duckduckgo import DuckDuckGoTools
-from agno.tools.googlesearch import GoogleSearchTools
+from django.conf import settings
 from dotenv import load_dotenv
 from pydantic import BaseModel, Field, ValidationError
 
+from services.agents import AgentProviderError, get_agent, register_agent
+
 load_dotenv()
 
 
@@ -39,11 +36,21 @@ Data tambahan pengguna:
 - Lokasi/negara: {country}
 """
 
-vision_agent = Agent(
-    model=Gemini(id="gemini-2.0-flash", api_key=os.getenv("GEMINI_API_KEY")),
-    output_schema=VisionAnalysis,
-    description="Kombinasikan analisis visual dan catatan pengguna untuk menyusun gejala tanaman.",
-    instructions="""Kembalikan JSON dengan fields:
+@register_agent("vision")
+def build_vision_agent():
+    from agno.agent import Agent
+    from agno.models.google import Gemini
+    from agno.tools.arxiv import ArxivTools
+    from agno.tools.duckduckgo import DuckDuckGoTools
+    from agno.tools.googlesearch import GoogleSearchTools
+
+    from services.tool_cache import cached_toolkit
+
+    return Agent(
+        model=Gemini(id=settings.LLM_MODEL_ID, api_key=os.getenv("GEMINI_API_KEY")),
+        output_schema=VisionAnalysis,
+        description="Kombinasikan analisis visual dan catatan pengguna untuk menyusun gejala tanaman.",
+        instructions="""Kembalikan JSON dengan fields:
 - plantName: nama tanaman (atau null jika tidak yakin)
 - probableIssues: array penyakit/hama potensial
 - symptoms: daftar gejala singkat berbasis observasi visual
@@ -51,16 +58,33 @@ vision_agent = Agent(
 - confidence: angka 0-1 yang menggambarkan keyakinan
 - recommendations: tips singkat lanjutan (opsional)
 Pastikan bahasa output mengikuti bahasa Indonesia.""",
-    tools=[GoogleSearchTools(), DuckDuckGoTools(), ArxivTools()],
-)
+        tools=[
+            cached_toolkit(GoogleSearchTools()),
+            cached_toolkit(DuckDuckGoTools()),
+            cached_toolkit(ArxivTools()),
+        ],
+    )
+
+
+@register_agent("vision", provider="stub")
+def build_stub_vision_agent():
+    from services.stub_agent import StubAgent, stub_vision_analysis
+
+    return StubAgent("vision", stub_vision_analysis)
 
 
 def analyze_plant_image(image_path: str, notes: Optional[str], country: str) -> VisionAnalysis:
+    from agno.exceptions import ModelProviderError
+    from agno.media import Image
+
     payload = VISION_PROMPT.format(
         notes=notes or "- (tidak ada)",
         country=country,
     )
-    result = vision_agent.run(payload, images=[Image(filepath=image_path)])
+    try:
+        result = get_agent("vision").run(payload, images=[Image(filepath=image_path)])
+    except ModelProviderError as exc:
+        raise AgentProviderError(str(exc)) from exc
 
     try:
         if isinstance(result.content, VisionAnalysis):
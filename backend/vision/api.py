@@ -1,20 +1,24 @@
-import asyncio
 import logging
-from typing import Optional, List
+from typing import Literal, Optional, List
 
 from asgiref.sync import sync_to_async
+from django.conf import settings
 from ninja import File, Form, Schema
 from ninja.files import UploadedFile
 from ninja_extra import ControllerBase, api_controller, route, status
-from ninja_extra.exceptions import NotFound, APIException
+from ninja_extra.exceptions import NotFound, APIException, ParseError, Throttled
 
-from ninja_extra.permissions import IsAuthenticated
+from ninja_extra.permissions import IsAdminUser, IsAuthenticated
 from ninja_jwt.authentication import AsyncJWTAuth
 
-from services.vision_agent import analyze_plant_image
+from services.cache_stats import CacheStatsOut
+from services.llm_scheduler import LLMQueueFull
+
+from .cache import vision_result_cache
 from .models import ScanSession
-from .schemas import ScanResponse
-from .services import create_scan, default_checklist
+from .schemas import BatchScanResponse, ScanImageSchema, ScanResponse
+from .services import create_scan, process_scan, process_scan_batch
+from .worker import mark_failed
 import os 
 
 logger = logging.getLogger(__name__)
@@ -33,54 +37,86 @@ class MessageOut(Schema):
 
 @api_controller("/vision", tags=["Vision"], auth=AsyncJWTAuth(), permissions=[IsAuthenticated])
 class VisionController(ControllerBase):
-    @route.post("/scan", response=ScanResponse)
+    @route.post("/scan", response={200: ScanResponse, 202: ScanResponse})
     async def scan(
         self,
         notes: str | None = Form(None),
         country: str | None = Form(None),
+        mode: Literal["sync", "job"] | None = Form(None),
         image: UploadedFile = File(...),
     ):
         if not image:
             return APIException(code=status.HTTP_400_BAD_REQUEST, detail="Image is required")
 
         user = self.context.request.user
-        scan = await create_scan(user, image, notes)
-
-        analysis = None
-        if scan.image:
-            try:
-                analysis = await asyncio.to_thread(
-                    analyze_plant_image,
-                    scan.image.path,
-                    notes,
-                    country or "Indonesia",
+        if (mode or settings.VISION_SCAN_DEFAULT_MODE) == "job":
+            scan = await create_scan(user, image, notes, country)
+            return status.HTTP_202_ACCEPTED, self._serialize_scan(scan)
+
+        scan = await create_scan(user, image, notes, country, status=ScanSession.STATUS_PROCESSING)
+        try:
+            await process_scan(scan)
+        except LLMQueueFull as exc:
+            await sync_to_async(scan.delete)()
+            raise Throttled(wait=exc.retry_after, detail="Layanan analisis sedang sibuk.")
+        except Exception as exc:
+            logger.exception("Sync analysis failed for scan %s", scan.id)
+            await sync_to_async(mark_failed)(scan, str(exc) or exc.__class__.__name__, max_attempts=0)
+            raise APIException(detail="Analisis gambar gagal. Coba lagi.") from exc
+        return self._serialize_scan(scan)
+
+    @route.post("/scan/batch", response=BatchScanResponse)
+    async def scan_batch(
+        self,
+        notes: str | None = Form(None),
+        country: str | None = Form(None),
+        images: List[UploadedFile] = File(...),
+    ):
+        if not images:
+            raise ParseError("Minimal satu gambar diperlukan.")
+        if len(images) > settings.VISION_BATCH_MAX_IMAGES:
+            raise ParseError(f"Maksimal {settings.VISION_BATCH_MAX_IMAGES} gambar per pemindaian.")
+
+        user = self.context.request.user
+        parent = await create_scan(user, images[0], notes, country, status=ScanSession.STATUS_PROCESSING)
+        children = [
+            await create_scan(user, image, notes, country, status=ScanSession.STATUS_PROCESSING, parent=parent)
+            for image in images[1:]
+        ]
+
+        try:
+            analyses = await process_scan_batch(parent, children)
+        except LLMQueueFull as exc:
+            await sync_to_async(parent.delete)()
+            raise Throttled(wait=exc.retry_after, detail="Layanan analisis sedang sibuk.")
+        except Exception as exc:
+            logger.exception("Batch analysis failed for scan %s", parent.id)
+            for scan in [parent, *children]:
+                if scan.status != ScanSession.STATUS_COMPLETED:
+                    await sync_to_async(mark_failed)(scan, str(exc) or exc.__class__.__name__, max_attempts=0)
+            raise APIException(detail="Analisis gambar gagal. Coba lagi.") from exc
+
+        request = self.context.request
+        summary = self._serialize_scan(parent)
+        return BatchScanResponse(
+            **summary.model_dump(),
+            images=[
+                ScanImageSchema(
+                    scanId=str(scan.id),
+                    previewUrl=request.build_absolute_uri(scan.image.url) if scan.image else None,
+                    plantName=analysis.plantName if analysis else None,
+                    symptoms=analysis.symptoms if analysis else [],
+                    suggestedIssues=analysis.probableIssues if analysis else [],
+                    confidence=analysis.confidence if analysis else None,
                 )
-            except ValueError as exc:
-                logger.warning("Vision agent failed for scan %s: %s", scan.id, exc)
-
-        if analysis:
-            scan.plant_name = analysis.plantName or ""
-            scan.checklist = analysis.symptoms or default_checklist(notes)
-            scan.analysis_summary = analysis.summary
-            scan.analysis_confidence = analysis.confidence
-            scan.vision_metadata = analysis.model_dump(by_alias=True)
-        else:
-            scan.checklist = default_checklist(notes)
-            scan.analysis_summary = "Analisis otomatis tidak tersedia. Ikuti pengecekan manual terlebih dahulu."
-            scan.analysis_confidence = None
-            scan.vision_metadata = {}
-
-        await sync_to_async(scan.save)(
-            update_fields=[
-                "plant_name",
-                "checklist",
-                "analysis_summary",
-                "analysis_confidence",
-                "vision_metadata",
-            ]
+                for scan, analysis in zip([parent, *children], analyses)
+            ],
         )
 
-        return self._serialize_scan(scan)
+    @route.get("/cache/stats", response=CacheStatsOut, permissions=[IsAdminUser])
+    async def cache_stats(self):
+        stats = await sync_to_async(vision_result_cache.stats.snapshot)()
+        return CacheStatsOut(**stats)
 
     @route.get("/scan/{scan_id}", response=ScanResponse)
     async def get_scan(self, scan_id: int):
@@ -139,4 +175,7 @@ class VisionController(ControllerBase):
             confidence=scan.analysis_confidence,
             previewUrl=preview_url,
             suggestedIssues=metadata.get("probableIssues"),
+            status=scan.status,
+            progress=scan.progress,
+            error=scan.error or None,
         )
@@ -0,0 +1,120 @@
+from __future__ import annotations
+
+import hashlib
+import logging
+
+from django.conf import settings
+from django.core.cache import caches
+from django.utils.text import slugify
+
+from services.cache_stats import CacheStats
+from services.image_preprocessing import hamming_distance
+
+logger = logging.getLogger(__name__)
+
+HASH_BITS = 64
+MAX_BUCKET_SIZE = 32
+
+
+class VisionResultCache:
+    """Near-duplicate lookup of vision results keyed by the scan's perceptual hash.
+
+    The 64-bit hash is split into ``max_distance + 1`` bands. Two hashes within
+    ``max_distance`` bits of each other always share at least one identical band,
+    so candidates are found with a handful of exact key lookups and then ranked
+    by their real Hamming distance.
+
+    The user's notes are part of the prompt, so results are only shared between
+    scans with the same country and the same (normalized) notes.
+    """
+
+    def __init__(
+        self,
+        alias: str = "default",
+        prefix: str = "vision:phash",
+        timeout: int | None = None,
+        max_distance: int | None = None,
+    ) -> None:
+        self.alias = alias
+        self.prefix = prefix
+        self._timeout = timeout
+        self._max_distance = max_distance
+        self.stats = CacheStats(prefix, alias=alias)
+
+    @property
+    def timeout(self) -> int:
+        return self._timeout if self._timeout is not None else settings.VISION_CACHE_TTL
+
+    @property
+    def max_distance(self) -> int:
+        if self._max_distance is not None:
+            return self._max_distance
+        return settings.VISION_CACHE_MAX_DISTANCE
+
+    @property
+    def cache(self):
+        return caches[self.alias]
+
+    def _namespace(self, country: str, notes: str | None) -> str:
+        normalized = " ".join((notes or "").split()).casefold()
+        # Catatan ikut ke prompt; hasil hanya boleh dipakai ulang untuk catatan yang sama
+        digest = hashlib.sha256(normalized.encode()).hexdigest()[:16] if normalized else "none"
+        return f"{self.prefix}:{slugify(country) or 'default'}:{digest}"
+
+    def _entry_key(self, namespace: str, image_hash: str) -> str:
+        return f"{namespace}:entry:{image_hash}"
+
+    def _band_keys(self, namespace: str, image_hash: str) -> list[str]:
+        value = int(image_hash, 16)
+        bands = self.max_distance + 1
+        keys = []
+        start = 0
+        for index in range(bands):
+            width = HASH_BITS // bands + (1 if index < HASH_BITS % bands else 0)
+            band = (value >> start) & ((1 << width) - 1)
+            keys.append(f"{namespace}:band:{bands}:{index}:{band:x}")
+            start += width
+        return keys
+
+    def lookup(self, image_hash: str, country: str, notes: str | None = None) -> dict | None:
+        if not image_hash:
+            return None
+        namespace = self._namespace(country, notes)
+        try:
+            buckets = self.cache.get_many(self._band_keys(namespace, image_hash))
+            candidates = {candidate for bucket in buckets.values() for candidate in bucket}
+            ranked = sorted(
+                (distance, candidate)
+                for candidate in candidates
+                if (distance := hamming_distance(image_hash, candidate)) <= self.max_distance
+            )
+            if ranked:
+                entries = self.cache.get_many([self._entry_key(namespace, candidate) for _, candidate in ranked])
+                for distance, candidate in ranked:
+                    metadata = entries.get(self._entry_key(namespace, candidate))
+                    if metadata:
+                        self.stats.hit()
+                        logger.info("Vision cache hit for %s (distance %d)", image_hash, distance)
+                        return metadata
+        except Exception as exc:
+            logger.warning("Vision cache lookup failed for %s: %s", image_hash, exc)
+        self.stats.miss()
+        return None
+
+    def store(self, image_hash: str, country: str, metadata: dict, notes: str | None = None) -> None:
+        if not image_hash or not metadata:
+            return
+        namespace = self._namespace(country, notes)
+        band_keys = self._band_keys(namespace, image_hash)
+        try:
+            buckets = self.cache.get_many(band_keys)
+            updates: dict[str, object] = {self._entry_key(namespace, image_hash): metadata}
+            for key in band_keys:
+                bucket = [candidate for candidate in buckets.get(key, []) if candidate != image_hash]
+                updates[key] = [image_hash, *bucket][:MAX_BUCKET_SIZE]
+            self.cache.set_many(updates, timeout=self.timeout)
+        except Exception as exc:
+            logger.warning("Vision cache store failed for %s: %s", image_hash, exc)
+
+
+vision_result_cache = VisionResultCache()
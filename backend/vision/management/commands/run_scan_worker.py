@@ -0,0 +1,25 @@
+import asyncio
+
+from django.core.management.base import BaseCommand
+
+from vision.worker import ScanWorker
+
+
+class Command(BaseCommand):
+    help = "Run the background worker that analyzes scans submitted in job mode."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--concurrency", type=int, default=None, help="Number of scans processed in parallel.")
+        parser.add_argument("--poll-interval", type=float, default=None, help="Seconds to wait when the queue is empty.")
+        parser.add_argument("--once", action="store_true", help="Exit once there are no pending scans left.")
+
+    def handle(self, *args, **options):
+        worker = ScanWorker(
+            concurrency=options["concurrency"],
+            poll_interval=options["poll_interval"],
+        )
+        try:
+            processed = asyncio.run(worker.run(once=options["once"]))
+        except KeyboardInterrupt:
+            processed = worker.processed
+        self.stdout.write(self.style.SUCCESS(f"Processed {processed} scan(s)."))
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.7 on 2026-10-18 00:54
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('vision', '0002_add_analysis_fields'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='scansession',
+            name='model_input',
+            field=models.ImageField(blank=True, upload_to='scans/'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.7 on 2026-10-18 00:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('vision', '0003_scansession_model_input'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='scansession',
+            name='image_hash',
+            field=models.CharField(blank=True, db_index=True, max_length=16),
+        ),
+    ]
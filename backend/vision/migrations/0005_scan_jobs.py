@@ -0,0 +1,66 @@
+# Generated by Django 5.2.7 on 2026-10-18 00:56
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('vision', '0004_scansession_image_hash'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='scansession',
+            name='attempts',
+            field=models.PositiveSmallIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='scansession',
+            name='country',
+            field=models.CharField(blank=True, max_length=80),
+        ),
+        migrations.AddField(
+            model_name='scansession',
+            name='error',
+            field=models.TextField(blank=True),
+        ),
+        migrations.AddField(
+            model_name='scansession',
+            name='finished_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        # Scans that already exist were processed synchronously: mark them finished
+        # so the worker never picks them up, then switch to the real defaults.
+        migrations.AddField(
+            model_name='scansession',
+            name='progress',
+            field=models.PositiveSmallIntegerField(default=100),
+        ),
+        migrations.AlterField(
+            model_name='scansession',
+            name='progress',
+            field=models.PositiveSmallIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='scansession',
+            name='started_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='scansession',
+            name='status',
+            field=models.CharField(choices=[('pending', 'Pending'), ('processing', 'Processing'), ('completed', 'Completed'), ('failed', 'Failed')], default='completed', max_length=20),
+        ),
+        migrations.AlterField(
+            model_name='scansession',
+            name='status',
+            field=models.CharField(choices=[('pending', 'Pending'), ('processing', 'Processing'), ('completed', 'Completed'), ('failed', 'Failed')], default='pending', max_length=20),
+        ),
+        migrations.AddIndex(
+            model_name='scansession',
+            index=models.Index(fields=['status', 'created_at'], name='scan_status_created_idx'),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.7 on 2026-10-18 00:59
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('vision', '0005_scan_jobs'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='scansession',
+            name='parent',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='children', to='vision.scansession'),
+        ),
+    ]
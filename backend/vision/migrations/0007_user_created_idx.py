@@ -0,0 +1,19 @@
+# Generated by Django 5.2.7 on 2026-10-18 01:30
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('vision', '0006_scansession_parent'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='scansession',
+            index=models.Index(fields=['user', 'created_at'], name='scan_user_created_idx'),
+        ),
+    ]
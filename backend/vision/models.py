@@ -3,8 +3,28 @@ from django.conf import settings
 
 # Create your models here.
 class ScanSession(models.Model):
+    STATUS_PENDING = "pending"
+    STATUS_PROCESSING = "processing"
+    STATUS_COMPLETED = "completed"
+    STATUS_FAILED = "failed"
+    STATUS_CHOICES = [
+        (STATUS_PENDING, "Pending"),
+        (STATUS_PROCESSING, "Processing"),
+        (STATUS_COMPLETED, "Completed"),
+        (STATUS_FAILED, "Failed"),
+    ]
+
     user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="scans")
+    parent = models.ForeignKey(
+        "self",
+        null=True,
+        blank=True,
+        on_delete=models.CASCADE,
+        related_name="children",
+    )
     image = models.ImageField(upload_to="scans/")
+    model_input = models.ImageField(upload_to="scans/", blank=True)
+    image_hash = models.CharField(max_length=16, blank=True, db_index=True)
     notes = models.TextField(blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
 
@@ -14,6 +34,28 @@ class ScanSession(models.Model):
     analysis_confidence = models.FloatField(null=True, blank=True)
     vision_metadata = models.JSONField(default=dict, blank=True)
 
+    country = models.CharField(max_length=80, blank=True)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=STATUS_PENDING)
+    progress = models.PositiveSmallIntegerField(default=0)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    error = models.TextField(blank=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["status", "created_at"], name="scan_status_created_idx"),
+            models.Index(fields=["user", "created_at"], name="scan_user_created_idx"),
+        ]
+
+    @property
+    def model_input_path(self) -> str | None:
+        if self.model_input:
+            return self.model_input.path
+        if self.image:
+            return self.image.path
+        return None
+
     def __str__(self):
         label = self.plant_name or "Tanaman"
         return f"{self.user.username} - {label}"
@@ -9,3 +9,19 @@ class ScanResponse(Schema):
     analysisSummary: str | None = None
     confidence: float | None = None
     suggestedIssues: list[str] | None = None
+    status: str = "completed"
+    progress: int = 100
+    error: str | None = None
+
+
+class ScanImageSchema(Schema):
+    scanId: str
+    previewUrl: str | None = None
+    plantName: str | None = None
+    symptoms: list[str]
+    suggestedIssues: list[str]
+    confidence: float | None = None
+
+
+class BatchScanResponse(ScanResponse):
+    images: list[ScanImageSchema]
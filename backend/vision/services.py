@@ -1,7 +1,28 @@
+import asyncio
+import logging
+from collections import Counter
+from pathlib import Path
+
 from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.utils import timezone
+
+from dashboard.cache import user_series_cache
+from services.agents import AgentProviderError
+from services.image_preprocessing import (
+    counters as preprocess_counters,
+    perceptual_hash,
+    preprocess_image,
+)
+from services.llm_scheduler import LLMQueueFull, Priority, llm_scheduler
+from services.vision_agent import VisionAnalysis, analyze_plant_image
 
+from .cache import vision_result_cache
 from .models import ScanSession
 
+logger = logging.getLogger(__name__)
+
 
 def default_checklist(notes: str | None = None) -> list[str]:
     checklist = [
@@ -14,11 +35,238 @@ def default_checklist(notes: str | None = None) -> list[str]:
     return checklist
 
 
-async def create_scan(user, image_file, notes: str | None) -> ScanSession:
-    return await sync_to_async(ScanSession.objects.create)(
+def _image_hash(image_file) -> str:
+    try:
+        return perceptual_hash(image_file)
+    except (OSError, ValueError) as exc:
+        logger.warning("Could not hash uploaded image: %s", exc)
+        return ""
+    finally:
+        image_file.seek(0)
+
+
+async def create_scan(
+    user,
+    image_file,
+    notes: str | None,
+    country: str | None = None,
+    status: str = ScanSession.STATUS_PENDING,
+    parent: ScanSession | None = None,
+) -> ScanSession:
+    image_hash = await asyncio.to_thread(_image_hash, image_file)
+    scan = await sync_to_async(ScanSession.objects.create)(
         user=user,
+        parent=parent,
         image=image_file,
+        image_hash=image_hash,
         notes=notes or "",
+        country=country or "",
+        status=status,
+        # Disimpan sejak awal agar requeue_stale_scans bisa memulihkan scan sync yang prosesnya mati
+        started_at=timezone.now() if status == ScanSession.STATUS_PROCESSING else None,
+    )
+    await sync_to_async(user_series_cache.invalidate)(user.id)
+    return scan
+
+
+async def prepare_model_input(scan: ScanSession) -> None:
+    """Store the downscaled variant that is sent to the AI agents instead of the original."""
+    if not scan.image:
+        return
+
+    try:
+        result = await asyncio.to_thread(preprocess_image, scan.image.path)
+    except (OSError, ValueError) as exc:
+        preprocess_counters.record_failure()
+        logger.warning("Preprocessing failed for scan %s, using original image: %s", scan.id, exc)
+        return
+
+    filename = f"{Path(scan.image.name).stem}.model.{result.extension}"
+
+    def _store() -> None:
+        scan.model_input.save(filename, ContentFile(result.content), save=False)
+        scan.save(update_fields=["model_input"])
+
+    await sync_to_async(_store, thread_sensitive=True)()
+
+
+async def analyze_scan(
+    scan: ScanSession,
+    notes: str | None,
+    country: str,
+    priority: Priority = Priority.INTERACTIVE,
+) -> VisionAnalysis | None:
+    """Run the vision agent, reusing the result of a recent near-identical photo when possible."""
+    cached = await sync_to_async(vision_result_cache.lookup)(scan.image_hash, country, notes)
+    if cached:
+        try:
+            return VisionAnalysis.model_validate(cached)
+        except ValueError as exc:
+            logger.warning("Discarding cached vision result for scan %s: %s", scan.id, exc)
+
+    try:
+        analysis = await llm_scheduler.run(
+            analyze_plant_image,
+            scan.model_input_path,
+            notes,
+            country,
+            user_id=scan.user_id,
+            priority=priority,
+        )
+    except (ValueError, AgentProviderError) as exc:
+        logger.warning("Vision agent failed for scan %s: %s", scan.id, exc)
+        return None
+
+    if analysis:
+        await sync_to_async(vision_result_cache.store)(
+            scan.image_hash,
+            country,
+            analysis.model_dump(by_alias=True),
+            notes,
+        )
+    return analysis
+
+
+def apply_analysis(scan: ScanSession, analysis: VisionAnalysis | None) -> None:
+    if analysis:
+        scan.plant_name = analysis.plantName or ""
+        scan.checklist = analysis.symptoms or default_checklist(scan.notes)
+        scan.analysis_summary = analysis.summary
+        scan.analysis_confidence = analysis.confidence
+        scan.vision_metadata = analysis.model_dump(by_alias=True)
+    else:
+        scan.checklist = default_checklist(scan.notes)
+        scan.analysis_summary = "Analisis otomatis tidak tersedia. Ikuti pengecekan manual terlebih dahulu."
+        scan.analysis_confidence = None
+        scan.vision_metadata = {}
+
+
+async def _set_progress(scan: ScanSession, progress: int) -> None:
+    scan.progress = progress
+    await sync_to_async(ScanSession.objects.filter(id=scan.id).update)(progress=progress)
+
+
+async def _finish_scan(
+    scan: ScanSession,
+    analysis: VisionAnalysis | None,
+    extra_metadata: dict | None = None,
+) -> ScanSession:
+    apply_analysis(scan, analysis)
+    if analysis and extra_metadata:
+        scan.vision_metadata.update(extra_metadata)
+    scan.status = ScanSession.STATUS_COMPLETED
+    scan.progress = 100
+    scan.error = ""
+    scan.finished_at = timezone.now()
+    await sync_to_async(scan.save)(
+        update_fields=[
+            "plant_name",
+            "checklist",
+            "analysis_summary",
+            "analysis_confidence",
+            "vision_metadata",
+            "status",
+            "progress",
+            "error",
+            "started_at",
+            "finished_at",
+        ]
     )
+    return scan
+
+
+async def process_scan(scan: ScanSession, priority: Priority = Priority.INTERACTIVE) -> ScanSession:
+    """Preprocess, analyze and persist a scan; shared by the API and the scan worker."""
+    if scan.started_at is None:
+        scan.started_at = timezone.now()
+    await prepare_model_input(scan)
+    await _set_progress(scan, 30)
+
+    analysis = None
+    if scan.image:
+        analysis = await analyze_scan(scan, scan.notes or None, scan.country or "Indonesia", priority)
+    await _set_progress(scan, 90)
+
+    return await _finish_scan(scan, analysis)
+
+
+def _dedupe(items: list[str]) -> list[str]:
+    """Order by how many photos mention an item, then by first appearance; ignore case and spacing."""
+    counts: Counter[str] = Counter()
+    first_seen: dict[str, str] = {}
+    for item in items:
+        key = " ".join(item.split()).casefold()
+        if not key:
+            continue
+        counts[key] += 1
+        first_seen.setdefault(key, item.strip())
+    order = {key: index for index, key in enumerate(first_seen)}
+    return [first_seen[key] for key in sorted(first_seen, key=lambda key: (-counts[key], order[key]))]
+
+
+def merge_analyses(analyses: list[VisionAnalysis | None]) -> VisionAnalysis | None:
+    """Combine per-photo results (leaf top, underside, stem, ...) into one analysis."""
+    available = [analysis for analysis in analyses if analysis]
+    if not available:
+        return None
+
+    plant_names = Counter(analysis.plantName for analysis in available if analysis.plantName)
+    plant_name = None
+    if plant_names:
+        plant_name = max(
+            plant_names,
+            key=lambda name: (
+                plant_names[name],
+                max(analysis.confidence for analysis in available if analysis.plantName == name),
+            ),
+        )
+
+    return VisionAnalysis(
+        plantName=plant_name,
+        probableIssues=_dedupe([issue for analysis in available for issue in analysis.probableIssues]),
+        symptoms=_dedupe([symptom for analysis in available for symptom in analysis.symptoms]),
+        summary=" ".join(_dedupe([analysis.summary for analysis in available])),
+        confidence=round(sum(analysis.confidence for analysis in available) / len(available), 4),
+        recommendations=_dedupe([tip for analysis in available for tip in analysis.recommendations]),
+    )
+
+
+async def process_scan_batch(
+    parent: ScanSession,
+    children: list[ScanSession],
+    priority: Priority = Priority.INTERACTIVE,
+) -> list[VisionAnalysis | None]:
+    """Analyze every photo of a batch concurrently and store the merged result on the parent.
+
+    Each child keeps its own analysis; the parent's ``vision_metadata`` holds the
+    merged analysis plus the per-photo results under ``images``. If any photo
+    fails, the others are cancelled before the error is raised: queued photos
+    are never sent, and calls already running are waited for.
+    """
+    scans = [parent, *children]
+    semaphore = asyncio.Semaphore(settings.VISION_BATCH_CONCURRENCY)
+    now = timezone.now()
+
+    async def _analyze(scan: ScanSession) -> VisionAnalysis | None:
+        async with semaphore:
+            scan.started_at = now
+            await prepare_model_input(scan)
+            if not scan.image:
+                return None
+            return await analyze_scan(scan, scan.notes or None, scan.country or "Indonesia", priority)
+
+    try:
+        async with asyncio.TaskGroup() as group:
+            tasks = [group.create_task(_analyze(scan)) for scan in scans]
+    except ExceptionGroup as exc:
+        # TaskGroup sudah membatalkan foto lain begitu satu gagal; teruskan error pertama (utamakan antrean penuh)
+        errors = list(exc.exceptions)
+        raise next((error for error in errors if isinstance(error, LLMQueueFull)), errors[0]) from None
+    analyses = [task.result() for task in tasks]
 
+    for child, analysis in zip(children, analyses[1:]):
+        await _finish_scan(child, analysis)
 
+    per_image = [analysis.model_dump(by_alias=True) if analysis else None for analysis in analyses]
+    await _finish_scan(parent, merge_analyses(analyses), {"images": per_image})
+    return analyses
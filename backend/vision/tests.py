@@ -1,3 +1,421 @@
-from django.test import TestCase
+import io
+import random
+import shutil
+import tempfile
+import threading
+import time
+import uuid
+from datetime import timedelta
+from unittest import mock
 
-# Create your tests here.
+from asgiref.sync import async_to_sync
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.utils import timezone
+from ninja_jwt.tokens import RefreshToken
+from PIL import Image, ImageDraw
+
+from services.agents import reset_agents
+from services.image_preprocessing import STAGES, counters, hamming_distance, perceptual_hash, preprocess_image
+from services.llm_scheduler import LLMScheduler, SharedSlots
+from services.vision_agent import VisionAnalysis
+
+from .cache import VisionResultCache
+from .models import ScanSession
+from .services import merge_analyses
+from .worker import ScanWorker, claim_next_scan, mark_failed, release_scan, requeue_stale_scans
+
+User = get_user_model()
+
+STUB_PROVIDER = {
+    "LLM_PROVIDER": "stub",
+    "LLM_STUB_LATENCY_DISTRIBUTION": "fixed",
+    "LLM_STUB_LATENCY_MS": 0,
+    "LLM_STUB_ERROR_RATE": 0.0,
+}
+
+
+def _auth(user) -> dict:
+    return {"headers": {"Authorization": f"Bearer {RefreshToken.for_user(user).access_token}"}}
+
+
+def _image(seed: int, size: tuple[int, int] = (320, 240)) -> Image.Image:
+    """A few random blocks, so that every seed gives a visually different photo (and dHash)."""
+    rng = random.Random(seed)
+    image = Image.new("RGB", size, tuple(rng.randrange(256) for _ in range(3)))
+    draw = ImageDraw.Draw(image)
+    for _ in range(6):
+        x, y = rng.randrange(size[0]), rng.randrange(size[1])
+        box = (x, y, x + rng.randrange(20, size[0] // 2), y + rng.randrange(20, size[1] // 2))
+        draw.rectangle(box, fill=tuple(rng.randrange(256) for _ in range(3)))
+    return image
+
+
+def _encode(image: Image.Image, image_format: str = "JPEG", **params) -> bytes:
+    buffer = io.BytesIO()
+    image.save(buffer, format=image_format, **params)
+    return buffer.getvalue()
+
+
+def _photo(seed: int) -> bytes:
+    return _encode(_image(seed))
+
+
+def _upload(seed: int, name: str | None = None) -> SimpleUploadedFile:
+    return SimpleUploadedFile(name or f"daun-{seed}.jpg", _photo(seed), content_type="image/jpeg")
+
+
+def _analysis(plant: str | None, issues: list[str], confidence: float, summary: str = "ringkas") -> VisionAnalysis:
+    return VisionAnalysis(
+        plantName=plant,
+        probableIssues=issues,
+        symptoms=[],
+        summary=summary,
+        confidence=confidence,
+    )
+
+
+class MediaTestCase(TestCase):
+    def setUp(self):
+        media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media, ignore_errors=True)
+        self.enterContext(override_settings(MEDIA_ROOT=media, **STUB_PROVIDER))
+        reset_agents()
+        self.addCleanup(reset_agents)
+        cache.clear()
+        self.user = User.objects.create_user(email="petani@example.com", password="x", username="petani")
+
+
+def _flip(image_hash: str, bits: int) -> str:
+    return f"{int(image_hash, 16) ^ ((1 << bits) - 1):016x}"
+
+
+class PreprocessImageTests(SimpleTestCase):
+    def setUp(self):
+        counters.reset()
+        self.addCleanup(counters.reset)
+
+    def test_exif_rotation_is_applied_before_downscaling(self):
+        exif = Image.Exif()
+        exif[0x0112] = 6  # Orientation: putar 90 derajat searah jarum jam
+        content = _encode(_image(1, (400, 200)), exif=exif)
+        result = preprocess_image(io.BytesIO(content), max_edge=200, image_format="PNG")
+        self.assertEqual((result.width, result.height, result.extension), (100, 200, "png"))
+        with Image.open(io.BytesIO(result.content)) as output:
+            self.assertEqual((output.format, output.size), ("PNG", (100, 200)))
+
+    def test_counts_bytes_saved_and_stage_timings(self):
+        content = _encode(_image(2, (2400, 1800)), quality=95)
+        result = preprocess_image(io.BytesIO(content), max_edge=640, image_format="WEBP", quality=70)
+        self.assertEqual((result.width, result.height, result.original_bytes), (640, 480, len(content)))
+        self.assertGreater(result.bytes_saved, 0)
+
+        snapshot = counters.snapshot()
+        self.assertEqual((snapshot["images"], snapshot["failures"]), (1, 0))
+        self.assertEqual(snapshot["bytesSaved"], result.bytes_saved)
+        self.assertEqual(set(snapshot["stageSeconds"]), set(STAGES))
+        self.assertEqual(set(result.timings), set(STAGES))
+
+    def test_rejects_unreadable_images_and_unknown_formats(self):
+        with self.assertRaises(OSError):
+            preprocess_image(io.BytesIO(b"bukan gambar"))
+        with self.assertRaises(ValueError):
+            preprocess_image(io.BytesIO(_photo(1)), image_format="GIF")
+        self.assertEqual(counters.snapshot()["images"], 0)
+
+
+@override_settings(VISION_INPUT_MAX_EDGE=160)
+class ModelInputTests(MediaTestCase):
+    def setUp(self):
+        super().setUp()
+        counters.reset()
+        self.addCleanup(counters.reset)
+        self.paths: list[str] = []
+
+    def provider(self, image_path, notes, country):
+        self.paths.append(image_path)
+        return _analysis("Cabai", [], 0.8)
+
+    def scan(self, upload: SimpleUploadedFile) -> ScanSession:
+        with mock.patch("vision.services.analyze_plant_image", self.provider):
+            response = self.client.post("/api/vision/scan", {"image": upload}, **_auth(self.user))
+        self.assertEqual(response.status_code, 200)
+        return ScanSession.objects.get(id=response.json()["scanId"])
+
+    def test_agent_receives_the_downscaled_variant(self):
+        scan = self.scan(_upload(1))
+        self.assertTrue(scan.model_input.name.endswith(".model.webp"))
+        self.assertEqual(self.paths, [scan.model_input.path])
+        with Image.open(scan.model_input.path) as model_input:
+            self.assertEqual(model_input.size, (160, 120))
+        self.assertEqual(counters.snapshot()["images"], 1)
+
+    def test_unreadable_upload_falls_back_to_the_original(self):
+        upload = SimpleUploadedFile("daun.jpg", b"bukan gambar", content_type="image/jpeg")
+        with self.assertLogs("vision.services", "WARNING"):
+            scan = self.scan(upload)
+        self.assertFalse(scan.model_input)
+        self.assertEqual(self.paths, [scan.image.path])
+        self.assertEqual((counters.snapshot()["images"], counters.snapshot()["failures"]), (0, 1))
+
+
+class PerceptualHashTests(SimpleTestCase):
+    def test_re_encoded_copies_stay_close(self):
+        original = _image(1)
+        image_hash = perceptual_hash(io.BytesIO(_encode(original)))
+        copies = {
+            "kualitas rendah": _encode(original, quality=40),
+            "diperkecil": _encode(original.resize((160, 120))),
+            "png": _encode(original, "PNG"),
+        }
+        for name, content in copies.items():
+            with self.subTest(copy=name):
+                self.assertLessEqual(hamming_distance(image_hash, perceptual_hash(io.BytesIO(content))), 4)
+
+    def test_different_photos_are_far_apart(self):
+        hashes = [perceptual_hash(io.BytesIO(_photo(seed))) for seed in range(5)]
+        for index, first in enumerate(hashes):
+            for second in hashes[index + 1:]:
+                self.assertGreater(hamming_distance(first, second), 4)
+
+
+class VisionResultCacheTests(SimpleTestCase):
+    def setUp(self):
+        self.cache = VisionResultCache(prefix=f"test:vision:{uuid.uuid4().hex}", timeout=60, max_distance=4)
+        self.image_hash = "f0e1d2c3b4a59687"
+
+    def test_near_duplicates_hit_within_max_distance(self):
+        self.cache.store(self.image_hash, "Indonesia", {"summary": "asli"})
+        self.assertEqual(self.cache.lookup(_flip(self.image_hash, 4), "Indonesia"), {"summary": "asli"})
+        self.assertIsNone(self.cache.lookup(_flip(self.image_hash, 5), "Indonesia"))
+
+    def test_closest_candidate_wins(self):
+        self.cache.store(self.image_hash, "Indonesia", {"summary": "jauh"})
+        self.cache.store(_flip(self.image_hash, 3), "Indonesia", {"summary": "dekat"})
+        self.assertEqual(self.cache.lookup(_flip(self.image_hash, 2), "Indonesia"), {"summary": "dekat"})
+
+    def test_results_are_scoped_by_country_and_notes(self):
+        self.cache.store(self.image_hash, "Indonesia", {"summary": "catatan"}, notes="Daun  menguning")
+        self.assertEqual(self.cache.lookup(self.image_hash, "indonesia", " daun menguning "), {"summary": "catatan"})
+        self.assertIsNone(self.cache.lookup(self.image_hash, "Indonesia"))
+        self.assertIsNone(self.cache.lookup(self.image_hash, "Indonesia", "Daun layu"))
+        self.assertIsNone(self.cache.lookup(self.image_hash, "Malaysia", "Daun menguning"))
+        self.assertEqual(self.cache.stats.snapshot(), {"hits": 1, "misses": 3, "hitRatio": 0.25})
+
+
+class MergeAnalysesTests(SimpleTestCase):
+    def test_nothing_to_merge(self):
+        self.assertIsNone(merge_analyses([None, None]))
+
+    def test_combines_photos_of_one_plant(self):
+        merged = merge_analyses(
+            [
+                _analysis("Cabai", ["Antraknosa", "Layu"], 0.9, "Bercak pada buah."),
+                None,
+                _analysis("Tomat", ["layu "], 0.5),
+                _analysis("Cabai", ["Thrips", "antraknosa"], 0.7, "Bercak pada buah."),
+            ]
+        )
+        self.assertEqual(merged.plantName, "Cabai")
+        # Disebut paling sering lebih dulu; beda huruf besar/spasi dianggap sama
+        self.assertEqual(merged.probableIssues, ["Antraknosa", "Layu", "Thrips"])
+        self.assertEqual(merged.summary, "Bercak pada buah. ringkas")
+        self.assertEqual(merged.confidence, 0.7)
+
+    def test_plant_name_ties_go_to_the_most_confident_photo(self):
+        merged = merge_analyses([_analysis("Tomat", [], 0.6), _analysis("Cabai", [], 0.8), _analysis(None, [], 0.9)])
+        self.assertEqual(merged.plantName, "Cabai")
+
+
+class ScanCacheTests(MediaTestCase):
+    def scan(self, user, notes: str, seed: int = 1) -> dict:
+        response = self.client.post("/api/vision/scan", {"image": _upload(seed), "notes": notes}, **_auth(user))
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_results_are_only_reused_for_the_same_notes(self):
+        other = User.objects.create_user(email="tetangga@example.com", password="x", username="tetangga")
+        first = self.scan(self.user, "Daun menguning sejak hujan")
+        self.assertEqual(self.scan(other, "daun menguning  sejak hujan")["plantName"], first["plantName"])
+        self.scan(other, "Batang busuk di pangkal")
+
+        self.assertEqual(self.client.get("/api/vision/cache/stats", **_auth(self.user)).status_code, 403)
+        admin = User.objects.create_user(email="admin@example.com", password="x", username="admin", is_staff=True)
+        response = self.client.get("/api/vision/cache/stats", **_auth(admin))
+        self.assertEqual(response.json(), {"hits": 1, "misses": 2, "hitRatio": 0.3333})
+
+
+class ProviderFailureTests(MediaTestCase):
+    @override_settings(LLM_STUB_ERROR_RATE=1.0)
+    def test_provider_outage_falls_back_to_the_manual_checklist(self):
+        reset_agents()
+        with self.assertLogs("vision.services", "WARNING"):
+            response = self.client.post("/api/vision/scan", {"image": _upload(1)}, **_auth(self.user))
+        self.assertEqual(response.status_code, 200)
+        body = response.json()
+        self.assertEqual((body["status"], body["plantName"], body["confidence"]), ("completed", None, None))
+        self.assertTrue(body["checklist"])
+        self.assertEqual(cache.get("stats:vision:phash:misses"), 1)
+        self.assertIsNone(cache.get("stats:vision:phash:hits"))
+
+
+class BatchScanTests(MediaTestCase):
+    def post_batch(self, *seeds: int):
+        return self.client.post(
+            "/api/vision/scan/batch",
+            {"images": [_upload(seed) for seed in seeds], "notes": "daun atas, bawah, batang"},
+            **_auth(self.user),
+        )
+
+    def test_batch_merges_every_photo(self):
+        response = self.post_batch(1, 2, 3)
+        self.assertEqual(response.status_code, 200)
+        body = response.json()
+        self.assertEqual(len(body["images"]), 3)
+        self.assertTrue(all(image["plantName"] for image in body["images"]))
+
+        parent = ScanSession.objects.get(id=body["scanId"])
+        children = list(ScanSession.objects.filter(parent=parent))
+        self.assertEqual([image["scanId"] for image in body["images"]], [str(scan.id) for scan in [parent, *children]])
+        self.assertEqual(len(parent.vision_metadata["images"]), 3)
+        self.assertTrue(all(scan.status == ScanSession.STATUS_COMPLETED for scan in [parent, *children]))
+
+    @override_settings(VISION_BATCH_MAX_IMAGES=2)
+    def test_too_many_photos_are_rejected(self):
+        self.assertEqual(self.post_batch(1, 2, 3).status_code, 400)
+        self.assertFalse(ScanSession.objects.exists())
+
+    def test_one_failing_photo_stops_the_others(self):
+        scheduler = LLMScheduler(
+            max_in_flight=2,
+            max_queue=8,
+            queue_timeout=5,
+            shared_slots=SharedSlots(prefix=f"test:llm:{uuid.uuid4().hex}", limit=0),
+        )
+        calls: list[str] = []
+        lock = threading.Lock()
+
+        def provider(image_path, notes, country):
+            with lock:
+                role = ["fail", "slow", "late"][len(calls)]
+                calls.append(role)
+            if role == "fail":
+                # Gagal saat foto kedua sedang diproses dan foto ketiga masih antre
+                deadline = time.monotonic() + 5
+                while (scheduler.in_flight, scheduler.queued) != (2, 1) and time.monotonic() < deadline:
+                    time.sleep(0.01)
+                raise RuntimeError("provider down")
+            time.sleep(0.3)
+            calls.append(f"{role}-done")
+            return _analysis("Cabai", [], 0.8)
+
+        with (
+            mock.patch("vision.services.llm_scheduler", scheduler),
+            mock.patch("vision.services.analyze_plant_image", provider),
+            self.assertLogs("vision.api", "ERROR"),
+        ):
+            response = self.post_batch(1, 2, 3)
+
+        self.assertEqual(response.status_code, 500)
+        # Foto yang antre tidak pernah dikirim; yang sudah berjalan ditunggu sampai selesai sebelum respons
+        self.assertEqual(calls, ["fail", "slow", "slow-done"])
+        self.assertEqual((scheduler.in_flight, scheduler.queued), (0, 0))
+        self.assertEqual(
+            set(ScanSession.objects.values_list("status", flat=True)),
+            {ScanSession.STATUS_FAILED},
+        )
+        self.assertEqual(ScanSession.objects.count(), 3)
+
+
+class ScanQueueTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(email="petani@example.com", password="x", username="petani")
+
+    def queue(self, minutes_ago: int, **fields) -> ScanSession:
+        scan = ScanSession.objects.create(user=self.user, image="scans/daun.jpg", **fields)
+        ScanSession.objects.filter(id=scan.id).update(created_at=timezone.now() - timedelta(minutes=minutes_ago))
+        return scan
+
+    def test_claims_the_oldest_pending_scan_once(self):
+        newer = self.queue(1)
+        older = self.queue(5)
+        self.queue(10, status=ScanSession.STATUS_COMPLETED)
+
+        claimed = claim_next_scan()
+        self.assertEqual((claimed.id, claimed.status, claimed.attempts), (older.id, ScanSession.STATUS_PROCESSING, 1))
+        self.assertIsNotNone(claimed.started_at)
+        self.assertEqual(claim_next_scan().id, newer.id)
+        self.assertIsNone(claim_next_scan())
+
+    def test_release_does_not_count_as_an_attempt(self):
+        self.queue(1)
+        scan = claim_next_scan()
+        release_scan(scan)
+        scan.refresh_from_db()
+        self.assertEqual((scan.status, scan.attempts), (ScanSession.STATUS_PENDING, 0))
+
+    def test_failures_are_retried_until_attempts_run_out(self):
+        scan = self.queue(1, status=ScanSession.STATUS_PROCESSING, attempts=1)
+        mark_failed(scan, "provider down", max_attempts=2)
+        scan.refresh_from_db()
+        self.assertEqual((scan.status, scan.error, scan.finished_at), (ScanSession.STATUS_PENDING, "provider down", None))
+
+        scan.attempts = 2
+        mark_failed(scan, "provider down", max_attempts=2)
+        scan.refresh_from_db()
+        self.assertEqual(scan.status, ScanSession.STATUS_FAILED)
+        self.assertIsNotNone(scan.finished_at)
+
+    def test_stale_scans_are_requeued_or_failed(self):
+        long_ago = timezone.now() - timedelta(minutes=30)
+        retry = self.queue(40, status=ScanSession.STATUS_PROCESSING, attempts=1, started_at=long_ago)
+        exhausted = self.queue(40, status=ScanSession.STATUS_PROCESSING, attempts=3, started_at=long_ago)
+        running = self.queue(1, status=ScanSession.STATUS_PROCESSING, attempts=1, started_at=timezone.now())
+
+        self.assertEqual(requeue_stale_scans(stale_after=600, max_attempts=3), 2)
+        statuses = dict(ScanSession.objects.values_list("id", "status"))
+        self.assertEqual(
+            statuses,
+            {
+                retry.id: ScanSession.STATUS_PENDING,
+                exhausted.id: ScanSession.STATUS_FAILED,
+                running.id: ScanSession.STATUS_PROCESSING,
+            },
+        )
+
+
+class ScanJobTests(MediaTestCase):
+    def submit(self, seed: int) -> dict:
+        response = self.client.post("/api/vision/scan", {"image": _upload(seed), "mode": "job"}, **_auth(self.user))
+        self.assertEqual(response.status_code, 202)
+        return response.json()
+
+    def poll(self, scan_id: str) -> dict:
+        return self.client.get(f"/api/vision/scan/{scan_id}", **_auth(self.user)).json()
+
+    def test_job_is_accepted_then_completed_by_the_worker(self):
+        jobs = [self.submit(seed) for seed in (1, 2)]
+        self.assertEqual({(job["status"], job["progress"]) for job in jobs}, {(ScanSession.STATUS_PENDING, 0)})
+
+        processed = async_to_sync(ScanWorker(concurrency=2).run)(once=True)
+        self.assertEqual(processed, 2)
+        for job in jobs:
+            body = self.poll(job["scanId"])
+            self.assertEqual((body["status"], body["progress"]), (ScanSession.STATUS_COMPLETED, 100))
+            self.assertTrue(body["plantName"])
+
+    def test_worker_retries_a_failing_job_then_gives_up(self):
+        job = self.submit(1)
+        with (
+            mock.patch("vision.services.analyze_plant_image", side_effect=RuntimeError("provider down")),
+            self.assertLogs("vision.worker", "ERROR"),
+        ):
+            processed = async_to_sync(ScanWorker(concurrency=1, max_attempts=2).run)(once=True)
+
+        self.assertEqual(processed, 0)
+        body = self.poll(job["scanId"])
+        self.assertEqual((body["status"], body["error"]), (ScanSession.STATUS_FAILED, "provider down"))
+        self.assertEqual(ScanSession.objects.get(id=job["scanId"]).attempts, 2)
@@ -0,0 +1,118 @@
+import asyncio
+import logging
+from datetime import timedelta
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.utils import timezone
+
+from services.llm_scheduler import LLMQueueFull, Priority
+
+from .models import ScanSession
+from .services import process_scan
+
+logger = logging.getLogger(__name__)
+
+
+def claim_next_scan() -> ScanSession | None:
+    """Atomically move the oldest pending scan to ``processing``.
+
+    ``skip_locked`` lets several worker processes poll the same table without
+    handing out the same job twice.
+    """
+    with transaction.atomic():
+        scan = (
+            ScanSession.objects.select_for_update(skip_locked=True)
+            .filter(status=ScanSession.STATUS_PENDING)
+            .order_by("created_at")
+            .first()
+        )
+        if scan is None:
+            return None
+        scan.status = ScanSession.STATUS_PROCESSING
+        scan.progress = 10
+        scan.attempts += 1
+        scan.started_at = timezone.now()
+        scan.save(update_fields=["status", "progress", "attempts", "started_at"])
+        return scan
+
+
+def requeue_stale_scans(stale_after: int, max_attempts: int) -> int:
+    """Return scans whose worker died mid-job to the queue, or fail them once retries run out."""
+    cutoff = timezone.now() - timedelta(seconds=stale_after)
+    stale = ScanSession.objects.filter(status=ScanSession.STATUS_PROCESSING, started_at__lt=cutoff)
+    failed = stale.filter(attempts__gte=max_attempts).update(
+        status=ScanSession.STATUS_FAILED,
+        error="Analisis melebihi batas waktu.",
+        finished_at=timezone.now(),
+    )
+    requeued = stale.filter(attempts__lt=max_attempts).update(
+        status=ScanSession.STATUS_PENDING,
+        progress=0,
+    )
+    return failed + requeued
+
+
+def release_scan(scan: ScanSession) -> None:
+    """Put a claimed scan back in the queue without counting it as a failed attempt."""
+    scan.status = ScanSession.STATUS_PENDING
+    scan.progress = 0
+    scan.attempts = max(scan.attempts - 1, 0)
+    scan.save(update_fields=["status", "progress", "attempts"])
+
+
+def mark_failed(scan: ScanSession, error: str, max_attempts: int) -> None:
+    retry = scan.attempts < max_attempts
+    scan.status = ScanSession.STATUS_PENDING if retry else ScanSession.STATUS_FAILED
+    scan.progress = 0
+    scan.error = error[:2000]
+    scan.finished_at = None if retry else timezone.now()
+    scan.save(update_fields=["status", "progress", "error", "finished_at"])
+
+
+class ScanWorker:
+    def __init__(
+        self,
+        concurrency: int | None = None,
+        poll_interval: float | None = None,
+        stale_after: int | None = None,
+        max_attempts: int | None = None,
+    ) -> None:
+        self.concurrency = concurrency or settings.VISION_WORKER_CONCURRENCY
+        self.poll_interval = poll_interval or settings.VISION_WORKER_POLL_INTERVAL
+        self.stale_after = stale_after or settings.VISION_WORKER_STALE_AFTER
+        self.max_attempts = max_attempts or settings.VISION_WORKER_MAX_ATTEMPTS
+        self.processed = 0
+
+    async def run(self, once: bool = False) -> int:
+        """Process jobs until stopped; with ``once`` exit as soon as the queue is drained."""
+        recovered = await sync_to_async(requeue_stale_scans)(self.stale_after, self.max_attempts)
+        if recovered:
+            logger.info("Recovered %d stale scan job(s)", recovered)
+        await asyncio.gather(*(self._slot(index, once) for index in range(self.concurrency)))
+        return self.processed
+
+    async def _slot(self, index: int, once: bool) -> None:
+        while True:
+            await sync_to_async(close_old_connections)()
+            scan = await sync_to_async(claim_next_scan)()
+            if scan is None:
+                if once:
+                    return
+                await asyncio.sleep(self.poll_interval)
+                if index == 0:
+                    await sync_to_async(requeue_stale_scans)(self.stale_after, self.max_attempts)
+                continue
+
+            logger.info("Worker slot %d processing scan %s (attempt %d)", index, scan.id, scan.attempts)
+            try:
+                await process_scan(scan, priority=Priority.BACKGROUND)
+            except LLMQueueFull as exc:
+                await sync_to_async(release_scan)(scan)
+                await asyncio.sleep(exc.retry_after)
+            except Exception as exc:
+                logger.exception("Scan %s failed", scan.id)
+                await sync_to_async(mark_failed)(scan, str(exc), self.max_attempts)
+            else:
+                self.processed += 1
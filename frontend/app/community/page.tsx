@@ -1,6 +1,6 @@
 'use client';
 
-import { FormEvent, useEffect, useMemo, useState } from "react";
+import { FormEvent, useCallback, useEffect, useMemo, useState } from "react";
 import {
   FiEdit2,
   FiMessageCircle,
@@ -123,13 +123,23 @@ export default function CommunityPage() {
   const [editError, setEditError] = useState<string | null>(null);
   const [deleteError, setDeleteError] = useState<string | null>(null);
 
+  const [nextCursor, setNextCursor] = useState<string | null>(null);
+  const [loadingMore, setLoadingMore] = useState(false);
+  const [loadMoreError, setLoadMoreError] = useState<string | null>(null);
+
+  const loadFeed = useCallback(async () => {
+    const page = await fetchCommunityPosts();
+    setNextCursor(page.nextCursor);
+    return page.items;
+  }, []);
+
   const {
     data: postsData,
     loading,
     error,
     execute: loadPosts,
     setData: setPostsData,
-  } = useApiRequest(fetchCommunityPosts);
+  } = useApiRequest(loadFeed);
   const {
     execute: publishPost,
     loading: publishing,
@@ -152,6 +162,25 @@ export default function CommunityPage() {
       .catch((err) => console.error("Community posts gagal dimuat", err));
   }, [loadPosts, setPostsData]);
 
+  const handleLoadMore = async () => {
+    if (!nextCursor || loadingMore) return;
+    setLoadingMore(true);
+    setLoadMoreError(null);
+    try {
+      const page = await fetchCommunityPosts({ cursor: nextCursor });
+      setPostsData((prev) => {
+        const existing = new Set((prev ?? []).map((post) => post.id));
+        return [...(prev ?? []), ...page.items.filter((post) => !existing.has(post.id))];
+      });
+      setNextCursor(page.nextCursor);
+    } catch (err) {
+      console.error("Gagal memuat postingan berikutnya", err);
+      setLoadMoreError("Gagal memuat postingan berikutnya.");
+    } finally {
+      setLoadingMore(false);
+    }
+  };
+
   const ensureCommentState = (postId: number) => {
     setCommentsState((prev) => {
       if (prev[postId]) return prev;
@@ -730,6 +759,17 @@ export default function CommunityPage() {
                 </article>
               );
             })}
+            {nextCursor ? (
+              <button
+                type="button"
+                onClick={handleLoadMore}
+                disabled={loadingMore}
+                className="justify-self-center rounded-full border border-emerald-200 px-5 py-2 text-sm font-semibold text-emerald-700 hover:bg-emerald-50 disabled:opacity-60"
+              >
+                {loadingMore ? "Memuat..." : "Muat lebih banyak"}
+              </button>
+            ) : null}
+            {loadMoreError ? <p className="text-center text-sm text-red-600">{loadMoreError}</p> : null}
           </div>
         ) : (
           <DataState title="Belum ada diskusi" description="Jadilah yang pertama berbagi pengalaman Anda." />
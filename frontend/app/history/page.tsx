@@ -1,6 +1,6 @@
 'use client';
 
-import { useEffect, useState } from "react";
+import { useCallback, useEffect, useState } from "react";
 import { FiArrowRightCircle, FiLoader, FiTrash2 } from "react-icons/fi";
 import { deleteDiagnosis, fetchDiagnosisHistory } from "../../lib/api";
 import { useApiRequest } from "../../lib/useApiRequest";
@@ -9,7 +9,17 @@ import { SectionCard } from "../components/SectionCard";
 import { DataState } from "../components/DataState";
 
 export default function HistoryPage() {
-  const { data, loading, error, execute, setData } = useApiRequest(fetchDiagnosisHistory);
+  const [nextCursor, setNextCursor] = useState<string | null>(null);
+  const [loadingMore, setLoadingMore] = useState(false);
+  const [loadMoreError, setLoadMoreError] = useState<string | null>(null);
+
+  const loadHistory = useCallback(async () => {
+    const page = await fetchDiagnosisHistory();
+    setNextCursor(page.nextCursor);
+    return page.items;
+  }, []);
+
+  const { data, loading, error, execute, setData } = useApiRequest(loadHistory);
   const {
     execute: removeDiagnosis,
     loading: deleting,
@@ -23,6 +33,25 @@ export default function HistoryPage() {
     execute().catch((err) => console.error("Riwayat diagnosis gagal dimuat", err));
   }, [execute]);
 
+  const handleLoadMore = async () => {
+    if (!nextCursor || loadingMore) return;
+    setLoadingMore(true);
+    setLoadMoreError(null);
+    try {
+      const page = await fetchDiagnosisHistory({ cursor: nextCursor });
+      setData((prev) => {
+        const existing = new Set((prev ?? []).map((item) => item.id));
+        return [...(prev ?? []), ...page.items.filter((item) => !existing.has(item.id))];
+      });
+      setNextCursor(page.nextCursor);
+    } catch (err) {
+      console.error("Gagal memuat riwayat berikutnya", err);
+      setLoadMoreError("Gagal memuat riwayat berikutnya.");
+    } finally {
+      setLoadingMore(false);
+    }
+  };
+
   const handleDelete = async (id: number) => {
     if (!window.confirm("Hapus diagnosis ini dari riwayat?")) return;
     setDeleteError(null);
@@ -103,6 +132,17 @@ export default function HistoryPage() {
                 </div>
               );
             })}
+            {nextCursor ? (
+              <button
+                type="button"
+                onClick={handleLoadMore}
+                disabled={loadingMore}
+                className="justify-self-center rounded-full border border-emerald-200 px-5 py-2 text-sm font-semibold text-emerald-700 hover:bg-emerald-50 disabled:opacity-60"
+              >
+                {loadingMore ? "Memuat..." : "Muat lebih banyak"}
+              </button>
+            ) : null}
+            {loadMoreError ? <p className="text-center text-sm text-red-600">{loadMoreError}</p> : null}
           </div>
         ) : (
           <DataState
@@ -107,6 +107,20 @@ export type DiagnosisHistoryItem = {
   confidence: number;
 };
 
+export type DiagnosisHistoryPage = {
+  items: DiagnosisHistoryItem[];
+  nextCursor: string | null;
+};
+
+export type DiagnosisHistoryFilters = {
+  limit?: number;
+  cursor?: string | null;
+  issue?: string;
+  plant?: string;
+  start?: string;
+  end?: string;
+};
+
 export type LogEntry = {
   id: number;
   title: string;
@@ -138,6 +152,11 @@ export type CommunityPost = {
   isOwner: boolean;
 };
 
+export type CommunityFeedPage = {
+  items: CommunityPost[];
+  nextCursor: string | null;
+};
+
 export type CommunityComment = {
   id: number;
   postId: number;
@@ -234,9 +253,21 @@ export const fetchDiagnosis = async (id: string, config?: AxiosRequestConfig): P
 };
 
 export const fetchDiagnosisHistory = async (
+  params?: DiagnosisHistoryFilters,
   config?: AxiosRequestConfig
-): Promise<DiagnosisHistoryItem[]> => {
-  const response = await apiClient.get<DiagnosisHistoryItem[]>("/diagnosis", config);
+): Promise<DiagnosisHistoryPage> => {
+  const response = await apiClient.get<DiagnosisHistoryPage>("/diagnosis", {
+    ...config,
+    params: {
+      ...config?.params,
+      limit: params?.limit,
+      cursor: params?.cursor ?? undefined,
+      issue: params?.issue || undefined,
+      plant: params?.plant || undefined,
+      start: params?.start || undefined,
+      end: params?.end || undefined,
+    },
+  });
   return response.data;
 };
 
@@ -318,9 +349,13 @@ export const updateReminder = async (
 };
 
 export const fetchCommunityPosts = async (
+  params?: { limit?: number; cursor?: string | null },
   config?: AxiosRequestConfig
-): Promise<CommunityPost[]> => {
-  const response = await apiClient.get<CommunityPost[]>("/community/posts", config);
+): Promise<CommunityFeedPage> => {
+  const response = await apiClient.get<CommunityFeedPage>("/community/posts", {
+    ...config,
+    params: { ...config?.params, limit: params?.limit, cursor: params?.cursor ?? undefined },
+  });
   return response.data;
 };
 